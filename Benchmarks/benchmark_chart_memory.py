@@ -0,0 +1,75 @@
+import argparse
+import os
+import resource
+import tempfile
+import time
+from datetime import datetime
+
+import matplotlib.pyplot as plt
+
+from FlowMetricsCSV.CsvService import CsvService
+from FlowMetricsCSV.FlowMetricsService import FlowMetricsService
+
+from Benchmarks.benchmark_ingestion import DATE_FORMAT, write_benchmark_file
+
+def get_rss_in_mb():
+    # Current resident set size on Linux, the peak resident set size everywhere else
+    try:
+        with open("/proc/self/statm", 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description="Renders many charts in one process and checks that the memory usage stays flat.")
+    parser.add_argument("--charts", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100, help="Charts that are rendered before the memory usage is measured")
+    parser.add_argument("--max-growth", type=float, default=20, help="Allowed growth of the memory usage in MB after the warmup")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        file_path = os.path.join(folder, "benchmark.csv")
+        write_benchmark_file(file_path, args.items)
+
+        work_items = CsvService().parse_work_item_table(file_path, ";", "Activated Date", "Closed Date", DATE_FORMAT, DATE_FORMAT, "Story Points", "ID")
+        flow_metrics_service = FlowMetricsService(False, os.path.join(folder, "Charts"), datetime(2024, 6, 30))
+
+        # Charts without item labels, so the time is spent in rendering and not in placing the labels
+        baseline_start = datetime(2024, 1, 1)
+        baseline_end = datetime(2024, 3, 31)
+        charts = [
+            lambda: flow_metrics_service.plot_throughput_run_chart(work_items, 90, "Throughput.png", 'days'),
+            lambda: flow_metrics_service.plot_work_in_process_run_chart(work_items, 90, "WorkInProcess.png"),
+            lambda: flow_metrics_service.plot_work_started_vs_finished_chart(work_items, 90, 'orange', 'green', "StartedVsFinished.png"),
+            lambda: flow_metrics_service.plot_throughput_process_behaviour_chart(work_items, baseline_start, baseline_end, 90, "Throughput_PBC.png"),
+            lambda: flow_metrics_service.plot_wip_process_behaviour_chart(work_items, baseline_start, baseline_end, 90, "WorkInProgress_PBC.png"),
+        ]
+
+        start = time.perf_counter()
+        rss_after_warmup = None
+
+        for index in range(args.charts):
+            charts[index % len(charts)]()
+
+            if index + 1 == args.warmup:
+                rss_after_warmup = get_rss_in_mb()
+
+        elapsed_time = time.perf_counter() - start
+        rss_at_end = get_rss_in_mb()
+
+    if rss_after_warmup is None:
+        rss_after_warmup = rss_at_end
+
+    growth = rss_at_end - rss_after_warmup
+    open_figures = len(plt.get_fignums())
+
+    print("{0} charts in {1:.1f}s ({2:.1f} ms per chart)".format(args.charts, elapsed_time, elapsed_time * 1000 / args.charts))
+    print("RSS after {0} charts: {1:.1f} MB, after {2} charts: {3:.1f} MB, growth {4:.1f} MB".format(args.warmup, rss_after_warmup, args.charts, rss_at_end, growth))
+    print("Open pyplot figures: {0}".format(open_figures))
+
+    if growth > args.max_growth or open_figures > 0:
+        raise SystemExit("Memory usage is not flat: growth of {0:.1f} MB (allowed {1} MB), {2} open figures".format(growth, args.max_growth, open_figures))
+
+if __name__ == "__main__":
+    main()
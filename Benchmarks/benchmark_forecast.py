@@ -0,0 +1,97 @@
+import argparse
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from FlowMetricsCSV.FlowMetricsCalculator import FlowMetricsCalculator
+from FlowMetricsCSV.MonteCarloSimulation import MonteCarloSimulation
+from FlowMetricsCSV.SyntheticDataGenerator import SyntheticDataGenerator
+
+def simulate_day_by_day(random, daily_throughput, remaining_items, trials, max_days):
+    # Every day of every trial is drawn on its own, like a loop over the days would
+    done_items = np.zeros(trials, dtype=np.int64)
+    completion_days = np.full(trials, np.inf)
+    is_active = np.ones(trials, dtype=bool)
+
+    for day in range(1, max_days + 1):
+        done_items += daily_throughput[random.integers(0, len(daily_throughput), trials)]
+
+        is_done = is_active & (done_items >= remaining_items)
+        completion_days[is_done] = day
+        is_active &= ~is_done
+
+        if not is_active.any():
+            break
+
+    return completion_days
+
+def get_distribution_deviation(completion_days, reference_days, max_days):
+    # Largest difference of the shares of the trials that are done within each day
+    days = np.arange(1, max_days + 1)
+    shares = np.searchsorted(np.sort(completion_days), days, side='right') / len(completion_days)
+    reference_shares = np.searchsorted(np.sort(reference_days), days, side='right') / len(reference_days)
+
+    return np.abs(shares - reference_shares).max()
+
+def check_forecast_dates(calculator, items, failures):
+    # Today has a time of day, a fixed target date still counts whole days
+    today = calculator.today.date()
+
+    for (target_date, expected_days) in [(datetime(2026, 10, 19), 1), (datetime(2026, 11, 1), 14)]:
+        metrics = calculator.calculate_how_many_forecast(items, 90, target_date, [85], trials=1000, seed=1)
+        print("How many until {0}: {1} days".format(target_date.date(), metrics["forecast_days"]))
+
+        if metrics["forecast_days"] != expected_days or metrics["target_date"] != target_date.date():
+            failures.append("How many until {0}: {1} days until {2} instead of {3} days".format(target_date.date(), metrics["forecast_days"], metrics["target_date"], expected_days))
+
+    # The days of the when forecast count from the date of today as well
+    metrics = calculator.calculate_when_forecast(items, 90, 20, [85], trials=1000, seed=1)
+    first_date = metrics["dates"][0]
+
+    if type(first_date) is not date or first_date != today + timedelta(days=int(metrics["outcomes"][0])):
+        failures.append("When: the first date {0} is not {1} days after {2}".format(first_date, metrics["outcomes"][0], today))
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures how long the Monte Carlo forecasts take and fails if the when forecast is over the budget, if its trials don't follow a day by day simulation or if the forecast dates are off.")
+    parser.add_argument("--trials", type=int, default=1000000)
+    parser.add_argument("--remaining-items", type=int, nargs='+', default=[20, 500])
+    parser.add_argument("--max-seconds", type=float, default=1.0, help="Budget of the when forecast")
+    parser.add_argument("--check-trials", type=int, default=200000, help="Trials that are compared with a day by day simulation")
+    parser.add_argument("--max-deviation", type=float, default=0.01, help="Allowed difference of the shares of the trials done within a day")
+    args = parser.parse_args()
+
+    # Seeded items, today is in the middle of the day
+    calculator = FlowMetricsCalculator(datetime(2026, 10, 18, 10, 30))
+    items = SyntheticDataGenerator().generate_work_item_table(5000, calculator.today)
+    daily_throughput = np.asarray(calculator.get_daily_throughput_for_forecast(items, 90), dtype=np.int64)
+    failures = []
+
+    check_forecast_dates(calculator, items, failures)
+
+    start = time.perf_counter()
+    MonteCarloSimulation(args.trials, seed=1).simulate_how_many(daily_throughput, 30)
+    print("How many in 30 days, {0} trials: {1:.3f}s".format(args.trials, time.perf_counter() - start))
+
+    for remaining_items in args.remaining_items:
+        start = time.perf_counter()
+        MonteCarloSimulation(args.trials, seed=1).simulate_when(daily_throughput, remaining_items)
+        when_time = time.perf_counter() - start
+
+        completion_days = MonteCarloSimulation(args.check_trials, seed=2).simulate_when(daily_throughput, remaining_items, 3650)
+        reference_days = simulate_day_by_day(np.random.default_rng(3), daily_throughput, remaining_items, args.check_trials, 3650)
+        deviation = get_distribution_deviation(completion_days, reference_days, 3650)
+
+        print("When {0} items, {1} trials: {2:.3f}s, deviation from a day by day simulation {3:.4f}".format(remaining_items, args.trials, when_time, deviation))
+
+        if when_time > args.max_seconds:
+            failures.append("When {0} items: {1:.3f}s is over the budget of {2:.3f}s".format(remaining_items, when_time, args.max_seconds))
+
+        if deviation > args.max_deviation:
+            failures.append("When {0} items: the trials deviate by {1:.4f} from a day by day simulation".format(remaining_items, deviation))
+
+    if failures:
+        raise SystemExit("The forecasts failed:\n" + "\n".join(failures))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from FlowMetricsCSV.SyntheticDataGenerator import SyntheticDataGenerator
+from FlowMetricsCSV.WorkItemTable import WorkItemTable
+from FlowMetricsCSV.main import get_group_folder_names
+
+# Values that end up with the same folder name once the characters that can't be part of one are replaced
+COLLIDING_GROUPS = ["Team/A", "Team\\A", "team_a", "Team A.", "", "Ungrouped", " . "]
+
+def get_grouped_items(item_count, group_count):
+    items = SyntheticDataGenerator().generate_work_item_table(item_count, datetime(2024, 6, 30))
+
+    # Area paths of the teams plus the colliding values, every group has items
+    group_names = np.array(["Area\\Team {0}".format(index) for index in range(group_count)] + COLLIDING_GROUPS, dtype=object)
+    groups = group_names[np.random.default_rng(42).permutation(np.arange(item_count) % len(group_names))]
+
+    return WorkItemTable(items.started_dates, items.closed_dates, items.cycle_times, items.work_item_ages, items.estimations, items.item_titles, groups, items.started_times, items.closed_times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures how long the items take to be split into their groups and fails if two groups get the same charts folder or a group loses items.")
+    parser.add_argument("--items", type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument("--groups", type=int, default=100)
+    args = parser.parse_args()
+
+    failures = []
+
+    for item_count in args.items:
+        items = get_grouped_items(item_count, args.groups)
+
+        start = time.perf_counter()
+        (sorted_items, groups) = items.sort_by_group()
+        sort_time = time.perf_counter() - start
+
+        folder_names = get_group_folder_names([group for (group, _, _) in groups])
+        folders = dict(zip([group for (group, _, _) in groups], folder_names))
+
+        print("{0} items, {1} groups: {2:.3f}s, colliding groups stored in {3}".format(item_count, len(groups), sort_time, [folders[group] for group in COLLIDING_GROUPS]))
+
+        # Folders that only differ in case are the same folder on Windows and macOS
+        if len({folder_name.lower() for folder_name in folder_names}) != len(groups):
+            failures.append("{0} items: groups share a charts folder".format(item_count))
+
+        if folders[""] != "Ungrouped" or folders["Ungrouped"] == "Ungrouped":
+            failures.append("{0} items: the items without a value are not the ones in Ungrouped".format(item_count))
+
+        for (group, group_start, group_end) in groups:
+            if not (sorted_items.groups[group_start:group_end] == group).all() or group_end - group_start != np.count_nonzero(items.groups == group):
+                failures.append("{0} items: group '{1}' doesn't have all of its items".format(item_count, group))
+
+    if failures:
+        raise SystemExit("The groups are not split correctly:\n" + "\n".join(failures))
+
+if __name__ == "__main__":
+    main()
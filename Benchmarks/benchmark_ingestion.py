@@ -0,0 +1,71 @@
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from FlowMetricsCSV.CsvService import CsvService
+from FlowMetricsCSV.WorkItemTable import WorkItemTable
+
+DATE_FORMAT = "%m/%d/%Y %I:%M:%S %p"
+
+def write_benchmark_file(file_path, item_count):
+    random.seed(42)
+    today = datetime(2024, 6, 30)
+
+    with open(file_path, 'w', newline='') as file:
+        writer = csv.writer(file, delimiter=";")
+        writer.writerow(["Closed Date", "Activated Date", "ID", "Story Points", "Title"])
+
+        for index in range(item_count):
+            started_date = today - timedelta(days=random.randint(0, 730), seconds=random.randint(0, 86399))
+            closed_date = started_date + timedelta(days=random.randint(0, 60), seconds=random.randint(0, 86399))
+
+            closed = closed_date.strftime(DATE_FORMAT) if closed_date <= today and random.random() < 0.9 else ""
+            estimation = random.choice(["", "1", "2", "3", "5", "8"])
+
+            writer.writerow([closed, started_date.strftime(DATE_FORMAT), index, estimation, "Item {0}".format(index)])
+
+def assert_tables_equal(expected, actual):
+    for column in ["started_dates", "closed_dates", "started_times", "closed_times", "cycle_times", "estimations"]:
+        np.testing.assert_array_equal(getattr(expected, column), getattr(actual, column), err_msg=column)
+
+    # Ages depend on the time the items are parsed, they have to match within a day
+    np.testing.assert_allclose(expected.work_item_ages, actual.work_item_ages, atol=1, err_msg="work_item_ages")
+    assert expected.item_titles.tolist() == actual.item_titles.tolist(), "item_titles"
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the row-by-row csv parser with the vectorized one.")
+    parser.add_argument("--items", type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    csv_service = CsvService()
+
+    # The cli always loads pandas to read a csv file, so the import is not part of the measured time
+    import pandas
+
+    with tempfile.TemporaryDirectory() as folder:
+        for item_count in args.items:
+            file_path = os.path.join(folder, "benchmark_{0}.csv".format(item_count))
+            write_benchmark_file(file_path, item_count)
+
+            parse_arguments = (file_path, ";", "Activated Date", "Closed Date", DATE_FORMAT, DATE_FORMAT, "Story Points", "ID")
+
+            start = time.perf_counter()
+            expected = WorkItemTable.from_work_items(csv_service.parse_items(*parse_arguments))
+            row_by_row_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = csv_service.parse_work_item_table(*parse_arguments)
+            vectorized_time = time.perf_counter() - start
+
+            assert_tables_equal(expected, actual)
+
+            print("{0} items: row by row {1:.3f}s, vectorized {2:.3f}s, speedup {3:.1f}x".format(item_count, row_by_row_time, vectorized_time, row_by_row_time / vectorized_time))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import io
+import time
+
+import numpy as np
+
+from FlowMetricsCSV.ChartCanvas import ChartCanvas
+from FlowMetricsCSV.LabelPlacement import LabelPlacement
+
+def place_labels(chart_canvas, label_placement, x_values, y_values, labels):
+    axes = chart_canvas.create_chart()
+    axes.scatter(x_values, y_values)
+
+    start = time.perf_counter()
+    label_placement.add_labels(axes, x_values, y_values, labels)
+    placement_time = time.perf_counter() - start
+
+    # Drawing the labels is part of the cost, so the chart is rendered as well
+    start = time.perf_counter()
+    chart_canvas.save_chart(io.BytesIO())
+    rendering_time = time.perf_counter() - start
+
+    return (placement_time, rendering_time)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures how long the label placement strategies take for charts with many items.")
+    parser.add_argument("--points", type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument("--strategies", type=str, nargs='+', default=LabelPlacement.STRATEGIES)
+    args = parser.parse_args()
+
+    chart_canvas = ChartCanvas(False, "benchmark")
+    random = np.random.default_rng(42)
+
+    for point_count in args.points:
+        # Cycle times over 90 days, like the items of a busy cycle time scatterplot
+        x_values = random.uniform(0, 90, point_count).tolist()
+        y_values = np.ceil(random.lognormal(1.5, 0.8, point_count)).tolist()
+        labels = [str(100000 + index) for index in range(point_count)]
+
+        for strategy in args.strategies:
+            try:
+                (placement_time, rendering_time) = place_labels(chart_canvas, LabelPlacement(strategy), x_values, y_values, labels)
+            except MemoryError as error:
+                # adjustText compares all pairs of overlapping labels at once, which runs out of memory for dense charts
+                print("{0} points, {1}: failed with {2}".format(point_count, strategy, type(error).__name__))
+                continue
+
+            print("{0} points, {1}: placement {2:.3f}s, rendering {3:.3f}s".format(point_count, strategy, placement_time, rendering_time))
+
+if __name__ == "__main__":
+    main()
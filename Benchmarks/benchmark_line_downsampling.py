@@ -0,0 +1,70 @@
+import argparse
+import time
+
+import numpy as np
+
+from FlowMetricsCSV.ChartCanvas import ChartCanvas
+from FlowMetricsCSV.LineDownsampling import LineDownsampling
+from FlowMetricsCSV.XmRChart import XmRChart
+
+def get_series(random, name, points):
+    if name == "wip":
+        # Daily WIP as a random walk with a few spikes, like a multi-year history
+        values = np.maximum(np.cumsum(random.integers(-2, 3, points)) + 50, 0).astype(np.float64)
+        spikes = random.choice(points, 10, replace=False)
+        values[spikes] += random.integers(20, 60, len(spikes))
+        return values
+
+    # Cycle times of closed items, with a few items that took much longer
+    return np.ceil(random.lognormal(1.5, 0.8, points))
+
+def draw_line(chart_canvas, values, kept_points):
+    # Draws the line and returns how long it took
+    start = time.perf_counter()
+
+    axes = chart_canvas.create_chart()
+    x_values = np.arange(len(values))
+
+    if kept_points is not None:
+        (x_values, values) = (x_values[kept_points], values[kept_points])
+
+    axes.plot(x_values, values, marker='o', linestyle='-', color='b')
+    axes.figure.canvas.draw()
+    drawing_time = time.perf_counter() - start
+
+    chart_canvas.discard_chart()
+
+    return drawing_time
+
+def main():
+    # That the downsampled line keeps the shape of the series is checked by Tests/test_line_downsampling.py
+    parser = argparse.ArgumentParser(description="Measures how long the run charts take with and without downsampling.")
+    parser.add_argument("--points", type=int, nargs='+', default=[3650, 36500, 365000])
+    parser.add_argument("--series", type=str, nargs='+', default=["wip", "cycle_times"])
+    args = parser.parse_args()
+
+    chart_canvas = ChartCanvas(False, "benchmark")
+    line_downsampling = LineDownsampling()
+    random = np.random.default_rng(42)
+
+    for point_count in args.points:
+        for name in args.series:
+            values = get_series(random, name, point_count)
+
+            # The values outside the limits of the first 60 values have to be drawn, like in the process behaviour charts
+            outside_limits = XmRChart.from_baseline(values[:60]).get_signals(values)["outside_limits"]
+
+            axes = chart_canvas.create_chart()
+            kept_points = line_downsampling.get_kept_points(axes, values, outside_limits)
+            chart_canvas.discard_chart()
+
+            full_time = draw_line(chart_canvas, values, None)
+            downsampled_time = draw_line(chart_canvas, values, kept_points)
+
+            kept_count = len(values) if kept_points is None else len(kept_points)
+
+            print("{0} {1}: kept {2} points, all points {3:.3f}s, downsampled {4:.3f}s, {5} values outside the limits".format(
+                point_count, name, kept_count, full_time, downsampled_time, np.count_nonzero(outside_limits)))
+
+if __name__ == "__main__":
+    main()
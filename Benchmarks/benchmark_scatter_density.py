@@ -0,0 +1,48 @@
+import argparse
+import io
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from FlowMetricsCSV.ChartCanvas import ChartCanvas
+from FlowMetricsCSV.ScatterDensity import ScatterDensity
+
+def draw_chart(chart_canvas, scatter_density, x_values, y_values):
+    start = time.perf_counter()
+
+    axes = chart_canvas.create_chart()
+    scatter_density.add_points(axes, x_values, y_values)
+
+    # The percentile lines are drawn on top of the points or the density
+    for value in np.percentile(y_values, [50, 85]):
+        axes.axhline(y=value, color='red', linestyle='--')
+
+    chart_canvas.save_chart(io.BytesIO())
+
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures how long the cycle time scatterplot takes with single points and with the density.")
+    parser.add_argument("--points", type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument("--max-scatter-points", type=int, default=100000, help="Larger charts are only drawn as density")
+    args = parser.parse_args()
+
+    chart_canvas = ChartCanvas(False, "benchmark")
+    random = np.random.default_rng(42)
+
+    for point_count in args.points:
+        # Items closed over two years with lognormal cycle times
+        first_day = date(2023, 1, 1)
+        x_values = [first_day + timedelta(days=int(day)) for day in random.integers(0, 730, point_count)]
+        y_values = np.ceil(random.lognormal(1.5, 0.8, point_count))
+
+        if point_count <= args.max_scatter_points:
+            scatter_time = draw_chart(chart_canvas, ScatterDensity(None), x_values, y_values)
+            print("{0} points, scatter: {1:.3f}s".format(point_count, scatter_time))
+
+        density_time = draw_chart(chart_canvas, ScatterDensity(0), x_values, y_values)
+        print("{0} points, density: {1:.3f}s".format(point_count, density_time))
+
+if __name__ == "__main__":
+    main()
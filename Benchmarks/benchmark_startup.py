@@ -0,0 +1,48 @@
+import argparse
+import subprocess
+import sys
+import time
+
+# Libraries that must not be loaded before a csv file is parsed or a chart is created
+HEAVY_MODULES = ["numpy", "pandas", "matplotlib", "adjustText", "scipy"]
+
+def get_import_time_in_ms(module_name):
+    # Cumulative import time of the module as reported by python -X importtime
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import {0}".format(module_name)], capture_output=True, text=True, check=True)
+
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module_name:
+            return int(parts[1]) / 1000
+
+    raise ValueError("No import time found for {0}".format(module_name))
+
+def get_loaded_heavy_modules(module_name):
+    script = "import sys, {0}; print(' '.join(module for module in {1} if module in sys.modules))".format(module_name, HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+def get_help_time_in_ms():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "FlowMetricsCSV.main", "--help"], capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the startup time of the flowmetricscsv cli and fails if it is over the budget.")
+    parser.add_argument("--runs", type=int, default=5, help="The fastest of this many runs is used")
+    parser.add_argument("--budget", type=float, default=150, help="Allowed import time of FlowMetricsCSV.main in ms")
+    args = parser.parse_args()
+
+    import_time = min(get_import_time_in_ms("FlowMetricsCSV.main") for _ in range(args.runs))
+    help_time = min(get_help_time_in_ms() for _ in range(args.runs))
+    loaded_heavy_modules = get_loaded_heavy_modules("FlowMetricsCSV.main")
+
+    print("Import of FlowMetricsCSV.main: {0:.1f} ms (budget {1} ms)".format(import_time, args.budget))
+    print("flowmetricscsv --help: {0:.1f} ms including the interpreter startup".format(help_time))
+    print("Heavy modules loaded at startup: {0}".format(loaded_heavy_modules or "none"))
+
+    if import_time > args.budget or loaded_heavy_modules:
+        raise SystemExit("Startup is over the budget: {0:.1f} ms import time, heavy modules {1}".format(import_time, loaded_heavy_modules))
+
+if __name__ == "__main__":
+    main()
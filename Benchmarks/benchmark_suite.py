@@ -0,0 +1,128 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime
+from importlib.metadata import version
+
+import numpy as np
+
+import FlowMetricsCSV
+from FlowMetricsCSV.CsvService import CsvService
+from FlowMetricsCSV.MetricsExporter import MetricsExporter
+from FlowMetricsCSV.SyntheticDataGenerator import SyntheticDataGenerator
+from FlowMetricsCSV.main import get_chart_jobs
+
+DATE_FORMAT = "%m/%d/%Y %I:%M:%S %p"
+TODAY = datetime(2024, 6, 30)
+
+def get_benchmark_config(label_placement):
+    # The charts of the example config, with the labels placed in a way that works for any number of items
+    with open(os.path.join(os.path.dirname(FlowMetricsCSV.__file__), "ExampleConfig.json"), 'r') as file:
+        config = json.load(file)
+
+    for chart_config in config.values():
+        if "labelPlacement" in chart_config:
+            chart_config["labelPlacement"] = label_placement
+
+    return config
+
+def measure(function):
+    # Returns the time in seconds, the output of the function is not printed
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+
+def run_benchmark(folder, item_count, args, config):
+    result = {"items": item_count}
+
+    generator = SyntheticDataGenerator(args.seed, args.wip or 1, args.open_item_ratio, args.cycle_time_median, args.cycle_time_sigma)
+    if args.wip is None:
+        # The items are spread over the history, so the charts show a similar time range for all sizes
+        generator.wip = max(1, item_count * generator.get_mean_cycle_time() / args.history)
+
+    file_path = os.path.join(folder, "benchmark_{0}.csv".format(item_count))
+    result["wip"] = generator.wip
+    result["generate"] = measure(lambda: generator.write_csv(file_path, item_count, ";", "Activated Date", "Closed Date", DATE_FORMAT, DATE_FORMAT, "Story Points", "ID", TODAY))
+
+    csv_service = CsvService()
+    parse_arguments = (file_path, ";", "Activated Date", "Closed Date", DATE_FORMAT, DATE_FORMAT, "Story Points", "ID")
+    result["ingestion"] = min(measure(lambda: csv_service.parse_work_item_table(*parse_arguments)) for _ in range(args.runs))
+
+    work_items = generator.generate_work_item_table(item_count, TODAY)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        chart_jobs = get_chart_jobs(config)
+
+    # Only calculates the metrics, so the time of storing them is not measured
+    metrics_exporter = MetricsExporter(os.path.join(folder, "Metrics"), "json", TODAY)
+    result["calculate"] = {}
+    for (plot_function_name, arguments) in chart_jobs:
+        result["calculate"][plot_function_name] = min(measure(lambda: metrics_exporter.calculate(work_items, plot_function_name, arguments)) for _ in range(args.runs))
+
+    if not args.skip_charts:
+        # Rendering includes the calculation, a chart is rendered once as it is the slowest part
+        from FlowMetricsCSV.FlowMetricsService import FlowMetricsService
+
+        flow_metrics_service = FlowMetricsService(False, os.path.join(folder, "Charts"), TODAY)
+        result["chart"] = {}
+        for (plot_function_name, arguments) in chart_jobs:
+            result["chart"][plot_function_name] = measure(lambda: getattr(flow_metrics_service, plot_function_name)(work_items, *arguments))
+
+    return result
+
+def print_result(result):
+    print("{0} items (WIP {1:.0f}): generated in {2:.3f}s, ingestion {3:.3f}s".format(result["items"], result["wip"], result["generate"], result["ingestion"]))
+
+    for (plot_function_name, calculate_time) in result["calculate"].items():
+        chart_time = result.get("chart", {}).get(plot_function_name)
+        chart_text = "" if chart_time is None else ", chart {0:.3f}s".format(chart_time)
+
+        print("    {0}: calculate {1:.4f}s{2}".format(plot_function_name, calculate_time, chart_text))
+
+def main():
+    parser = argparse.ArgumentParser(description="Times ingestion, the calculation of each chart and the rendering of each chart on synthetic items and stores the results as JSON.")
+    parser.add_argument("--items", type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument("--runs", type=int, default=3, help="Ingestion and calculations are repeated, the fastest run is stored")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--wip", type=float, default=None, help="Average number of items in process, by default the items are spread over --history days")
+    parser.add_argument("--history", type=int, default=730, help="Days over which the items are started if --wip is not set")
+    parser.add_argument("--open-item-ratio", type=float, default=0.05, help="Share of the items that are never closed")
+    parser.add_argument("--cycle-time-median", type=float, default=5)
+    parser.add_argument("--cycle-time-sigma", type=float, default=0.8, help="Sigma of the lognormal cycle time distribution")
+    parser.add_argument("--label-placement", type=str, default="grid", help="Label placement of the charts, exact does not scale to many items")
+    parser.add_argument("--skip-charts", action='store_true', help="Only measure ingestion and calculations")
+    parser.add_argument("--output", type=str, default="benchmark_results.json")
+    args = parser.parse_args()
+
+    config = get_benchmark_config(args.label_placement)
+
+    results = {
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "version": version("flowmetricscsv"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "settings": vars(args),
+        "results": [],
+    }
+
+    with tempfile.TemporaryDirectory() as folder:
+        for item_count in args.items:
+            result = run_benchmark(folder, item_count, args, config)
+            print_result(result)
+
+            results["results"].append(result)
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+
+    print("Stored results at {0}".format(args.output))
+
+if __name__ == "__main__":
+    main()
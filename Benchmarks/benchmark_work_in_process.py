@@ -0,0 +1,77 @@
+import argparse
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from FlowMetricsCSV.FlowMetricsCalculator import FlowMetricsCalculator
+from FlowMetricsCSV.SyntheticDataGenerator import SyntheticDataGenerator
+from FlowMetricsCSV.WorkItem import WorkItem
+from FlowMetricsCSV.WorkItemTable import MISSING_DATE, WorkItemTable
+
+def to_datetime(ordinal, time_of_day):
+    if ordinal == MISSING_DATE:
+        return None
+
+    return datetime.fromordinal(int(ordinal)) + timedelta(microseconds=int(time_of_day))
+
+def to_work_items(items):
+    return [WorkItem(to_datetime(started_date, started_time), to_datetime(closed_date, closed_time), title, None)
+            for (started_date, started_time, closed_date, closed_time, title)
+            in zip(items.started_dates, items.started_times, items.closed_dates, items.closed_times, items.item_titles)]
+
+def get_boundary_items(today, history):
+    # Items started or closed right before, at and after today and the start of the history
+    moments = [today + timedelta(days=days, hours=hours) for days in [-history, 0] for hours in [-1, 0, 1]]
+    return [WorkItem(started_date, closed_date, "Boundary", None) for started_date in moments for closed_date in moments + [None] if closed_date is None or closed_date >= started_date]
+
+def calculate_work_in_process_item_by_item(today, items, history):
+    # The work in process run chart compared item by item, with the dates including their time of day
+    chart_start_date = today - timedelta(days=history)
+    relevant_items = [item for item in items if (item.closed_date is None or item.closed_date > chart_start_date) and item.started_date is not None and item.started_date <= today]
+
+    history_dates = [(today - timedelta(days=days)).date() for days in range(history - 1, -1, -1)]
+    wip_counts = Counter()
+
+    for item in relevant_items:
+        wip_counts[item.started_date.date()] += 1
+        if item.closed_date:
+            wip_counts[item.closed_date.date()] -= 1
+
+    return np.cumsum([wip_counts[date] for date in history_dates])
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures how long the work in process run chart takes and fails if it differs from comparing the items one by one, also when today is midnight or has a time of day.")
+    parser.add_argument("--items", type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument("--history", type=int, default=90)
+    args = parser.parse_args()
+
+    failures = []
+
+    for today in [datetime(2024, 6, 30), datetime(2024, 6, 30, 10, 30)]:
+        calculator = FlowMetricsCalculator(today)
+
+        for item_count in args.items:
+            items = to_work_items(SyntheticDataGenerator().generate_work_item_table(item_count, today)) + get_boundary_items(today, args.history)
+            table = WorkItemTable.from_work_items(items)
+
+            start = time.perf_counter()
+            expected = calculate_work_in_process_item_by_item(today, items, args.history)
+            item_by_item_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            metrics = calculator.calculate_work_in_process_run_chart(table, args.history)
+            table_time = time.perf_counter() - start
+
+            print("Today {0}, {1} items: item by item {2:.3f}s, table {3:.3f}s".format(today, len(items), item_by_item_time, table_time))
+
+            if not np.array_equal(metrics["work_in_process"], expected):
+                days = np.flatnonzero(metrics["work_in_process"] != expected)
+                failures.append("Today {0}, {1} items: the work in process differs on {2} days, first on {3}".format(today, len(items), len(days), metrics["dates"][days[0]]))
+
+    if failures:
+        raise SystemExit("The work in process run chart failed:\n" + "\n".join(failures))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from .Profiler import profiler
+
+class BatchScheduler:
+    def __init__(self, workers):
+        self.workers = workers
+
+    def run(self, config_paths, read_batch_job, load_work_items, create_charts):
+        # Each batch job holds the settings of one config. Configs with the same input signature share the parsed items,
+        # so every input is parsed exactly once. create_charts must be a module level function, so it can be sent to the
+        # worker processes. A failing config is reported in the summary instead of stopping the other configs.
+        batch_jobs = []
+        results = []
+
+        input_groups = {}
+        for (index, config_path) in enumerate(config_paths):
+            try:
+                batch_job = read_batch_job(config_path)
+                results.append(None)
+                input_groups.setdefault(batch_job["input_signature"], []).append(index)
+            except Exception as exception:
+                batch_job = {"config_path": config_path}
+                results.append(exception)
+
+            batch_jobs.append(batch_job)
+
+        print("Parsing {0} unique Inputs for {1} Configurations".format(len(input_groups), len(batch_jobs)))
+
+        chart_runs = []
+        for indexes in input_groups.values():
+            try:
+                with profiler.stage("load items", config=batch_jobs[indexes[0]]["config_path"]) as stage:
+                    work_items = load_work_items(batch_jobs[indexes[0]])
+                    stage.set(items=len(work_items))
+
+                chart_runs.extend((index, work_items) for index in indexes)
+            except Exception as exception:
+                for index in indexes:
+                    results[index] = exception
+
+        # Showing the charts needs the main process, so those configs are never run in a worker
+        parallel_runs = [(index, work_items) for (index, work_items) in chart_runs if self.workers > 1 and not batch_jobs[index]["show_plots"]]
+        serial_runs = [(index, work_items) for (index, work_items) in chart_runs if self.workers <= 1 or batch_jobs[index]["show_plots"]]
+
+        if parallel_runs:
+            print("Creating Charts for {0} Configurations with {1} Workers".format(len(parallel_runs), self.workers))
+
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [(index, executor.submit(create_charts, batch_jobs[index], work_items)) for (index, work_items) in parallel_runs]
+
+                for (index, future) in futures:
+                    try:
+                        results[index] = future.result()
+                    except Exception as exception:
+                        results[index] = exception
+
+        for (index, work_items) in serial_runs:
+            try:
+                with profiler.stage("create charts", config=batch_jobs[index]["config_path"], items=len(work_items)):
+                    results[index] = create_charts(batch_jobs[index], work_items)
+            except Exception as exception:
+                results[index] = exception
+
+        self.print_summary(batch_jobs, results)
+
+        return results
+
+    def print_summary(self, batch_jobs, results):
+        failed_configs = sum(1 for result in results if isinstance(result, Exception))
+
+        print("================================================================")
+        print("Summary: {0} of {1} Configurations succeeded".format(len(results) - failed_configs, len(results)))
+        print("----------------------------------------------------------------")
+
+        for (batch_job, result) in zip(batch_jobs, results):
+            if isinstance(result, Exception):
+                print("❌ {0}: {1}".format(batch_job["config_path"], result))
+            else:
+                print("✅ {0}: {1} Charts created".format(batch_job["config_path"], result))
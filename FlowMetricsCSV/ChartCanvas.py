@@ -0,0 +1,85 @@
+import os
+from functools import lru_cache
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import matplotlib.image as mpimg
+from matplotlib.offsetbox import OffsetImage, AnnotationBbox
+
+from .Profiler import profiler
+
+class ChartCanvas:
+    FIGURE_SIZE = (15, 9)
+
+    def __init__(self, show_plots, current_date):
+        self.show_plots = show_plots
+        self.current_date = current_date
+
+        self.axes = None
+        self.logo = None
+
+        # Set while a chart is drawn, a chart that failed before it was stored is cleaned up by the next one
+        self.is_drawing = False
+
+    def create_chart(self):
+        if self.is_drawing:
+            self.discard_chart()
+
+        self.is_drawing = True
+
+        if self.show_plots:
+            # Only figures managed by pyplot can be shown, they are closed again once the chart was stored and shown.
+            # pyplot and the interactive backend are only loaded for this, all other charts are drawn with Agg directly.
+            import matplotlib.pyplot as plt
+
+            figure = plt.figure(figsize=self.FIGURE_SIZE)
+            self.axes = figure.add_subplot()
+            self.logo = None
+        elif self.axes is None:
+            # The same figure is used for all charts. It's not known to pyplot, so it doesn't count towards its open figures.
+            figure = Figure(figsize=self.FIGURE_SIZE)
+            FigureCanvasAgg(figure)
+            self.axes = figure.add_subplot()
+
+        return self.axes
+
+    def add_timestamp(self, axes):
+        axes.text(1, 1.02, f"Generated on {self.current_date}", transform=axes.transAxes, fontsize=10, ha='right', va='top')
+
+    def add_logo(self, axes):
+        if self.logo is None:
+            imagebox = OffsetImage(load_logo(), zoom=0.48)
+            self.logo = AnnotationBbox(imagebox, (0.065, 1.08), xycoords='axes fraction', frameon=False, box_alignment=(1, 1))
+
+        axes.add_artist(self.logo)
+
+    def save_chart(self, chart_file_path):
+        print("Storing file at {0}".format(chart_file_path))
+
+        with profiler.stage("savefig"):
+            self.axes.figure.savefig(chart_file_path)
+
+        if self.show_plots:
+            import matplotlib.pyplot as plt
+
+            plt.show()
+
+        self.discard_chart()
+
+    def discard_chart(self):
+        if self.show_plots:
+            import matplotlib.pyplot as plt
+
+            plt.close(self.axes.figure)
+            self.axes = None
+        else:
+            # Removes everything of this chart, the cached logo is added again to the next one
+            self.axes.clear()
+
+        self.is_drawing = False
+
+@lru_cache(maxsize=None)
+def load_logo():
+    # The logo is decoded once per process and shared by all charts
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return mpimg.imread(os.path.join(script_dir, "logo.png"))
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+from importlib.metadata import version
+
+from .FlowMetricsCalculator import FlowMetricsCalculator
+from .MetricsExporter import MetricsExporter, to_fingerprint_value
+
+# Columns of the items that the charts show
+INPUT_COLUMNS = ["started_dates", "started_times", "closed_dates", "closed_times", "cycle_times", "work_item_ages", "estimations"]
+
+class ChartOutputCache:
+    # Fingerprints of the charts in the charts folder, by chart name
+    MANIFEST_FILE_NAME = ".flowmetricscsv_charts.json"
+
+    def __init__(self, charts_folder, today, earliest_date):
+        self.charts_folder = charts_folder
+        self.manifest_file_path = os.path.join(charts_folder, self.MANIFEST_FILE_NAME)
+        self.metrics_exporter = MetricsExporter(charts_folder, "json", today)
+
+        # Items that are closed before the earliest date of the charts are in none of them
+        self.today = today
+        self.earliest_date = earliest_date
+
+        # A chart looks different with another version
+        self.version = version("flowmetricscsv")
+
+        self.fingerprints = {}
+        if os.path.isfile(self.manifest_file_path):
+            with open(self.manifest_file_path, 'r') as file:
+                self.fingerprints = json.load(file)
+
+        # Fingerprints of the charts that are created, they are stored once the charts exist
+        self.new_fingerprints = {}
+
+    def get_outdated_chart_jobs(self, work_items, chart_jobs):
+        # The fingerprints are built from the items and the arguments of each chart instead of its data,
+        # so up to date charts are found without calculating them and the others are only calculated to draw them
+        input_fingerprint = get_input_fingerprint(work_items, self.today, self.earliest_date)
+        outdated_chart_jobs = []
+
+        for (plot_function_name, arguments) in chart_jobs:
+            chart_name = self.metrics_exporter.get_chart_name(plot_function_name, arguments)
+            fingerprint = hashlib.sha256("{0}:{1}".format(get_chart_fingerprint(input_fingerprint, plot_function_name, arguments), self.version).encode()).hexdigest()
+
+            if self.fingerprints.get(chart_name) == fingerprint and os.path.isfile(os.path.join(self.charts_folder, chart_name)):
+                continue
+
+            outdated_chart_jobs.append((plot_function_name, arguments))
+            self.new_fingerprints[chart_name] = (fingerprint, self.get_modification_time(chart_name))
+
+        hits = len(chart_jobs) - len(outdated_chart_jobs)
+        print("Chart Cache: {0} Hits, {1} Misses - {2} of {3} Charts are up to date".format(hits, len(outdated_chart_jobs), hits, len(chart_jobs)))
+
+        return outdated_chart_jobs
+
+    def store(self):
+        # Charts without data are not created and an older file of them stays, they are checked again the next time
+        for (chart_name, (fingerprint, previous_modification_time)) in self.new_fingerprints.items():
+            modification_time = self.get_modification_time(chart_name)
+
+            if modification_time is not None and modification_time != previous_modification_time:
+                self.fingerprints[chart_name] = fingerprint
+            else:
+                self.fingerprints.pop(chart_name, None)
+
+        self.new_fingerprints = {}
+
+        with open(self.manifest_file_path, 'w') as file:
+            json.dump(self.fingerprints, file, indent=2, sort_keys=True)
+
+    def get_modification_time(self, chart_name):
+        chart_file_path = os.path.join(self.charts_folder, chart_name)
+
+        if not os.path.isfile(chart_file_path):
+            return None
+
+        return os.stat(chart_file_path).st_mtime_ns
+
+def get_input_fingerprint(work_items, today, earliest_date):
+    # Only the items within the history of the charts are part of it, the same ones that are kept when streaming.
+    # The history ends today, so the same items show something else on another day, e.g. because of their ages.
+    # The history starts and ends at the time of day of today, which changes the items at its boundaries as well.
+    items = work_items.select(FlowMetricsCalculator(today).get_items_in_history_mask(work_items, earliest_date))
+    input_hash = hashlib.sha256("{0}:{1}".format(today.date().isoformat(), items.get_time_of_day_position(today)).encode())
+
+    for column in INPUT_COLUMNS:
+        input_hash.update(getattr(items, column).tobytes())
+
+    input_hash.update("\n".join(map(str, items.item_titles)).encode('utf-8'))
+
+    return input_hash.hexdigest()
+
+def get_chart_fingerprint(input_fingerprint, plot_function_name, arguments):
+    # Charts with the same fingerprint look the same: the same plot function draws the same items with the same settings
+    chart_settings = json.dumps({"chart": plot_function_name, "arguments": arguments}, default=to_fingerprint_value, sort_keys=True)
+    return hashlib.sha256("{0}:{1}".format(input_fingerprint, chart_settings).encode()).hexdigest()
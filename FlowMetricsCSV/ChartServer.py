@@ -0,0 +1,201 @@
+import asyncio
+import copy
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+from .main import get_chart_jobs, load_work_items, parse_history, read_settings
+
+STATUS_TEXTS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+class ChartServer:
+    def __init__(self, config_path, args, cache_size = 64):
+        self.config_path = config_path
+        self.args = args
+        self.cache_size = cache_size
+
+        # Rendered charts and metrics by chart, format, history, date and time of day of today. The oldest ones are removed first.
+        self.cache = OrderedDict()
+
+        # matplotlib is not thread safe, so all charts are loaded and created one after another by the same thread
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        # The services store their output as files, which are read from here and then removed again
+        self.output_folder = tempfile.mkdtemp(prefix="flowmetricscsv_server_")
+
+        self.settings = None
+        self.configured_today = None
+        self.work_items = None
+        self.config_signature = None
+        self.file_signature = None
+
+    def load_if_changed(self):
+        # The config and the csv file are checked on every request, they are only read again if they changed
+        config_signature = get_file_signature(self.config_path)
+
+        if config_signature != self.config_signature:
+            print("Reading Config File {0}".format(self.config_path))
+            settings = read_settings(self.config_path, self.args, False)
+
+            # All items are kept, so the charts can be requested with any history
+            settings["chunk_size"] = None
+
+            # Without a today in the config, today is resolved for each request, so the server doesn't stay on the day it was started
+            self.configured_today = settings["today"] if settings["config"]["general"].get("today") else None
+
+            self.settings = settings
+            self.config_signature = config_signature
+            self.file_signature = None
+
+        file_signature = get_file_signature(self.settings["file_name"])
+
+        if file_signature != self.file_signature:
+            self.work_items = load_work_items(self.settings)
+            self.file_signature = file_signature
+            self.cache.clear()
+
+            print("Loaded {0} Items from {1}".format(len(self.work_items), self.settings["file_name"]))
+
+    def get_chart_jobs(self, history = None):
+        config = self.settings["config"]
+
+        if history is not None:
+            config = copy.deepcopy(config)
+
+            for chart_config in config.values():
+                if "history" in chart_config:
+                    chart_config["history"] = history
+
+        # Charts are named like their plot function, e.g. cycle_time_scatterplot for plot_cycle_time_scatterplot
+        return {plot_function_name.replace("plot_", "", 1): (plot_function_name, arguments) for (plot_function_name, arguments) in get_chart_jobs(config)}
+
+    def get_index(self):
+        self.load_if_changed()
+
+        charts = {chart: {"png": "/charts/{0}.png".format(chart), "json": "/charts/{0}.json".format(chart)} for chart in self.get_chart_jobs()}
+        index = {"config": self.config_path, "file": self.settings["file_name"], "items": len(self.work_items), "cached_outputs": len(self.cache), "charts": charts}
+
+        return (200, "application/json", json.dumps(index, indent=2).encode())
+
+    def get_chart(self, chart, output_format, history, today):
+        self.load_if_changed()
+
+        today = today or self.configured_today or datetime.today()
+
+        # Requests on the same day only get another chart if the time of day compares differently to the items
+        cache_key = (chart, output_format, history, today.date(), self.work_items.get_time_of_day_position(today))
+        if cache_key in self.cache:
+            self.cache.move_to_end(cache_key)
+            return self.cache[cache_key]
+
+        chart_jobs = self.get_chart_jobs(history)
+        if chart not in chart_jobs:
+            return (404, "application/json", json.dumps({"error": "Unknown chart '{0}', use one of {1}".format(chart, list(chart_jobs))}).encode())
+
+        (plot_function_name, arguments) = chart_jobs[chart]
+        work_items = self.work_items.with_work_item_ages(today)
+
+        for file_name in os.listdir(self.output_folder):
+            os.remove(os.path.join(self.output_folder, file_name))
+
+        if output_format == "png":
+            from .FlowMetricsService import FlowMetricsService
+
+            flow_metrics_service = FlowMetricsService(False, self.output_folder, today)
+            getattr(flow_metrics_service, plot_function_name)(work_items, *arguments)
+        else:
+            from .MetricsExporter import MetricsExporter
+
+            MetricsExporter(self.output_folder, "json", today).export(work_items, plot_function_name, arguments)
+
+        output_files = os.listdir(self.output_folder)
+        if not output_files:
+            # The chart was skipped, e.g. because there are no items in the history
+            return (404, "application/json", json.dumps({"error": "No data for chart '{0}'".format(chart)}).encode())
+
+        output_file_path = os.path.join(self.output_folder, output_files[0])
+        with open(output_file_path, 'rb') as file:
+            response = (200, mimetypes.guess_type(output_file_path)[0] or "application/octet-stream", file.read())
+
+        self.cache[cache_key] = response
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return response
+
+    def get_response(self, method, target):
+        # Returns status, content type and body for a request, without needing a connection
+        if method not in ["GET", "HEAD"]:
+            return (405, "application/json", json.dumps({"error": "Only GET is supported"}).encode())
+
+        url = urlsplit(target)
+        query = {name: values[-1] for (name, values) in parse_qs(url.query).items()}
+
+        try:
+            if url.path == "/":
+                return self.get_index()
+
+            (chart, output_format) = os.path.splitext(url.path[len("/charts/"):])
+            if not url.path.startswith("/charts/") or output_format not in [".png", ".json"]:
+                return (404, "application/json", json.dumps({"error": "Use /charts/<chart>.png or /charts/<chart>.json, / lists the charts"}).encode())
+
+            try:
+                history = parse_history(query["history"], False) if "history" in query else None
+                today = datetime.strptime(query["today"], "%Y-%m-%d") if "today" in query else None
+            except ValueError as error:
+                return (400, "application/json", json.dumps({"error": str(error)}).encode())
+
+            return self.get_chart(chart, output_format[1:], history, today)
+        except Exception as exception:
+            print("Error while handling {0}: {1}".format(target, exception))
+            return (500, "application/json", json.dumps({"error": str(exception)}).encode())
+
+    async def handle_connection(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+
+            # The headers are not needed, but have to be read before answering
+            while (await reader.readline()) not in [b"\r\n", b"\n", b""]:
+                pass
+
+            if len(request_line) != 3:
+                (status, content_type, body) = (400, "application/json", json.dumps({"error": "Invalid request"}).encode())
+            else:
+                (method, target, _) = request_line
+                (status, content_type, body) = await asyncio.get_running_loop().run_in_executor(self.executor, self.get_response, method, target)
+
+                print("{0} {1} - {2}".format(method, target, status))
+
+            headers = "HTTP/1.1 {0} {1}\r\nContent-Type: {2}\r\nContent-Length: {3}\r\nConnection: close\r\n\r\n".format(status, STATUS_TEXTS[status], content_type, len(body))
+            writer.write(headers.encode("latin-1"))
+
+            if request_line[:1] != ["HEAD"]:
+                writer.write(body)
+
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        # Loads the items before the first request, so errors in the config show up right away
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.load_if_changed)
+
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print("Serving charts at http://{0}:{1}/".format(host, port))
+
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown()
+        shutil.rmtree(self.output_folder, ignore_errors=True)
+
+def get_file_signature(file_path):
+    file_stats = os.stat(file_path)
+    return (file_stats.st_mtime_ns, file_stats.st_size)
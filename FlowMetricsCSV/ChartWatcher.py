@@ -0,0 +1,156 @@
+import os
+import time
+from datetime import date, datetime
+
+class ChartWatcher:
+    def __init__(self, config_paths, read_batch_job, load_work_items, get_chart_jobs, get_earliest_chart_date, create_charts, interval = 1, debounce = 0.5):
+        # Same functions as for the BatchScheduler. The charts are created one configuration after another,
+        # create_charts gets the chart jobs that changed since they were created the last time.
+        self.config_paths = config_paths
+        self.read_batch_job = read_batch_job
+        self.load_work_items = load_work_items
+        self.get_chart_jobs = get_chart_jobs
+        self.get_earliest_chart_date = get_earliest_chart_date
+        self.create_charts = create_charts
+        self.interval = interval
+        self.debounce = debounce
+
+        # State of each config: its settings and the fingerprints of the created charts
+        self.batch_jobs = {}
+        self.chart_fingerprints = {}
+
+        # Parsed items by input signature, shared by the configs that read them in the same way like in the BatchScheduler.
+        # Each one holds the signature of the file it was loaded from, so every config sees when the file changed.
+        self.loaded_inputs = {}
+
+        # Modification time and size of the config file when it was read and of the input file its charts were created from.
+        # They are kept for each config, as the input file can change between the updates of two configs that read it.
+        self.config_signatures = {}
+        self.input_signatures = {}
+
+        # Charts depend on today, so all of them are calculated again once the day changed
+        self.update_date = None
+
+    def watch(self):
+        self.update(self.config_paths)
+
+        print("Watching {0} for changes, press Ctrl+C to stop".format(sorted(self.get_watched_files())))
+
+        try:
+            while True:
+                changed_configs = self.wait_for_changes()
+                print("================================================================")
+
+                if date.today() != self.update_date:
+                    print("New day {0}: Calculating all Charts again".format(date.today()))
+                    changed_configs = self.config_paths
+                else:
+                    print("Changed: {0}".format(changed_configs))
+
+                self.update(changed_configs)
+        except KeyboardInterrupt:
+            print("Stopped watching")
+
+    def get_watched_files(self):
+        return set(self.config_paths) | {batch_job["file_name"] for batch_job in self.batch_jobs.values()}
+
+    def wait_for_changes(self):
+        while True:
+            time.sleep(self.interval)
+
+            if self.get_changed_configs() or date.today() != self.update_date:
+                break
+
+        # A file is often written in several steps, the changes are only handled once it stayed the same for the debounce time
+        signatures = self.get_current_signatures()
+        while True:
+            time.sleep(self.debounce)
+
+            current_signatures = self.get_current_signatures()
+            if current_signatures == signatures:
+                break
+
+            signatures = current_signatures
+
+        return self.get_changed_configs()
+
+    def get_current_signatures(self):
+        return {file_path: get_file_signature(file_path) for file_path in self.get_watched_files()}
+
+    def get_changed_configs(self):
+        signatures = self.get_current_signatures()
+        changed_configs = []
+
+        for config_path in self.config_paths:
+            batch_job = self.batch_jobs.get(config_path)
+
+            if signatures[config_path] != self.config_signatures.get(config_path) or (batch_job is not None and signatures[batch_job["file_name"]] != self.input_signatures.get(config_path)):
+                changed_configs.append(config_path)
+
+        return changed_configs
+
+    def update(self, config_paths):
+        self.update_date = date.today()
+
+        for config_path in config_paths:
+            try:
+                self.update_config(config_path)
+            except Exception as exception:
+                # The config is tried again when one of its files changes
+                print("❌ {0}: {1}".format(config_path, exception))
+
+    def update_config(self, config_path):
+        # The config is read again every time, so the settings and today are the current ones
+        self.config_signatures[config_path] = get_file_signature(config_path)
+        batch_job = self.read_batch_job(config_path)
+        self.batch_jobs[config_path] = batch_job
+
+        input_signature = get_file_signature(batch_job["file_name"])
+        self.input_signatures[config_path] = input_signature
+
+        # Items of inputs that none of the configs reads anymore are not needed anymore
+        used_inputs = {other_batch_job["input_signature"] for other_batch_job in self.batch_jobs.values()}
+        self.loaded_inputs = {signature: loaded_input for (signature, loaded_input) in self.loaded_inputs.items() if signature in used_inputs}
+
+        loaded_input = self.loaded_inputs.get(batch_job["input_signature"])
+
+        if loaded_input is None or loaded_input[0] != input_signature:
+            # With incremental parsing only the rows that were appended to the file are parsed
+            loaded_input = (input_signature, self.load_work_items(batch_job))
+            self.loaded_inputs[batch_job["input_signature"]] = loaded_input
+
+        # The ages of the items are the ones they have now, not when the file was parsed
+        work_items = loaded_input[1].with_work_item_ages(datetime.today())
+        chart_jobs = self.get_chart_jobs(batch_job["config"])
+
+        from .ChartOutputCache import get_chart_fingerprint, get_input_fingerprint
+
+        # Same fingerprints as in the ChartOutputCache, the charts are not calculated to find the changed ones
+        input_fingerprint = get_input_fingerprint(work_items, batch_job["today"], self.get_earliest_chart_date(batch_job["config"], batch_job["today"]))
+
+        previous_fingerprints = self.chart_fingerprints.get(config_path, {})
+        fingerprints = {}
+        changed_chart_jobs = []
+
+        for (plot_function_name, arguments) in chart_jobs:
+            fingerprint = get_chart_fingerprint(input_fingerprint, plot_function_name, arguments)
+            fingerprints[plot_function_name] = fingerprint
+
+            if previous_fingerprints.get(plot_function_name) != fingerprint:
+                changed_chart_jobs.append((plot_function_name, arguments))
+
+        print("{0}: {1} of {2} Charts changed".format(config_path, len(changed_chart_jobs), len(chart_jobs)))
+
+        if changed_chart_jobs:
+            self.create_charts(batch_job, work_items, changed_chart_jobs)
+
+        # Only stored once the charts were created, so failed charts are created again on the next change
+        self.chart_fingerprints[config_path] = fingerprints
+
+def get_file_signature(file_path):
+    try:
+        file_stats = os.stat(file_path)
+        return (file_stats.st_mtime_ns, file_stats.st_size)
+    except FileNotFoundError:
+        # The file is probably being replaced, it is read again once it's back
+        return None
@@ -1,15 +1,22 @@
+from .DateParser import DateParser
+from .ParseCheckpoint import ParseCheckpoint
+from .Profiler import profiler
+from .SyntheticDataGenerator import SyntheticDataGenerator
 from .WorkItem import WorkItem
-from datetime import datetime, timedelta
-
-import random
+from .WorkItemTable import WorkItemTable
 
 import csv
+import io
+
+import numpy as np
 
 class CsvService:    
        
     def parse_items(self, file_path, delimiter, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column):
         print("Loading Items from CSV File: '{0}'. Started Date Column Name '{1}', Closed Date Column Name '{2}', Start Date Format '{3}', and Closed Date Format '{4}'".format(file_path, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format))
         work_items = []
+
+        (start_date_parser, closed_date_parser) = self.create_date_parsers(start_date_format, closed_date_format)
         
         with open(file_path, 'r', encoding='utf-8-sig') as file:
             csv_reader = csv.DictReader(file, delimiter=delimiter)
@@ -17,11 +24,11 @@ class CsvService:
             for row in csv_reader:
                 closed_date = row[closed_date_column_name]
                 if closed_date:
-                    closed_date = datetime.strptime(closed_date, closed_date_format)      
+                    closed_date = closed_date_parser.parse(closed_date)      
 
                 started_date = row[started_date_column_name]
                 if started_date:    
-                    started_date = datetime.strptime(started_date, start_date_format)        
+                    started_date = start_date_parser.parse(started_date)        
 
                 estimation = None
                 if estimation_column_name in row:
@@ -38,38 +45,189 @@ class CsvService:
                 work_items.append(WorkItem(started_date, closed_date, item_title, estimation))
         
         print("Found {0} Items in the CSV".format(len(work_items)))
+        self.print_date_parser_statistics(start_date_parser, closed_date_parser)
 
         return work_items
 
-    def write_example_file(self, file_path, delimiter, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, today = datetime.today()):
-        print("Writing Example File with random values to {0}".format(file_path))
+    def create_date_parsers(self, start_date_format, closed_date_format):
+        # The formats are compiled once, both columns share the parser (and its cache) if they use the same format
+        start_date_parser = DateParser(start_date_format)
+        closed_date_parser = start_date_parser if closed_date_format == start_date_format else DateParser(closed_date_format)
+
+        return (start_date_parser, closed_date_parser)
+
+    def print_date_parser_statistics(self, start_date_parser, closed_date_parser):
+        # The columns are converted in bulk, the statistics are only of interest if values went through the DateParser
+        for date_parser in {start_date_parser, closed_date_parser}:
+            if date_parser.has_parsed_values():
+                print(date_parser.get_statistics())
+
+    def parse_work_item_table(self, file_path, delimiter, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, parsed_data_cache = None, group_column = None):
+        print("Loading Items from CSV File: '{0}'. Started Date Column Name '{1}', Closed Date Column Name '{2}', Start Date Format '{3}', and Closed Date Format '{4}'".format(file_path, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format))
+
+        parse_settings = self.get_parse_settings(delimiter, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, group_column)
+
+        columns = None
+        source = file_path
+
+        if parsed_data_cache:
+            with profiler.stage("load parsed data from cache"):
+                # The file is read once, its fingerprint and on a miss the parsed items come from the same bytes
+                with open(file_path, 'rb') as file:
+                    content = file.read()
+
+                source = io.BytesIO(content)
+                cache_file_path = parsed_data_cache.get_cache_file_path(file_path, parse_settings, content)
+                columns = parsed_data_cache.load(cache_file_path)
+
+        if columns is None:
+            data = self.read_csv_columns(source, delimiter, [started_date_column_name, closed_date_column_name, estimation_column_name, item_title_column, group_column])
+            columns = self.get_work_item_columns(data, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, group_column)
+
+            if parsed_data_cache:
+                with profiler.stage("store parsed data in cache"):
+                    parsed_data_cache.store(cache_file_path, columns)
+
+        with profiler.stage("create work items", items=len(columns[0])):
+            work_items = self.create_work_item_table(columns)
         
-        with open(file_path, 'w', newline='') as file:
-            writer = csv.writer(file, delimiter=delimiter)
-            field = [started_date_column_name, closed_date_column_name, estimation_column_name, item_title_column]
-            
-            # Write Header
-            writer.writerow(field)
-            
-            story_points = [1, 2, 3, 5, 8, 13]
+        print("Found {0} Items in the CSV".format(len(work_items)))
+
+        return work_items
+
+    def parse_work_item_table_in_chunks(self, file_path, delimiter, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, chunk_size, group_column = None):
+        print("Streaming Items from CSV File: '{0}' in Chunks of {1} Items. Started Date Column Name '{2}', Closed Date Column Name '{3}', Start Date Format '{4}', and Closed Date Format '{5}'".format(file_path, chunk_size, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format))
+
+        # The date parsers are shared by all chunks, so a value that was parsed in an earlier chunk comes from their cache
+        date_parsers = self.create_date_parsers(start_date_format, closed_date_format)
+
+        # Only one chunk of the file is in memory at a time
+        with self.read_csv_columns(file_path, delimiter, [started_date_column_name, closed_date_column_name, estimation_column_name, item_title_column, group_column], chunk_size) as chunks:
+            for data in chunks:
+                columns = self.get_work_item_columns(data, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, group_column, date_parsers)
+                yield self.create_work_item_table(columns)
+
+        self.print_date_parser_statistics(*date_parsers)
+
+    def parse_work_item_table_incrementally(self, file_path, delimiter, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, checkpoint_folder, group_column = None):
+        print("Loading Items incrementally from CSV File: '{0}'. Started Date Column Name '{1}', Closed Date Column Name '{2}', Start Date Format '{3}', and Closed Date Format '{4}'".format(file_path, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format))
+
+        column_names = [started_date_column_name, closed_date_column_name, estimation_column_name, item_title_column, group_column]
+        parse_settings = self.get_parse_settings(delimiter, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, group_column)
+        
+        checkpoint = ParseCheckpoint(checkpoint_folder, file_path, parse_settings)
+        columns = checkpoint.load_items()
+
+        if columns is None:
+            data = self.read_csv_columns(io.BytesIO(checkpoint.read_file()), delimiter, column_names)
+            columns = self.get_work_item_columns(data, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, group_column)
             
-            # Generate and write 100 random dates
-            for index in range(100):
-                start_date_delta = random.randint(0, 30)
-                
-                random.seed()
-                
-                end_date_delta = random.randint(0, 30)
-                
-                random_start_date = today - timedelta(days=start_date_delta)
-                random_end_date = today - timedelta(days=end_date_delta)
-                
-                started_date = random_start_date.strftime(start_date_format)
-                end_date = ""
-                
-                if end_date_delta <= start_date_delta:
-                    end_date = random_end_date.strftime(closed_date_format)
-                
-                estimation = random.choice(story_points)
+            checkpoint.store_items(columns)
+        else:
+            appended_lines = checkpoint.read_appended_lines()
+
+            if appended_lines:
+                data = self.read_csv_columns(io.BytesIO(appended_lines), delimiter, column_names)
+                appended_columns = self.get_work_item_columns(data, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, group_column)
                 
-                writer.writerow([started_date, end_date, estimation, index])
\ No newline at end of file
+                print("Parsed {0} appended Items".format(len(data)))
+                columns = tuple(None if merged_column[0] is None else np.concatenate(merged_column) for merged_column in zip(columns, appended_columns))
+
+                checkpoint.store_items(columns)
+
+        work_items = self.create_work_item_table(columns)
+
+        print("Found {0} Items in the CSV".format(len(work_items)))
+
+        return work_items
+
+    def get_parse_settings(self, delimiter, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, group_column):
+        parse_settings = [delimiter, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column]
+
+        # Only added when grouping, so the items that were cached without groups are still found
+        if group_column:
+            parse_settings.append(group_column)
+
+        return parse_settings
+
+    def create_work_item_table(self, columns):
+        (started_dates, closed_dates, estimations, item_titles, groups) = columns
+        return WorkItemTable.from_datetimes(started_dates, closed_dates, estimations, item_titles, groups=groups)
+
+    def read_csv_columns(self, source, delimiter, column_names, chunk_size = None):
+        # pandas is only loaded when a csv file is actually parsed, not when the items come from the cache
+        import pandas as pd
+
+        # Only read the configured columns, all as plain strings like the csv module does.
+        # With a chunk size the rows are only read while iterating over the chunks, outside of this stage.
+        with profiler.stage("read csv", chunk_size=chunk_size):
+            return pd.read_csv(source, sep=delimiter, encoding='utf-8-sig', usecols=lambda column: column in column_names, dtype=str, keep_default_na=False, chunksize=chunk_size)
+
+    def get_work_item_columns(self, data, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, group_column = None, date_parsers = None):
+        data = data.fillna("")
+
+        # Without parsers from the caller the statistics are printed once the dates of this data are parsed
+        print_statistics = date_parsers is None
+        if print_statistics:
+            date_parsers = self.create_date_parsers(start_date_format, closed_date_format)
+
+        (start_date_parser, closed_date_parser) = date_parsers
+
+        with profiler.stage("parse dates", rows=len(data)):
+            started_dates = self.parse_date_column(data[started_date_column_name], start_date_parser)
+            closed_dates = self.parse_date_column(data[closed_date_column_name], closed_date_parser)
+
+        if print_statistics:
+            self.print_date_parser_statistics(start_date_parser, closed_date_parser)
+
+        estimations = np.full(len(data), np.nan)
+        if estimation_column_name in data.columns:
+            # Empty estimations count as 0, the rest is converted with float() like in parse_items
+            raw_estimations = data[estimation_column_name].to_numpy(dtype=object)
+            raw_estimations[raw_estimations == ""] = "0"
+            estimations = raw_estimations.astype(np.float64)
+
+        item_titles = np.full(len(data), "", dtype=object)
+        if item_title_column in data.columns:
+            item_titles = data[item_title_column].to_numpy(dtype=object)
+
+        # The groups are read in the same pass as the other columns, items without a value form a group of their own
+        groups = None
+        if group_column:
+            if group_column not in data.columns:
+                raise ValueError("Group By Column '{0}' is not in the CSV".format(group_column))
+
+            groups = data[group_column].to_numpy(dtype=object)
+
+        return (started_dates, closed_dates, estimations, item_titles, groups)
+
+    def parse_date_column(self, raw_dates, date_parser):
+        import pandas as pd
+
+        dates = np.full(len(raw_dates), np.datetime64("NaT"), dtype='datetime64[us]')
+        
+        has_date = (raw_dates != "").to_numpy()
+        if has_date.any():
+            # Parses all cells at once with the strftime format, repeated values are only parsed once
+            raw_dates = raw_dates[has_date]
+            parsed_dates = pd.to_datetime(raw_dates, format=date_parser.date_format, errors='coerce').to_numpy(dtype='datetime64[us]')
+
+            # Values pandas can't read go through the DateParser like in parse_items, which raises the same errors as strptime
+            is_unparsed = np.isnat(parsed_dates)
+            date_parser.bulk_count += len(parsed_dates) - int(np.count_nonzero(is_unparsed))
+
+            if is_unparsed.any():
+                (value_indexes, distinct_values) = pd.factorize(raw_dates[is_unparsed])
+                # Built with the dtype of the column, dates outside the nanosecond range of pandas like 9999-12-31 stay valid
+                parsed_values = np.array([date_parser.parse(raw_date) for raw_date in distinct_values], dtype='datetime64[us]')
+
+                parsed_dates[is_unparsed] = parsed_values[value_indexes]
+
+            dates[has_date] = parsed_dates
+
+        return dates
+
+    def write_example_file(self, file_path, delimiter, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, today = None):
+        print("Writing Example File with random values to {0}".format(file_path))
+
+        SyntheticDataGenerator().write_csv(file_path, 100, delimiter, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, today)
@@ -0,0 +1,134 @@
+from datetime import datetime
+from functools import lru_cache
+
+import re
+
+class DateParser:
+    # Same expressions as time.strptime uses, so the fast path accepts exactly the values strptime accepts
+    DIRECTIVE_PATTERNS = {
+        'Y': r"(?P<Y>\d\d\d\d)",
+        'y': r"(?P<y>\d\d)",
+        'm': r"(?P<m>1[0-2]|0[1-9]|[1-9])",
+        'b': r"(?P<b>(?i:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec))",
+        'd': r"(?P<d>3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])",
+        'H': r"(?P<H>2[0-3]|[0-1]\d|\d)",
+        'I': r"(?P<I>1[0-2]|0[1-9]|[1-9])",
+        'M': r"(?P<M>[0-5]\d|\d)",
+        'S': r"(?P<S>6[0-1]|[0-5]\d|\d)",
+        'f': r"(?P<f>[0-9]{1,6})",
+        'p': r"(?P<p>(?i:am|pm))",
+    }
+
+    MONTH_ABBREVIATIONS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+
+    def __init__(self, date_format, cache_size = 65536):
+        self.date_format = date_format
+        self.pattern = self.compile(date_format)
+        self.fallback_count = 0
+
+        # Values the column parser converted in bulk without this parser, only the ones it can't read are parsed here
+        self.bulk_count = 0
+
+        # Position of each directive in the groups of a match
+        self.group_indexes = {} if self.pattern is None else {directive: index - 1 for (directive, index) in self.pattern.groupindex.items()}
+
+        # Exports often contain the very same timestamp many times (bulk transitions), so identical strings are only parsed once
+        self.parse = lru_cache(maxsize=cache_size)(self.parse_uncached)
+
+    def compile(self, date_format):
+        # %p and %b depend on the locale, the fast path only knows the english names
+        if datetime(2000, 1, 1, 1).strftime('%p %b').lower() != 'am jan':
+            return None
+
+        pattern = ""
+        used_directives = set()
+        index = 0
+
+        while index < len(date_format):
+            character = date_format[index]
+
+            if character == '%':
+                directive = date_format[index + 1:index + 2]
+                index += 2
+
+                if directive == '%':
+                    pattern += '%'
+                    continue
+
+                # Anything we don't know (or a directive used twice) is left to strptime
+                if directive not in self.DIRECTIVE_PATTERNS or directive in used_directives:
+                    return None
+
+                used_directives.add(directive)
+                pattern += self.DIRECTIVE_PATTERNS[directive]
+            elif character.isspace():
+                # Like strptime, any whitespace in the format matches one or more whitespace characters
+                while index < len(date_format) and date_format[index].isspace():
+                    index += 1
+
+                pattern += r"\s+"
+            else:
+                # Only letters are matched ignoring the case like strptime does, a case-insensitive pattern is much slower
+                pattern += "(?i:{0})".format(re.escape(character)) if character.isalpha() else re.escape(character)
+                index += 1
+
+        return re.compile(pattern)
+
+    def parse_uncached(self, raw_date):
+        if self.pattern is not None:
+            match = self.pattern.fullmatch(raw_date)
+
+            if match is not None:
+                try:
+                    return self.create_date(match.groups())
+                except ValueError:
+                    # Values like the 31st of February, strptime raises the proper error
+                    pass
+
+        self.fallback_count += 1
+        return datetime.strptime(raw_date, self.date_format)
+
+    def create_date(self, groups):
+        # Reads the groups by position, building a dict for every match takes longer than the rest of the parsing
+        indexes = self.group_indexes
+
+        year = 1900
+        if 'Y' in indexes:
+            year = int(groups[indexes['Y']])
+        elif 'y' in indexes:
+            year = int(groups[indexes['y']])
+            year += 1900 if year >= 69 else 2000
+
+        month = 1
+        if 'm' in indexes:
+            month = int(groups[indexes['m']])
+        elif 'b' in indexes:
+            month = self.MONTH_ABBREVIATIONS.index(groups[indexes['b']].lower()) + 1
+
+        hour = 0
+        if 'H' in indexes:
+            hour = int(groups[indexes['H']])
+        elif 'I' in indexes:
+            hour = int(groups[indexes['I']]) % 12
+            if 'p' in indexes and groups[indexes['p']].lower() == 'pm':
+                hour += 12
+
+        day = int(groups[indexes['d']]) if 'd' in indexes else 1
+        minute = int(groups[indexes['M']]) if 'M' in indexes else 0
+        second = int(groups[indexes['S']]) if 'S' in indexes else 0
+        microsecond = int(groups[indexes['f']].ljust(6, '0')) if 'f' in indexes else 0
+
+        return datetime(year, month, day, hour, minute, second, microsecond)
+
+    def has_parsed_values(self):
+        cache_info = self.parse.cache_info()
+        return cache_info.hits + cache_info.misses > 0
+
+    def get_statistics(self):
+        cache_info = self.parse.cache_info()
+        statistics = "Date Format '{0}': ".format(self.date_format)
+
+        if self.bulk_count > 0:
+            statistics += "{0} Values converted in bulk, ".format(self.bulk_count)
+
+        return statistics + "Fast Path {0}, {1} Cache Hits, {2} Cache Misses, {3} strptime Fallbacks".format("enabled" if self.pattern is not None else "disabled", cache_info.hits, cache_info.misses, self.fallback_count)
@@ -0,0 +1,438 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .MonteCarloSimulation import MonteCarloSimulation
+from .RollingPercentile import rolling_percentile
+from .TimeBuckets import TimeBuckets
+from .WorkItemTable import WorkItemTable, get_time_of_day, is_on_or_after, is_on_or_before, ordinals_to_dates, shift_to_day_time
+from .XmRChart import XmRChart, get_average, get_moving_ranges, get_natural_process_limits
+
+class FlowMetricsCalculator:
+    # Calculates the data of the charts without drawing them, so it doesn't need matplotlib.
+    # Each calculate function returns a dict with the series of a chart, or None if there is nothing to show.
+
+    def __init__(self, today = None):
+        self.today = today if today is not None else datetime.today()
+
+    def calculate_cycle_time_scatterplot(self, items, history, percentiles, trend_settings = None):
+        items = self.as_work_item_table(items)
+        closed_items_mask = ~np.isnan(items.cycle_times)
+
+        if not closed_items_mask.any():
+            print("No closed work items for plotting.")
+            return None
+
+        if history is not None:
+            # Filter items based on the history parameter
+            closed_items_mask &= self.get_history_mask(items.closed_dates, items.closed_times, history) & items.has_started_date()
+
+        items = items.select(closed_items_mask)
+
+        if len(items) == 0:
+            print("No closed work items within the specified history for plotting.")
+            return None
+
+        metrics = {
+            "closed_dates": ordinals_to_dates(items.closed_dates),
+            "cycle_times": items.cycle_times,
+            "item_titles": items.item_titles,
+            "percentiles": percentiles,
+            "percentile_values": np.percentile(items.cycle_times, percentiles),
+        }
+
+        if trend_settings:
+            trend_window_size = trend_settings[1]
+            trend_percentile = trend_settings[0]
+
+            # Calculate the rolling percentile for the specified window size
+            if len(items) >= trend_window_size:
+                closed_date_order = np.argsort(items.closed_dates, kind='stable')
+                metrics["trend_dates"] = ordinals_to_dates(items.closed_dates[closed_date_order])
+                metrics["trend_values"] = rolling_percentile(items.cycle_times[closed_date_order], trend_window_size, trend_percentile)
+
+        return metrics
+
+    def calculate_work_item_age_scatterplot(self, items, history):
+        items = self.as_work_item_table(items)
+        filtered_items = items.select(~np.isnan(items.work_item_ages) & self.get_history_mask(items.started_dates, items.started_times, history))
+
+        if len(filtered_items) == 0:
+            print("No work items with age for plotting.")
+            return None
+
+        metrics = {
+            "started_dates": ordinals_to_dates(filtered_items.started_dates),
+            "work_item_ages": filtered_items.work_item_ages,
+            "item_titles": filtered_items.item_titles,
+        }
+
+        if history is not None:
+            # Filter items based on the history parameter for calculating Cycle Time percentiles
+            filtered_items = filtered_items.select(self.get_history_mask(filtered_items.closed_dates, filtered_items.closed_times, history))
+
+        metrics["closed_items_in_history"] = len(filtered_items)
+
+        return metrics
+
+    def calculate_throughput_run_chart(self, items, history, x_axis_unit='days'):
+        if x_axis_unit not in TimeBuckets.UNITS:
+            raise ValueError(f"The 'x_axis_unit' parameter should be one of {TimeBuckets.UNITS}.")
+
+        # Filter items based on the history parameter
+        items = self.as_work_item_table(items)
+        closed_dates = items.closed_dates[self.get_history_mask(items.closed_dates, items.closed_times, history)]
+
+        if len(closed_dates) == 0:
+            print("No closed work items for plotting throughput.")
+            return None
+
+        # Every period of the history is shown, also the ones without closed items
+        time_buckets = TimeBuckets(x_axis_unit)
+        today = self.today.toordinal()
+        (periods, throughput) = time_buckets.count(closed_dates, today - history, today)
+
+        return {
+            "periods": time_buckets.get_labels(periods),
+            "throughput": throughput,
+        }
+
+    def calculate_work_in_process_run_chart(self, items, history):
+        items = self.as_work_item_table(items)
+
+        if len(items) == 0:
+            print("No work items for plotting work in process.")
+            return None
+
+        if history is not None:
+            # Filter items based on the history parameter
+            chart_end_date = self.today.toordinal()
+            chart_start = self.today - timedelta(days=history)
+
+            # Compare including the time of day, an item started later on today's date is not in process yet
+            is_started = is_on_or_before(items.started_dates, items.started_times, self.today)
+            is_closed_before_start = is_on_or_before(items.closed_dates, items.closed_times, chart_start)
+            relevant_items = items.select(is_started & ~is_closed_before_start)
+
+        # Create a range of days representing the specified history
+        history_days = np.arange(chart_end_date - history + 1, chart_end_date + 1)
+
+        # Sort the start and close events once, the number of items in process on a day is
+        # the number of items started within the history up to that day minus the ones closed
+        started_days = np.sort(relevant_items.started_dates)
+        closed_days = np.sort(relevant_items.closed_dates)
+
+        started_count = np.searchsorted(started_days, history_days, side='right') - np.searchsorted(started_days, history_days[0], side='left')
+        closed_count = np.searchsorted(closed_days, history_days, side='right') - np.searchsorted(closed_days, history_days[0], side='left')
+
+        return {
+            "dates": ordinals_to_dates(history_days),
+            "work_in_process": started_count - closed_count,
+        }
+
+    def calculate_work_started_vs_finished_chart(self, work_items, history):
+        # Calculate counts based on ISO weeks
+        work_items = self.as_work_item_table(work_items)
+
+        time_buckets = TimeBuckets('weeks')
+        today = self.today.toordinal()
+
+        started_dates = work_items.started_dates[self.get_history_mask(work_items.started_dates, work_items.started_times, history)]
+        closed_dates = work_items.closed_dates[self.get_history_mask(work_items.closed_dates, work_items.closed_times, history)]
+
+        (weeks, started_counts) = time_buckets.count(started_dates, today - history, today)
+        (weeks, closed_counts) = time_buckets.count(closed_dates, today - history, today)
+
+        return {
+            "weeks": time_buckets.get_labels(weeks),
+            "started": started_counts,
+            "closed": closed_counts,
+        }
+
+    def calculate_estimation_vs_cycle_time_scatterplot(self, items, history):
+        # Ignore items without cycle time and without estimation
+        items = self.as_work_item_table(items)
+        filtered_items_mask = (items.cycle_times != 0) & ~np.isnan(items.cycle_times) & (items.estimations > 0)
+
+        if not filtered_items_mask.any():
+            print("No closed work items for plotting.")
+            return None
+
+        if history is not None:
+            # Filter items based on the history parameter
+            filtered_items_mask &= self.get_history_mask(items.closed_dates, items.closed_times, history) & items.has_started_date()
+
+        items = items.select(filtered_items_mask)
+
+        if len(items) == 0:
+            print("No closed work items within the specified history for plotting.")
+            return None
+
+        return {
+            "estimations": items.estimations,
+            "cycle_times": items.cycle_times,
+            "item_titles": items.item_titles,
+        }
+
+    def calculate_total_age_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, rolling_baseline = None):
+        return self.get_daily_process_behaviour_metrics(self.get_total_age_history_for_date_range, work_items, baseline_start_date, baseline_end_date, history, rolling_baseline)
+
+    def calculate_cycle_time_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, rolling_baseline = None):
+        start_date = self.today - timedelta(days=history)
+
+        if rolling_baseline:
+            # Each item gets the limits of the items closed within the rolling baseline days before it
+            cycle_time_data = self.get_cycle_time_history_for_date_range(start_date - timedelta(days=rolling_baseline), self.today, work_items)
+            closed_dates = cycle_time_data.closed_dates
+            first_item = np.count_nonzero(~is_on_or_after(closed_dates, cycle_time_data.closed_times, start_date))
+
+            window_starts = np.searchsorted(closed_dates, closed_dates[first_item:] - rolling_baseline)
+            window_ends = np.searchsorted(closed_dates, closed_dates[first_item:])
+
+            xmr_chart = XmRChart.from_rolling_baseline(cycle_time_data.cycle_times, window_starts, window_ends)
+            cycle_time_data = cycle_time_data.select(slice(first_item, None))
+        else:
+            baseline_cycle_time = self.get_cycle_time_history_for_date_range(baseline_start_date, baseline_end_date, work_items)
+            xmr_chart = self.get_baseline_xmr_chart(baseline_cycle_time.cycle_times, baseline_start_date, baseline_end_date)
+            cycle_time_data = self.get_cycle_time_history_for_date_range(start_date, self.today, work_items)
+
+        return self.get_process_behaviour_metrics(xmr_chart, cycle_time_data.cycle_times.tolist(), {
+            "closed_dates": ordinals_to_dates(cycle_time_data.closed_dates),
+            "item_titles": cycle_time_data.item_titles.tolist(),
+        })
+
+    def calculate_wip_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, rolling_baseline = None):
+        return self.get_daily_process_behaviour_metrics(self.get_wip_history_for_date_range, work_items, baseline_start_date, baseline_end_date, history, rolling_baseline)
+
+    def calculate_throughput_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, rolling_baseline = None):
+        return self.get_daily_process_behaviour_metrics(self.get_throughput_history_for_date_range, work_items, baseline_start_date, baseline_end_date, history, rolling_baseline)
+
+    def calculate_how_many_forecast(self, items, history, target_date, percentiles, trials = 1000000, workers = 1, seed = None):
+        # The target date is either a number of days from today or a fixed date, which counts whole days whatever the time of today
+        forecast_days = target_date if isinstance(target_date, int) else (target_date.date() - self.today.date()).days
+
+        if forecast_days < 1:
+            print("Target date {0} is not after today, nothing to forecast.".format(target_date))
+            return None
+
+        daily_throughput = self.get_daily_throughput_for_forecast(items, history)
+
+        if daily_throughput is None:
+            return None
+
+        items_done = MonteCarloSimulation(trials, workers, seed).simulate_how_many(daily_throughput, forecast_days)
+        (outcomes, frequencies) = np.unique(items_done, return_counts=True)
+
+        return {
+            "target_date": self.today.date() + timedelta(days=forecast_days),
+            "forecast_days": forecast_days,
+            "trials": trials,
+            "outcomes": outcomes,
+            "frequencies": frequencies,
+            "percentiles": percentiles,
+            # With 85% certainty at least the number of items are done that 85% of the trials reached
+            "percentile_values": np.floor(np.percentile(items_done, [100 - percentile for percentile in percentiles])),
+        }
+
+    def calculate_when_forecast(self, items, history, remaining_items, percentiles, trials = 1000000, workers = 1, seed = None, max_days = 3650):
+        daily_throughput = self.get_daily_throughput_for_forecast(items, history)
+
+        if daily_throughput is None:
+            return None
+
+        completion_days = MonteCarloSimulation(trials, workers, seed).simulate_when(daily_throughput, remaining_items, max_days)
+
+        # Trials that are not done within max_days are counted, but not shown
+        finished_trials = np.isfinite(completion_days)
+        (outcomes, frequencies) = np.unique(completion_days[finished_trials].astype(np.int64), return_counts=True)
+
+        # With 85% certainty the items are done within the days that 85% of the trials needed
+        percentile_days = np.ceil(np.percentile(completion_days, percentiles, method='higher'))
+
+        return {
+            "remaining_items": remaining_items,
+            "trials": trials,
+            "unfinished_trials": int(np.count_nonzero(~finished_trials)),
+            "outcomes": outcomes,
+            "dates": [self.today.date() + timedelta(days=int(days)) for days in outcomes],
+            "frequencies": frequencies,
+            "percentiles": percentiles,
+            "percentile_days": percentile_days,
+            "percentile_dates": [self.today.date() + timedelta(days=int(days)) if np.isfinite(days) else None for days in percentile_days],
+        }
+
+    def get_daily_throughput_for_forecast(self, items, history):
+        start_date = self.today - timedelta(days=history)
+        daily_throughput = list(self.get_throughput_history_for_date_range(start_date, self.today, items).values())
+
+        if sum(daily_throughput) == 0:
+            print("No closed work items in the history for forecasting.")
+            return None
+
+        return daily_throughput
+
+    def get_daily_process_behaviour_metrics(self, get_history_for_date_range, work_items, baseline_start_date, baseline_end_date, history, rolling_baseline):
+        start_date = self.today - timedelta(days=history)
+
+        if rolling_baseline:
+            # Each day gets the limits of the rolling baseline days before it, so the days before the history are needed as well
+            values = list(get_history_for_date_range(start_date - timedelta(days=rolling_baseline), self.today, work_items).values())
+            days = np.arange(rolling_baseline, len(values))
+
+            xmr_chart = XmRChart.from_rolling_baseline(values, days - rolling_baseline, days)
+            values = values[rolling_baseline:]
+        else:
+            baseline_values = []
+
+            # Before the first item was started or closed every day is 0, those days are no data of the process
+            work_items = self.as_work_item_table(work_items)
+            if self.has_items_until(work_items, baseline_end_date):
+                baseline_values = list(get_history_for_date_range(baseline_start_date, baseline_end_date, work_items).values())
+
+            xmr_chart = self.get_baseline_xmr_chart(baseline_values, baseline_start_date, baseline_end_date)
+            values = list(get_history_for_date_range(start_date, self.today, work_items).values())
+
+        return self.get_process_behaviour_metrics(xmr_chart, values, {
+            "dates": [start_date + timedelta(days=day) for day in range(len(values))],
+        })
+
+    def get_baseline_xmr_chart(self, baseline_values, baseline_start_date, baseline_end_date):
+        if len(baseline_values) < 2:
+            print("The baseline from {0} to {1} has less than 2 values, the chart has no limits and signals.".format(baseline_start_date.date(), baseline_end_date.date()))
+
+        return XmRChart.from_baseline(baseline_values)
+
+    def has_items_until(self, work_items, end_date):
+        is_started = is_on_or_before(work_items.started_dates, work_items.started_times, end_date)
+        is_closed = is_on_or_before(work_items.closed_dates, work_items.closed_times, end_date)
+
+        return bool(np.any(is_started | is_closed))
+
+    def get_process_behaviour_metrics(self, xmr_chart, values, metrics):
+        metrics.update({
+            "values": values,
+            "average": xmr_chart.average,
+            "unpl": xmr_chart.unpl,
+            "lnpl": xmr_chart.lnpl,
+            # For each run rule, whether a value is part of a signal
+            "signals": xmr_chart.get_signals(values),
+        })
+
+        return metrics
+
+    def collect_work_items_in_history(self, work_item_chunks, start_date):
+        relevant_chunks = []
+        item_count = 0
+
+        for chunk in work_item_chunks:
+            item_count += len(chunk)
+            relevant_chunks.append(chunk.select(self.get_items_in_history_mask(chunk, start_date)))
+
+        work_items = WorkItemTable.concatenate(relevant_chunks)
+        print("Kept {0} of {1} Items that are within the history starting at {2}".format(len(work_items), item_count, start_date.date()))
+
+        return work_items
+
+    def get_items_in_history_mask(self, items, start_date):
+        # Items closed within the history, or started until today and not closed before the history.
+        # This covers throughput, cycle times and all items that are in process at some day of the history.
+        start_day = start_date.toordinal()
+        today = self.today.toordinal()
+
+        return (items.closed_dates >= start_day) & ((items.closed_dates <= today) | (items.started_dates <= today))
+
+    def get_history_mask(self, ordinals, times, history):
+        # The history starts at the time of day of today. Missing dates are bigger than any real date and hence never part of it.
+        return is_on_or_after(ordinals, times, self.today - timedelta(days=history)) & is_on_or_before(ordinals, times, self.today)
+
+    def as_work_item_table(self, items):
+        if isinstance(items, WorkItemTable):
+            return items
+
+        return WorkItemTable.from_work_items(items)
+
+    def get_cycle_time_history_for_date_range(self, start_date, end_date, work_items):
+        work_items = self.as_work_item_table(work_items)
+
+        is_in_range = is_on_or_after(work_items.closed_dates, work_items.closed_times, start_date) & is_on_or_before(work_items.closed_dates, work_items.closed_times, end_date)
+        filtered_items = work_items.select((work_items.cycle_times != 0) & ~np.isnan(work_items.cycle_times) & is_in_range)
+
+        # Sort the filtered items by closed_date, items closed at the same time keep their order
+        return filtered_items.select(np.lexsort((filtered_items.closed_times, filtered_items.closed_dates)))
+
+    def get_total_age_history_for_date_range(self, start_date, end_date, work_items):
+        work_items = self.as_work_item_table(work_items)
+        days = self.get_days_of_range(start_date, end_date)
+        (started_days, closed_days) = self.get_started_and_closed_days(work_items, start_date)
+
+        # Sort the start and close events once and keep the prefix sums of the start days of the items
+        (started_count, started_day_sum) = self.get_event_counts_and_start_day_sums(started_days, started_days, days)
+        (closed_count, closed_day_sum) = self.get_event_counts_and_start_day_sums(closed_days, started_days, days)
+
+        # Total age is the sum of (day - start day) over all items in process, which are all started items that are not closed yet
+        total_age = (started_count - closed_count) * days - (started_day_sum - closed_day_sum)
+
+        return dict(enumerate(total_age.tolist()))
+
+    def get_wip_history_for_date_range(self, start_date, end_date, work_items):
+        work_items = self.as_work_item_table(work_items)
+        days = self.get_days_of_range(start_date, end_date)
+        (started_days, closed_days) = self.get_started_and_closed_days(work_items, start_date)
+
+        # Items that are in process are all started items that are not closed yet
+        wip = np.searchsorted(np.sort(started_days), days, side='right') - np.searchsorted(np.sort(closed_days), days, side='right')
+
+        return dict(enumerate(wip.tolist()))
+
+    def get_days_of_range(self, start_date, end_date):
+        # Day ordinals of start_date and every full day after it until end_date
+        return np.arange((end_date - start_date).days + 1) + start_date.toordinal()
+
+    def get_started_and_closed_days(self, work_items, start_date):
+        # Every day of the range has the time of day of start_date. Items started or closed at a later time of day
+        # count from the next day, like comparing the dates including their time would.
+        day_time = get_time_of_day(start_date)
+        started_items = work_items.select(work_items.has_started_date())
+
+        # An item closed before it was started is never in process
+        (closed_dates, closed_times) = started_items.get_effective_closed_dates()
+
+        return (shift_to_day_time(started_items.started_dates, started_items.started_times, day_time), shift_to_day_time(closed_dates, closed_times, day_time))
+
+    def get_event_counts_and_start_day_sums(self, event_days, start_days, days):
+        order = np.argsort(event_days, kind='stable')
+        start_day_sums = np.concatenate(([0], np.cumsum(start_days[order])))
+
+        event_counts = np.searchsorted(event_days[order], days, side='right')
+
+        return (event_counts, start_day_sums[event_counts])
+
+    def get_throughput_history_for_date_range(self, start_date, end_date, work_items):
+        work_items = self.as_work_item_table(work_items)
+        start_day = start_date.toordinal()
+        end_day = start_day + (end_date - start_date).days
+
+        # Each day of the range starts at the time of day of start_date, items closed at an earlier time belong to the day before
+        closed_items = work_items.select(is_on_or_before(work_items.closed_dates, work_items.closed_times, end_date))
+        closed_days = np.where(closed_items.closed_times < get_time_of_day(start_date), closed_items.closed_dates - 1, closed_items.closed_dates)
+
+        (days, closed_items_count) = TimeBuckets('days').count(closed_days, start_day, end_day)
+
+        return dict(enumerate(closed_items_count.tolist()))
+
+    def caclulate_average_and_limits(self, baseline_values):
+        # Calculated step by step like before the XmRChart, so an empty baseline still has an average and limits of 0
+        baseline_values = np.asarray(baseline_values, dtype=np.float64)
+        average = get_average(baseline_values)
+
+        return (average, *get_natural_process_limits(average, get_average(get_moving_ranges(baseline_values))))
+
+    # The single steps of the limits, as they were before the XmRChart
+    def calculate_mean(self, values):
+        return get_average(np.asarray(values))
+
+    def calculate_moving_ranges(self, values):
+        return get_moving_ranges(np.asarray(values)).tolist()
+
+    def calculate_natural_process_limits(self, baseline_average, baseline_moving_range_average):
+        return get_natural_process_limits(baseline_average, baseline_moving_range_average)
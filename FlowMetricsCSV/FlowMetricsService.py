@@ -1,613 +1,486 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from matplotlib.dates import DateFormatter
-import matplotlib.pyplot as plt
 from matplotlib.ticker import MaxNLocator
-import matplotlib.image as mpimg
-from matplotlib.offsetbox import OffsetImage, AnnotationBbox
 
-import adjustText as adjustText
+import os
 
 import numpy as np
-import pandas as pd
 
-from collections import Counter
+from .ChartCanvas import ChartCanvas
+from .FlowMetricsCalculator import FlowMetricsCalculator
+from .LabelPlacement import LabelPlacement
+from .LineDownsampling import LineDownsampling
+from .Profiler import profiler
+from .ScatterDensity import ScatterDensity
 
-import os
+# Run rules of the process behaviour charts with the color, size and legend label of their rings
+PBC_SIGNAL_STYLES = [
+    ("outside_limits", "red", 120, "Signal: Outside the Limits"),
+    ("run_of_eight", "orange", 220, "Signal: 8 in a Row on one Side of the Average"),
+    ("three_of_four", "purple", 320, "Signal: 3 of 4 closer to a Limit than to the Average"),
+]
 
-class FlowMetricsService:    
+class FlowMetricsService(FlowMetricsCalculator):
+    # Each plot function calculates the data of the chart with the FlowMetricsCalculator and renders it
+
+    def __init__(self, show_plots, charts_folder, today = None):
+        super().__init__(today)
 
-    def __init__(self, show_plots, charts_folder, today = datetime.today()):
         self.show_plots = show_plots
         self.charts_folder = charts_folder
-        self.today = today
 
         self.current_date = datetime.now().strftime('%d.%m.%Y')
 
         if not os.path.exists(charts_folder):
             os.makedirs(charts_folder)
-        
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        logo_path = os.path.join(script_dir, "logo.png")
-        self.logo = mpimg.imread(logo_path)
 
-       
-    def plot_cycle_time_scatterplot(self, items, history, percentiles, percentile_colors, chart_name, trend_settings = None):        
-        print("Creating Cycle Time Scatterplot with following config: History: {0}, Chart Name: {1}, Percentiles: {2}, Percentile Colors: {3}, Trend Settings: {4}".format(history, chart_name, percentiles, percentile_colors, trend_settings))
+        self.chart_canvas = ChartCanvas(show_plots, self.current_date)
 
-        cycle_times = [item.cycle_time for item in items if item.cycle_time is not None]
 
-        if not cycle_times:
-            print("No closed work items for plotting.")
-            return
+    def plot_cycle_time_scatterplot(self, items, history, percentiles, percentile_colors, chart_name, trend_settings = None, label_placement = None, scatter_density = None):
+        print("Creating Cycle Time Scatterplot with following config: History: {0}, Chart Name: {1}, Percentiles: {2}, Percentile Colors: {3}, Trend Settings: {4}".format(history, chart_name, percentiles, percentile_colors, trend_settings))
 
-        if history is not None:
-            # Filter items based on the history parameter
-            end_date = self.today
-            start_date = end_date - timedelta(days=history)
-            items = [item for item in items if item.closed_date and item.started_date and start_date <= item.closed_date <= end_date]
-            cycle_times = [item.cycle_time for item in items if item.cycle_time is not None]
-            dates = [item.closed_date.date() for item in items]
+        with profiler.stage("calculate"):
+            metrics = self.calculate_cycle_time_scatterplot(items, history, percentiles, trend_settings)
 
-        if not cycle_times:
-            print("No closed work items within the specified history for plotting.")
-            return
+        if metrics is not None:
+            with profiler.stage("render"):
+                self.render_cycle_time_scatterplot(metrics, percentile_colors, chart_name, trend_settings, label_placement, scatter_density)
 
-        plt.figure(figsize=(15, 9))
-        plt.scatter(dates, cycle_times)
+    def render_cycle_time_scatterplot(self, metrics, percentile_colors, chart_name, trend_settings = None, label_placement = None, scatter_density = None):
+        dates = metrics["closed_dates"]
+        cycle_times = metrics["cycle_times"]
 
-        texts = []
-        for item in items:
-            text = plt.text(item.closed_date.date(), item.cycle_time, item.item_title, ha='center')
-            texts.append(text)
+        axes = self.chart_canvas.create_chart()
+        is_density = self.get_scatter_density(scatter_density).add_points(axes, dates, cycle_times)
 
-        # Adjust text to avoid overlap
-        adjustText.adjust_text(texts, arrowprops=dict(arrowstyle="-", color='k', lw=0.5))
+        self.add_item_labels(axes, label_placement, is_density, dates, cycle_times, metrics["item_titles"])
 
-        plt.title("Cycle Time Scatterplot")
-        plt.xlabel("Work Item Closed Date")
-        plt.ylabel("Cycle Time (days)")
-        plt.xticks(rotation=45, ha='right')  # Rotate x-axis labels for better readability
-        plt.gca().yaxis.set_major_locator(MaxNLocator(integer=True))
-        plt.gca().set_ylim(bottom=0)  
+        axes.set_title("Cycle Time Scatterplot")
+        axes.set_xlabel("Work Item Closed Date")
+        axes.set_ylabel("Cycle Time (days)")
+        self.rotate_x_tick_labels(axes, rotation=45, ha='right')  # Rotate x-axis labels for better readability
+        axes.yaxis.set_major_locator(MaxNLocator(integer=True))
+        axes.set_ylim(bottom=0)
 
-        self.add_timestamp(plt)
-
-        # Calculate percentiles
-        percentile_values = np.percentile(cycle_times, percentiles)
+        self.add_timestamp(axes)
 
         # Plot percentile lines
-        for value, label, color in zip(percentile_values, percentiles, percentile_colors):
-            plt.axhline(y=value, color=color, linestyle='--', label=f'{label}th Percentile ({int(value)} Days)')
+        for value, label, color in zip(metrics["percentile_values"], metrics["percentiles"], percentile_colors):
+            axes.axhline(y=value, color=color, linestyle='--', label=f'{label}th Percentile ({int(value)} Days)')
 
-        # Calculate the rolling percentile for the specified window size        
-        
-        if trend_settings:
+        if "trend_values" in metrics:
             trend_window_size = trend_settings[1]
             trend_percentile = trend_settings[0]
             trend_color = trend_settings[2]
-        
-            if len(dates) >= trend_window_size:
-                df = pd.DataFrame({'date': dates, 'cycle_time': cycle_times})
-                df.sort_values('date', inplace=True)
-                rolling_percentile_values = df['cycle_time'].rolling(window=trend_window_size).apply(lambda x: np.percentile(x, trend_percentile), raw=True)
-                plt.plot(df['date'], rolling_percentile_values, label=f'{trend_window_size}-day Trend ({trend_percentile}th Percentile)', color=trend_color, linestyle='dotted')
 
-        plt.legend()
+            axes.plot(metrics["trend_dates"], metrics["trend_values"], label=f'{trend_window_size}-day Trend ({trend_percentile}th Percentile)', color=trend_color, linestyle='dotted')
 
-        self.add_logo(plt)
+        axes.legend()
 
-        chart_file_path = os.path.join(self.charts_folder, chart_name)
-        print("Storing file at {0}".format(chart_file_path))
-        plt.savefig(chart_file_path)
+        self.add_logo(axes)
 
-        if self.show_plots:
-            plt.show()
+        chart_file_path = os.path.join(self.charts_folder, chart_name)
+        self.chart_canvas.save_chart(chart_file_path)
 
-    def plot_work_item_age_scatterplot(self, items, history, x_axis_lines, x_axis_line_colors, chart_name):
+    def plot_work_item_age_scatterplot(self, items, history, x_axis_lines, x_axis_line_colors, chart_name, label_placement = None, scatter_density = None):
         print("Creating Work Item Scatterplot with following config: History: {0}, Chart Name: {1}, X-Axis Lines: {2}, X-Axis Line Colors: {3}".format(history, chart_name, x_axis_lines, x_axis_line_colors))
-        filtered_items = [item for item in items if item.work_item_age is not None and self.is_date_between_today_and_history(item.started_date, history)]
-        
-        work_item_ages = [item.work_item_age for item in filtered_items]
-        if not work_item_ages:
-            print("No work items with age for plotting.")
-            return
 
-        # Set default size to be wider (10 inches width and 6 inches height in this example)
-        plt.figure(figsize=(15, 9))
+        with profiler.stage("calculate"):
+            metrics = self.calculate_work_item_age_scatterplot(items, history)
+
+        if metrics is not None:
+            with profiler.stage("render"):
+                self.render_work_item_age_scatterplot(metrics, x_axis_lines, x_axis_line_colors, chart_name, label_placement, scatter_density)
 
-        dates = [item.started_date.date() for item in filtered_items]
+    def render_work_item_age_scatterplot(self, metrics, x_axis_lines, x_axis_line_colors, chart_name, label_placement = None, scatter_density = None):
+        dates = metrics["started_dates"]
+        work_item_ages = metrics["work_item_ages"]
+
+        # Set default size to be wider (10 inches width and 6 inches height in this example)
+        axes = self.chart_canvas.create_chart()
 
         # Plot Work Item Age as triangles
-        plt.scatter(dates, work_item_ages, label='Work Item Age (days)', alpha=0.7)
-        
-        texts = []
-        for item in filtered_items:
-            work_item_age = item.work_item_age
-            
-            if work_item_age:
-                text = plt.text(item.started_date.date(), work_item_age, item.item_title, ha='center')
-                texts.append(text)
-
-        # Adjust text to avoid overlap
-        adjustText.adjust_text(texts, arrowprops=dict(arrowstyle="-", color='k', lw=0.5))
-
-        plt.title("Work Item Age Scatterplot with Cycle Time Percentiles")
-        plt.xlabel("Work Item Started Date")
-        plt.ylabel("Time (days)")
-        plt.xticks(rotation=45, ha='right')  # Rotate x-axis labels for better readability
-        plt.gca().set_ylim(bottom=0)  
-
-        self.add_timestamp(plt)
-
-        if history is not None:
-            # Filter items based on the history parameter for calculating Cycle Time percentiles
-            end_date = self.today
-            start_date = end_date - timedelta(days=history)
-            filtered_items = [item for item in filtered_items if item.closed_date and start_date <= item.closed_date <= end_date]
-
-        if len(filtered_items) > 0:            
+        is_density = self.get_scatter_density(scatter_density).add_points(axes, dates, work_item_ages, label='Work Item Age (days)', alpha=0.7)
+
+        # Items that were only started today are not labeled
+        labeled_items_mask = work_item_ages != 0
+        label_dates = [date for (date, is_labeled) in zip(dates, labeled_items_mask) if is_labeled]
+        self.add_item_labels(axes, label_placement, is_density, label_dates, work_item_ages[labeled_items_mask], metrics["item_titles"][labeled_items_mask])
+
+        axes.set_title("Work Item Age Scatterplot with Cycle Time Percentiles")
+        axes.set_xlabel("Work Item Started Date")
+        axes.set_ylabel("Time (days)")
+        self.rotate_x_tick_labels(axes, rotation=45, ha='right')  # Rotate x-axis labels for better readability
+        axes.set_ylim(bottom=0)
+
+        self.add_timestamp(axes)
+
+        if metrics["closed_items_in_history"] > 0:
             for value, color in zip(x_axis_lines, x_axis_line_colors):
-                plt.axhline(y=value, color=color, linestyle='--', label=f'{value} Days')
+                axes.axhline(y=value, color=color, linestyle='--', label=f'{value} Days')
         else:
             print("No closed items, skipping cycle time percentiles in WIA Scatterplot")
 
-        plt.legend()
-        self.add_logo(plt)
-        
+        axes.legend()
+        self.add_logo(axes)
+
         # Invert x-axis
-        plt.gca().invert_xaxis()
+        axes.invert_xaxis()
 
         chart_file_path = os.path.join(self.charts_folder, chart_name)
-        print("Storing file at {0}".format(chart_file_path))
-        plt.savefig(chart_file_path)
-
-        
-        if self.show_plots:
-            plt.show()
+        self.chart_canvas.save_chart(chart_file_path)
 
     def plot_throughput_run_chart(self, items, history, chart_name, x_axis_unit='days'):
         print("Creating Throughput Run Chart with following config: History: {0}, Chart Name: {1}, Unit: {2}".format(history, chart_name, x_axis_unit))
-        
-        valid_units = ['days', 'weeks', 'months']
-        if x_axis_unit not in valid_units:
-            raise ValueError(f"The 'x_axis_unit' parameter should be one of {valid_units}.")
-        
-        # Filter items based on the history parameter
-        closed_dates = [item.closed_date.date() for item in items if self.is_date_between_today_and_history(item.closed_date, history)]
-
-        if not closed_dates:
-            print("No closed work items for plotting throughput.")
-            return
-
-        # Set default size to be wider (10 inches width and 6 inches height in this example)
-        plt.figure(figsize=(15, 9))
 
-        throughput_counts = Counter()
+        with profiler.stage("calculate"):
+            metrics = self.calculate_throughput_run_chart(items, history, x_axis_unit)
 
-        for item in closed_dates:
-            if x_axis_unit == 'days':
-                key = item
-            elif x_axis_unit == 'weeks':
-                key = item.isocalendar()[1]
-            elif x_axis_unit == 'months':
-                key = item.month
+        if metrics is not None:
+            with profiler.stage("render"):
+                self.render_throughput_run_chart(metrics, chart_name, x_axis_unit)
 
-            throughput_counts[key] += 1
+    def render_throughput_run_chart(self, metrics, chart_name, x_axis_unit='days'):
+        # Set default size to be wider (10 inches width and 6 inches height in this example)
+        axes = self.chart_canvas.create_chart()
 
         # Plot throughput as a bar chart
-        if x_axis_unit == 'days':
-            x_values = sorted(set(closed_dates))
-        elif x_axis_unit == 'weeks':
-            x_values = sorted(set(date.isocalendar()[1] for date in closed_dates))
-        elif x_axis_unit == 'months':
-            x_values = sorted(set(date.month for date in closed_dates))
-
-        plt.bar(x_values, [throughput_counts[key] for key in x_values], color='blue', alpha=0.7, label='Throughput')
-
-        plt.title("Throughput Run Chart")
-        plt.xlabel(f"Work Item Closed Date ({x_axis_unit.capitalize()})")
-        plt.ylabel("Number of Items Completed")
-        plt.xticks(rotation=45, ha='right')  # Rotate x-axis labels for better readability
-        plt.gca().yaxis.set_major_locator(MaxNLocator(integer=True))
-        plt.gca().set_ylim(bottom=0)  
-        plt.legend(loc='upper left')
-
-        self.add_timestamp(plt)
-        self.add_logo(plt)
+        axes.bar(metrics["periods"], metrics["throughput"], color='blue', alpha=0.7, label='Throughput')
+
+        axes.set_title("Throughput Run Chart")
+        axes.set_xlabel(f"Work Item Closed Date ({x_axis_unit.capitalize()})")
+        axes.set_ylabel("Number of Items Completed")
+        self.rotate_x_tick_labels(axes, rotation=45, ha='right')  # Rotate x-axis labels for better readability
+        axes.yaxis.set_major_locator(MaxNLocator(integer=True))
+        axes.set_ylim(bottom=0)
+        axes.legend(loc='upper left')
+
+        self.add_timestamp(axes)
+        self.add_logo(axes)
 
         chart_file_path = os.path.join(self.charts_folder, chart_name)
-        print("Storing file at {0}".format(chart_file_path))
-        plt.savefig(chart_file_path)
+        self.chart_canvas.save_chart(chart_file_path)
 
-        if self.show_plots:
-            plt.show()
-            
-    def plot_work_in_process_run_chart(self, items, history, chart_name):
+    def plot_work_in_process_run_chart(self, items, history, chart_name, line_downsampling = None):
         print("Creating Work In Process Run Chart with following config: History: {0}, Chart Name: {1}".format(history, chart_name))
 
-        if not items:
-            print("No work items for plotting work in process.")
-            return
+        with profiler.stage("calculate"):
+            metrics = self.calculate_work_in_process_run_chart(items, history)
 
-        if history is not None:
-            # Filter items based on the history parameter
-            chart_end_date = self.today
-            chart_start_date = chart_end_date - timedelta(days=history)
-            
-            relevant_items = []
-            for item in items:
-                if item.closed_date is not None and item.closed_date <= chart_start_date:
-                    continue
-                
-                if item.started_date is not None and item.started_date <= chart_end_date:
-                    relevant_items.append(item)
+        if metrics is not None:
+            with profiler.stage("render"):
+                self.render_work_in_process_run_chart(metrics, chart_name, line_downsampling)
 
-        # Set default size to be wider (10 inches width and 6 inches height in this example)
-        plt.figure(figsize=(15, 9))
+    def render_work_in_process_run_chart(self, metrics, chart_name, line_downsampling = None):
+        dates = metrics["dates"]
+        work_in_process = metrics["work_in_process"]
 
-        # Create a range of dates representing the specified history
-        history_dates = pd.date_range(chart_end_date - timedelta(days=history-1), chart_end_date)
+        # Set default size to be wider (10 inches width and 6 inches height in this example)
+        axes = self.chart_canvas.create_chart()
 
-        # Count the number of items in process for each day
-        wip_counts = Counter()
+        kept_points = self.get_line_downsampling(line_downsampling).get_kept_points(axes, work_in_process)
+        if kept_points is not None:
+            dates = [dates[index] for index in kept_points]
+            work_in_process = np.asarray(work_in_process)[kept_points]
 
-        for item in relevant_items:
-            wip_counts[item.started_date.date()] += 1
-            if item.closed_date:
-                wip_counts[item.closed_date.date()] -= 1
+        # Plot work in process as a step chart
+        axes.step(dates, work_in_process, where='post', color='orange', alpha=0.7, label='Work In Process')
 
-        # Calculate cumulative counts
-        cumulative_wip = np.cumsum([wip_counts[date] for date in history_dates.date])
+        axes.set_title("Work In Process Run Chart")
+        axes.set_xlabel("Date")
+        axes.set_ylabel("Number of Items In Process")
+        self.rotate_x_tick_labels(axes, rotation=45, ha='right')  # Rotate x-axis labels for better readability
+        axes.yaxis.set_major_locator(MaxNLocator(integer=True))
+        axes.set_ylim(bottom=0)
 
-        # Plot work in process as a step chart
-        plt.step(history_dates.date, cumulative_wip, where='post', color='orange', alpha=0.7, label='Work In Process')
-
-        plt.title("Work In Process Run Chart")
-        plt.xlabel("Date")
-        plt.ylabel("Number of Items In Process")
-        plt.xticks(rotation=45, ha='right')  # Rotate x-axis labels for better readability
-        plt.gca().yaxis.set_major_locator(MaxNLocator(integer=True))
-        plt.gca().set_ylim(bottom=0)  
-        
         date_format = DateFormatter("%Y-%m-%d")
-        plt.gca().xaxis.set_major_formatter(date_format)
-        
-        plt.legend(loc='upper left')
-        self.add_timestamp(plt)
-        self.add_logo(plt)
+        axes.xaxis.set_major_formatter(date_format)
+
+        axes.legend(loc='upper left')
+        self.add_timestamp(axes)
+        self.add_logo(axes)
 
         chart_file_path = os.path.join(self.charts_folder, chart_name)
-        print("Storing file at {0}".format(chart_file_path))
-        plt.savefig(chart_file_path)
+        self.chart_canvas.save_chart(chart_file_path)
 
-        if self.show_plots:
-            plt.show()
+    def plot_work_started_vs_finished_chart(self, work_items, history, started_color, closed_color, chart_name):
+        print("Creating Work Started vs. finished chart with following config: History: {0}, Chart Name: {1}, Started Color: {2}, Closed Color: {3}".format(history, chart_name, started_color, closed_color))
 
-    def is_date_between_today_and_history(self, date, history):
-        if date is None:
-            return False
-        
-        return date >= self.today - timedelta(days=history) and date <= self.today
+        with profiler.stage("calculate"):
+            metrics = self.calculate_work_started_vs_finished_chart(work_items, history)
+        with profiler.stage("render"):
+            self.render_work_started_vs_finished_chart(metrics, started_color, closed_color, chart_name)
 
+    def render_work_started_vs_finished_chart(self, metrics, started_color, closed_color, chart_name):
+        # Calculate the center positions for the bars
+        center_positions = [x for x in range(len(metrics["weeks"]))]
 
-    def plot_work_started_vs_finished_chart(self, work_items, history, started_color, closed_color, chart_name):
-        print("Creating Work Started vs. finished chart with following config: History: {0}, Chart Name: {1}, Started Color: {2}, Closed Color: {3}".format(history, chart_name, started_color, closed_color))
+        # Plot the bar chart with adjusted x-axis positions
+        axes = self.chart_canvas.create_chart()
+        bar_width = 0.35
+        axes.bar(center_positions, metrics["started"], width=bar_width, color=started_color, alpha=0.7, label='Started')
+        axes.bar([pos + bar_width for pos in center_positions], metrics["closed"], width=bar_width, color=closed_color, alpha=0.7, label='Closed')
 
-        # Calculate counts based on weeks
-        started_counts = {}
-        closed_counts = {}
+        axes.set_title("Work Started and Closed")
+        axes.set_xlabel("Week of the Year")
+        axes.set_ylabel("Number of Work Items")
+        axes.set_ylim(bottom=0)
 
-        for item in work_items:
-            if self.is_date_between_today_and_history(item.started_date, history):
-                started_date_key = item.started_date.date().strftime('%Y-%W')
-                started_counts[started_date_key] = started_counts.get(started_date_key, 0) + 1
-                
-                # Make sure we have the same keys in both dictionaries - keep the existing value
-                closed_counts[started_date_key] = closed_counts.get(started_date_key, 0) + 0
+        self.add_timestamp(axes)
 
-            if self.is_date_between_today_and_history(item.closed_date, history):
-                closed_date_key = item.closed_date.date().strftime('%Y-%W')
-                closed_counts[closed_date_key] = closed_counts.get(closed_date_key, 0) + 1
+        # Set x-axis labels based on the week of the year
+        axes.set_xticks([pos + bar_width / 2 for pos in center_positions], labels=metrics["weeks"], rotation=45, ha='right')
 
-                # Make sure we have the same keys in both dictionaries - keep the existing value
-                started_counts[closed_date_key] = started_counts.get(closed_date_key, 0) + 0
+        axes.legend()
+        self.add_logo(axes)
 
-        # Sort dictionaries
-        key_function = lambda x: x[0]
+        chart_file_path = os.path.join(self.charts_folder, chart_name)
+        self.chart_canvas.save_chart(chart_file_path)
 
-        sorted_started_counts = dict(sorted(started_counts.items(), key=key_function))
-        sorted_closed_counts = dict(sorted(closed_counts.items(), key=key_function))
+    def plot_estimation_vs_cycle_time_scatterplot(self, items, history, chart_name, estimation_unit, label_placement = None, scatter_density = None):
+        print("Creating Estimation vs. Cycle Time Scatterplot with the following config: History: {0}, Chart Name: {1}, Estimation Unit: {2}".format(history, chart_name, estimation_unit))
 
-        # Calculate the center positions for the bars
-        center_positions = [x for x in range(len(started_counts))]
+        with profiler.stage("calculate"):
+            metrics = self.calculate_estimation_vs_cycle_time_scatterplot(items, history)
 
-        # Plot the bar chart with adjusted x-axis positions
-        plt.figure(figsize=(15, 9))
-        bar_width = 0.35
-        plt.bar(center_positions, sorted_started_counts.values(), width=bar_width, color=started_color, alpha=0.7, label='Started')
-        plt.bar([pos + bar_width for pos in center_positions], sorted_closed_counts.values(), width=bar_width, color=closed_color, alpha=0.7, label='Closed')
+        if metrics is not None:
+            with profiler.stage("render"):
+                self.render_estimation_vs_cycle_time_scatterplot(metrics, chart_name, estimation_unit, label_placement, scatter_density)
 
-        plt.title("Work Started and Closed")
-        plt.xlabel("Week of the Year")
-        plt.ylabel("Number of Work Items")
-        plt.gca().set_ylim(bottom=0)  
+    def render_estimation_vs_cycle_time_scatterplot(self, metrics, chart_name, estimation_unit, label_placement = None, scatter_density = None):
+        estimations = metrics["estimations"]
+        cycle_times = metrics["cycle_times"]
 
-        self.add_timestamp(plt)
+        axes = self.chart_canvas.create_chart()
+        is_density = self.get_scatter_density(scatter_density).add_points(axes, estimations, cycle_times)
 
-        # Set x-axis labels based on the week of the year
-        plt.xticks([pos + bar_width / 2 for pos in center_positions], labels=sorted_started_counts.keys(), rotation=45, ha='right')
-        
-        plt.legend()
-        self.add_logo(plt)
+        self.add_item_labels(axes, label_placement, is_density, estimations, cycle_times, metrics["item_titles"])
+
+        axes.set_title("Estimation vs. Cycle Time")
+        axes.set_xlabel("Estimation ({0})".format(estimation_unit))
+        axes.set_ylabel("Cycle Time (days)")
+        axes.yaxis.set_major_locator(MaxNLocator(integer=True))
+        axes.set_ylim(bottom=0)
+
+        self.add_timestamp(axes)
+        self.add_logo(axes)
 
         chart_file_path = os.path.join(self.charts_folder, chart_name)
-        print("Storing file at {0}".format(chart_file_path))
-        plt.savefig(chart_file_path)
+        self.chart_canvas.save_chart(chart_file_path)
 
-        if self.show_plots:
-            plt.show()
+    def plot_how_many_forecast(self, items, history, target_date, percentiles, percentile_colors, chart_name, trials = 1000000, workers = 1, seed = None):
+        print("Creating How Many Forecast with following config: History: {0}, Chart Name: {1}, Target Date: {2}, Percentiles: {3}, Trials: {4}".format(history, chart_name, target_date, percentiles, trials))
 
-    def plot_estimation_vs_cycle_time_scatterplot(self, items, history, chart_name, estimation_unit):
-        print("Creating Estimation vs. Cycle Time Scatterplot with the following config: History: {0}, Chart Name: {1}, Estimation Unit: {2}".format(history, chart_name, estimation_unit))
-        
-        # Ignore items without cycle time and without estimation
-        filtered_items = [item for item in items if item.cycle_time and item.cycle_time is not None and item.estimation is not None and item.estimation > 0]
+        with profiler.stage("calculate"):
+            metrics = self.calculate_how_many_forecast(items, history, target_date, percentiles, trials, workers, seed)
 
-        cycle_times = [item.cycle_time for item in filtered_items if item.cycle_time is not None]
+        if metrics is not None:
+            print("Items done until {0} ({1} Days):".format(metrics["target_date"], metrics["forecast_days"]))
+            for (percentile, value) in zip(percentiles, metrics["percentile_values"]):
+                print("    {0}%: {1} Items or more".format(percentile, int(value)))
 
-        if not cycle_times:
-            print("No closed work items for plotting.")
-            return
+            with profiler.stage("render"):
+                self.render_how_many_forecast(metrics, percentile_colors, chart_name)
 
-        if history is not None:
-            # Filter items based on the history parameter
-            end_date = self.today
-            start_date = end_date - timedelta(days=history)
-            items = [item for item in filtered_items if item.closed_date and item.started_date and start_date <= item.closed_date <= end_date]
-            cycle_times = [item.cycle_time for item in items]
-            estimations = [item.estimation for item in items]
+    def render_how_many_forecast(self, metrics, percentile_colors, chart_name):
+        axes = self.chart_canvas.create_chart()
 
-        if not cycle_times:
-            print("No closed work items within the specified history for plotting.")
-            return
+        # Share of the trials that finished each number of items
+        axes.bar(metrics["outcomes"], metrics["frequencies"] / metrics["trials"] * 100, color='blue', alpha=0.7, label='Trials')
 
+        axes.set_title("How Many Items will be done until {0} ({1} Trials)".format(metrics["target_date"].strftime('%Y-%m-%d'), metrics["trials"]))
+        axes.set_xlabel("Items Done")
+        axes.set_ylabel("Trials (%)")
+        axes.xaxis.set_major_locator(MaxNLocator(integer=True))
+        axes.set_ylim(bottom=0)
 
-        plt.figure(figsize=(15, 9))
-        plt.scatter(estimations, cycle_times)
-        
-        texts = []
-        for item in items:
-            text = plt.text(item.estimation, item.cycle_time, item.item_title, ha='center')
-            texts.append(text)
+        self.add_timestamp(axes)
 
-        # Adjust text to avoid overlap
-        adjustText.adjust_text(texts, arrowprops=dict(arrowstyle="-", color='k', lw=0.5))
-        
-        plt.title("Estimation vs. Cycle Time")
-        plt.xlabel("Estimation ({0})".format(estimation_unit))
-        plt.ylabel("Cycle Time (days)")
-        plt.gca().yaxis.set_major_locator(MaxNLocator(integer=True))
-        plt.gca().set_ylim(bottom=0)  
+        for value, percentile, color in zip(metrics["percentile_values"], metrics["percentiles"], percentile_colors):
+            axes.axvline(x=value, color=color, linestyle='--', label=f'{percentile}% ({int(value)} Items or more)')
 
-        self.add_timestamp(plt)
-        self.add_logo(plt)
+        axes.legend()
+        self.add_logo(axes)
 
         chart_file_path = os.path.join(self.charts_folder, chart_name)
-        print("Storing file at {0}".format(chart_file_path))
-        plt.savefig(chart_file_path)
-
-        if self.show_plots:
-            plt.show()
-            
-    def plot_total_age_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, chart_name):
-        baseline_total_age = self.get_total_age_history_for_date_range(baseline_start_date, baseline_end_date, work_items)
-        
-        baseline_values = list(baseline_total_age.values())
-        (baseline_average, unpl, lnpl) = self.caclulate_average_and_limits(baseline_values)
-        
-        start_date = self.today - timedelta(days=history)
-        total_age_data = self.get_total_age_history_for_date_range(start_date, self.today, work_items)
-        
-        x_values = [self.today - timedelta(days=days) for days in total_age_data.keys()]
-        y_values = list(total_age_data.values())
-        
-        self.plot_pbc(x_values, y_values, baseline_average, unpl, lnpl, "Total Work Item Age X Chart", "Date", "Total Age", chart_name)     
-            
-    def plot_cycle_time_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, chart_name):
-        baseline_cycle_time = self.get_cycle_time_history_for_date_range(baseline_start_date, baseline_end_date, work_items)
-        
-        baseline_values = [item.cycle_time for item in baseline_cycle_time.values()]
-        (baseline_average, unpl, lnpl) = self.caclulate_average_and_limits(baseline_values)
-        
-        start_date = self.today - timedelta(days=history)
-        cycle_time_data = self.get_cycle_time_history_for_date_range(start_date, self.today, work_items)
-        
-        x_values = list(cycle_time_data.keys())
-        y_values = [item.cycle_time for item in cycle_time_data.values()]
-        
-        item_texts = [item.item_title for item in cycle_time_data.values()]
-        
-        self.plot_pbc(x_values, y_values, baseline_average, unpl, lnpl, "Cycle Time X Chart", "Item", "Cycle Time", chart_name, item_texts)            
-
-    def plot_wip_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, chart_name):
-        baseline_wip = self.get_wip_history_for_date_range(baseline_start_date, baseline_end_date, work_items)
-        
-        baseline_values = list(baseline_wip.values())
-        (baseline_average, unpl, lnpl) = self.caclulate_average_and_limits(baseline_values)
-        
-        start_date = self.today - timedelta(days=history)
-        wip_data = self.get_wip_history_for_date_range(start_date, self.today, work_items)
-        
-        x_values = [self.today - timedelta(days=days) for days in wip_data.keys()]        
-        y_values = list(wip_data.values())
-        
-        self.plot_pbc(x_values, y_values, baseline_average, unpl, lnpl, "WIP X Chart", "Date", "WIP", chart_name)
-            
-    def plot_throughput_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, chart_name):        
-        baseline_closed_items = self.get_throughput_history_for_date_range(baseline_start_date, baseline_end_date, work_items)
-        
-        baseline_values = list(baseline_closed_items.values())
-        (baseline_average, unpl, lnpl) = self.caclulate_average_and_limits(baseline_values)
-        
-        start_date = self.today - timedelta(days=history)
-        throughput_data = self.get_throughput_history_for_date_range(start_date, self.today, work_items)
-        
-        x_values = [self.today - timedelta(days=days) for days in throughput_data.keys()]        
-        y_values = list(throughput_data.values())
-        
-        self.plot_pbc(x_values, y_values, baseline_average, unpl, lnpl, "Throughput X Chart", "Date", "Throughput", chart_name)
-        
-    def plot_pbc(self, x_values, y_values, average, unpl, lnpl, title, x_label, y_label, chart_name, item_texts = []):
+        self.chart_canvas.save_chart(chart_file_path)
+
+    def plot_when_forecast(self, items, history, remaining_items, percentiles, percentile_colors, chart_name, trials = 1000000, workers = 1, seed = None):
+        print("Creating When Forecast with following config: History: {0}, Chart Name: {1}, Remaining Items: {2}, Percentiles: {3}, Trials: {4}".format(history, chart_name, remaining_items, percentiles, trials))
+
+        with profiler.stage("calculate"):
+            metrics = self.calculate_when_forecast(items, history, remaining_items, percentiles, trials, workers, seed)
+
+        if metrics is not None:
+            print("Date when {0} Items are done:".format(remaining_items))
+            for (percentile, date) in zip(percentiles, metrics["percentile_dates"]):
+                print("    {0}%: {1}".format(percentile, date if date else "Not within 10 years"))
+
+            with profiler.stage("render"):
+                self.render_when_forecast(metrics, percentile_colors, chart_name)
+
+    def render_when_forecast(self, metrics, percentile_colors, chart_name):
+        axes = self.chart_canvas.create_chart()
+
+        # Share of the trials that finished the items on each day
+        axes.bar(metrics["dates"], metrics["frequencies"] / metrics["trials"] * 100, color='blue', alpha=0.7, label='Trials')
+
+        axes.set_title("When will {0} Items be done ({1} Trials)".format(metrics["remaining_items"], metrics["trials"]))
+        axes.set_xlabel("Date")
+        axes.set_ylabel("Trials (%)")
+        self.rotate_x_tick_labels(axes, rotation=45, ha='right')  # Rotate x-axis labels for better readability
+        axes.set_ylim(bottom=0)
+
+        date_format = DateFormatter("%Y-%m-%d")
+        axes.xaxis.set_major_formatter(date_format)
+
+        self.add_timestamp(axes)
+
+        for date, percentile, color in zip(metrics["percentile_dates"], metrics["percentiles"], percentile_colors):
+            if date is not None:
+                axes.axvline(x=date, color=color, linestyle='--', label=f'{percentile}% ({date.strftime("%Y-%m-%d")})')
+
+        axes.legend()
+        self.add_logo(axes)
+
+        chart_file_path = os.path.join(self.charts_folder, chart_name)
+        self.chart_canvas.save_chart(chart_file_path)
+
+    def plot_total_age_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, chart_name, rolling_baseline = None, line_downsampling = None):
+        with profiler.stage("calculate"):
+            metrics = self.calculate_total_age_process_behaviour_chart(work_items, baseline_start_date, baseline_end_date, history, rolling_baseline)
+
+        with profiler.stage("render"):
+            self.plot_pbc(metrics["dates"], metrics["values"], metrics["average"], metrics["unpl"], metrics["lnpl"], "Total Work Item Age X Chart", "Date", "Total Age", chart_name, signals=metrics["signals"], line_downsampling=line_downsampling)
+
+    def plot_cycle_time_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, chart_name, label_placement = None, rolling_baseline = None, line_downsampling = None):
+        with profiler.stage("calculate"):
+            metrics = self.calculate_cycle_time_process_behaviour_chart(work_items, baseline_start_date, baseline_end_date, history, rolling_baseline)
+
+        # The items are shown next to each other in the order they were closed
+        x_values = list(range(len(metrics["values"])))
+
+        with profiler.stage("render"):
+            self.plot_pbc(x_values, metrics["values"], metrics["average"], metrics["unpl"], metrics["lnpl"], "Cycle Time X Chart", "Item", "Cycle Time", chart_name, metrics["item_titles"], label_placement, metrics["signals"], line_downsampling)
+
+    def plot_wip_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, chart_name, rolling_baseline = None, line_downsampling = None):
+        with profiler.stage("calculate"):
+            metrics = self.calculate_wip_process_behaviour_chart(work_items, baseline_start_date, baseline_end_date, history, rolling_baseline)
+
+        with profiler.stage("render"):
+            self.plot_pbc(metrics["dates"], metrics["values"], metrics["average"], metrics["unpl"], metrics["lnpl"], "WIP X Chart", "Date", "WIP", chart_name, signals=metrics["signals"], line_downsampling=line_downsampling)
+
+    def plot_throughput_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, chart_name, rolling_baseline = None, line_downsampling = None):
+        with profiler.stage("calculate"):
+            metrics = self.calculate_throughput_process_behaviour_chart(work_items, baseline_start_date, baseline_end_date, history, rolling_baseline)
+
+        with profiler.stage("render"):
+            self.plot_pbc(metrics["dates"], metrics["values"], metrics["average"], metrics["unpl"], metrics["lnpl"], "Throughput X Chart", "Date", "Throughput", chart_name, signals=metrics["signals"], line_downsampling=line_downsampling)
+
+    def plot_pbc(self, x_values, y_values, average, unpl, lnpl, title, x_label, y_label, chart_name, item_texts = [], label_placement = None, signals = None, line_downsampling = None):
+        axes = self.chart_canvas.create_chart()
+
+        # The values outside the limits are always drawn, the other signals are marked on the points that are drawn
+        outside_limits = signals["outside_limits"] if signals is not None else None
+        kept_points = self.get_line_downsampling(line_downsampling).get_kept_points(axes, y_values, outside_limits)
+
+        if kept_points is not None:
+            x_values = [x_values[index] for index in kept_points]
+            y_values = np.asarray(y_values)[kept_points]
+
+            if len(item_texts) > 0:
+                item_texts = np.asarray(item_texts)[kept_points]
+
+            if np.ndim(average) != 0:
+                (average, unpl, lnpl) = (average[kept_points], unpl[kept_points], lnpl[kept_points])
+
+            if signals is not None:
+                signals = {signal: signal_values[kept_points] for (signal, signal_values) in signals.items()}
+
         # Plot data
-        plt.figure(figsize=(15, 9))
-        plt.plot(x_values, y_values, marker='o', linestyle='-', color='b')
+        axes.plot(x_values, y_values, marker='o', linestyle='-', color='b')
+
+        if np.ndim(average) == 0:
+            # Plot baseline average, unpl, and lnpl as horizontal lines, a baseline without enough values has none (NaN)
+            if not np.isnan(average):
+                axes.axhline(y=average, color='r', linestyle='--', label='Average')
+                axes.axhline(y=unpl, color='g', linestyle='--', label='Upper Natural Process Limit (UNPL)')
+
+                if (lnpl > 0):
+                    axes.axhline(y=lnpl, color='y', linestyle='--', label='Lower Natural Process Limit (LNPL)')
+        else:
+            # With a rolling baseline each value has its own average and limits
+            axes.step(x_values, average, where='mid', color='r', linestyle='--', label='Rolling Average')
+            axes.step(x_values, unpl, where='mid', color='g', linestyle='--', label='Upper Natural Process Limit (UNPL)')
 
-        # Plot baseline average, unpl, and lnpl as horizontal lines
-        plt.axhline(y=average, color='r', linestyle='--', label='Average')
-        plt.axhline(y=unpl, color='g', linestyle='--', label='Upper Natural Process Limit (UNPL)')
-        
-        if (lnpl > 0):
-            plt.axhline(y=lnpl, color='y', linestyle='--', label='Lower Natural Process Limit (LNPL)')
+            if np.any(lnpl > 0):
+                axes.step(x_values, lnpl, where='mid', color='y', linestyle='--', label='Lower Natural Process Limit (LNPL)')
+
+        # Values that are part of a signal get a ring, the rings of different rules have different sizes so they can all be seen
+        for (signal, color, size, label) in PBC_SIGNAL_STYLES:
+            if signals is not None and np.any(signals[signal]):
+                signal_x_values = [x_value for (x_value, is_signal) in zip(x_values, signals[signal]) if is_signal]
+                signal_y_values = np.asarray(y_values)[signals[signal]]
+
+                axes.scatter(signal_x_values, signal_y_values, s=size, facecolors='none', edgecolors=color, linewidths=2, label=label, zorder=3)
 
         # Set x-axis label and rotate x-axis ticks for better readability
-        plt.xlabel(x_label)
-        plt.xticks(rotation=45)
+        axes.set_xlabel(x_label)
+        self.rotate_x_tick_labels(axes, rotation=45)
 
         # Set y-axis label
-        plt.ylabel(y_label)
-        
-        texts = []
-        for index in range(len(item_texts)):
-            text = plt.text(x_values[index], y_values[index], item_texts[index], ha='center')
-            texts.append(text)
-
-        # Adjust text to avoid overlap
-        adjustText.adjust_text(texts, arrowprops=dict(arrowstyle="-", color='k', lw=0.5))
-
-        # Set chart title and legend
-        plt.title(title)
-        plt.legend()
-        
-        self.add_timestamp(plt)
-        self.add_logo(plt)
+        axes.set_ylabel(y_label)
+
+        self.get_label_placement(label_placement).add_labels(axes, x_values[:len(item_texts)], y_values[:len(item_texts)], item_texts)
+
+        # Set chart title and legend, a chart without limits and signals has nothing to explain in it
+        axes.set_title(title)
+
+        if axes.get_legend_handles_labels()[0]:
+            axes.legend()
+
+        self.add_timestamp(axes)
+        self.add_logo(axes)
 
         chart_file_path = os.path.join(self.charts_folder, chart_name)
-        print("Storing file at {0}".format(chart_file_path))
-        plt.savefig(chart_file_path)
-
-        if self.show_plots:
-            plt.show()
-
-            
-    def get_cycle_time_history_for_date_range(self, start_date, end_date, work_items):
-        filtered_items = [item for item in work_items if item.cycle_time and start_date <= item.closed_date <= end_date]
-            
-        # Sort the filtered items by closed_date
-        sorted_items = sorted(filtered_items, key=lambda item: item.closed_date)        
-        
-        # Create a dictionary with integer keys starting from 0
-        sorted_items_dict = {index: item for index, item in enumerate(sorted_items)}
-        
-        return sorted_items_dict
-    
-    def get_total_age_history_for_date_range(self, start_date, end_date, work_items):
-        total_age_per_day = {}
-
-        # Iterate through each day from start_date to end_date
-        current_date = start_date
-        day_count = 0
-        while current_date <= end_date:
-            total_age_per_day[day_count] = 0
-
-            # Iterate through each item
-            for item in work_items:
-                # Check if the item was started but not closed on the current day
-                if item.started_date <= current_date and (not item.closed_date or item.closed_date > current_date):
-                    # Calculate the delta between the current date and the item's started date
-                    delta_days = (current_date - item.started_date).days
-                    # Increment total age by the delta
-                    total_age_per_day[day_count] += delta_days
-
-            # Move to the next day
-            current_date += timedelta(days=1)
-            day_count += 1
-
-        return total_age_per_day
-            
-    def get_wip_history_for_date_range(self, start_date, end_date, work_items):
-        count_per_day = {}
-
-        # Iterate through each day from start_date to end_date
-        current_date = start_date
-        day_count = 0  # Initialize day count
-        while current_date <= end_date:
-            count_per_day[day_count] = 0  # Initialize count to 0 for the current day
-            
-            # Iterate through each item
-            for item in work_items:
-                # Check if the item was started but not closed on the current day
-                if item.started_date <= current_date and (not item.closed_date or item.closed_date > current_date):
-                    count_per_day[day_count] += 1  # Increment count if the condition is met
-            
-            # Move to the next day
-            current_date += timedelta(days=1)
-            day_count += 1  # Increment day count
-
-        return count_per_day
-        
-    def get_throughput_history_for_date_range(self, start_date, end_date, work_items):
-        closed_items_count = {}
-        
-        date_range = (end_date - start_date).days + 1
-        
-        for index in range(date_range):
-            closed_items_count[index] = 0
-        
-        for item in work_items:
-            if item.closed_date and start_date <= item.closed_date <= end_date:
-                index = (item.closed_date - start_date).days
-                
-                closed_items_count[index] += 1
-                
-        return closed_items_count
-    
-    def caclulate_average_and_limits(self, baseline_values):
-        baseline_average = self.calculate_mean(baseline_values)
-        moving_ranges = self.calculate_moving_ranges(baseline_values)
-        moving_range_mean = self.calculate_mean(moving_ranges)
-        (unpl, lnpl) = self.calculate_natural_process_limits(baseline_average, moving_range_mean)        
-        return (baseline_average, unpl, lnpl)
-        
-    def calculate_mean(self, values):
-        mean = 0
-        
-        if len(values) > 0:
-            mean = sum(values) / len(values)
-        
-        return mean
-        
-    def calculate_moving_ranges(self, values):
-        moving_ranges = []
-        for i in range(1, len(values)):
-            moving_range = abs(values[i] - values[i-1])
-            moving_ranges.append(moving_range)
-        return moving_ranges
-    
-    def calculate_natural_process_limits(self, baseline_average, baseline_moving_range_average):
-        unpl = baseline_average + (2.66 * baseline_moving_range_average)
-        lnpl = baseline_average - (2.66 * baseline_moving_range_average)
-        
-        if lnpl < 0:
-            lnpl = 0
-        
-        return (unpl, lnpl)
-    
-    def add_timestamp(self, plt):
-        plt.text(1, 1.02, f"Generated on {self.current_date}", transform=plt.gca().transAxes, fontsize=10, ha='right', va='top')
-    
-    def add_logo(self, plt):
-        # Add logo
-        imagebox = OffsetImage(self.logo, zoom=0.48)
-        ab = AnnotationBbox(imagebox, (0.065, 1.08), xycoords='axes fraction', frameon=False, box_alignment=(1, 1))
-        plt.gca().add_artist(ab)
\ No newline at end of file
+        self.chart_canvas.save_chart(chart_file_path)
+
+    def get_label_placement(self, label_placement):
+        if label_placement is None:
+            return LabelPlacement()
+
+        return label_placement
+
+    def get_line_downsampling(self, line_downsampling):
+        if line_downsampling is None:
+            return LineDownsampling()
+
+        return line_downsampling
+
+    def get_scatter_density(self, scatter_density):
+        if scatter_density is None:
+            return ScatterDensity()
+
+        return scatter_density
+
+    def add_item_labels(self, axes, label_placement, is_density, x_values, y_values, item_titles):
+        label_placement = self.get_label_placement(label_placement)
+
+        # Labels of single items can't be told apart on the density, only the outliers are labeled there
+        if is_density and label_placement.strategy != "outliers":
+            print("Skipping the item labels on the density, use the 'outliers' label placement to label the outliers")
+            return
+
+        label_placement.add_labels(axes, x_values, y_values, item_titles)
+
+    def rotate_x_tick_labels(self, axes, **text_properties):
+        for label in axes.get_xticklabels():
+            label.set(**text_properties)
+
+    def add_timestamp(self, axes):
+        self.chart_canvas.add_timestamp(axes)
+
+    def add_logo(self, axes):
+        self.chart_canvas.add_logo(axes)
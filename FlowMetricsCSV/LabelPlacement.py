@@ -0,0 +1,119 @@
+from math import ceil
+
+from .Profiler import profiler
+
+# numpy, matplotlib and adjustText are imported by the methods that need them, so reading a config doesn't load them
+
+class LabelPlacement:
+    STRATEGIES = ["exact", "grid", "outliers"]
+
+    # Positions around the point that are tried for each label on the grid, as (columns, rows) in label sizes.
+    # Labels that are two positions away are connected to their point with a line.
+    GRID_OFFSETS = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1), (0, 2), (0, -2), (2, 0), (-2, 0)]
+
+    # adjustText compares all overlapping labels with each other at once, above this many labels the grid is used for the outliers
+    EXACT_LABEL_LIMIT = 300
+
+    def __init__(self, strategy = "exact", outlier_percentile = 85):
+        if strategy not in self.STRATEGIES:
+            raise ValueError("Unknown label placement '{0}', use one of {1}".format(strategy, self.STRATEGIES))
+
+        self.strategy = strategy
+        self.outlier_percentile = outlier_percentile
+
+    def add_labels(self, axes, x_values, y_values, labels):
+        with profiler.stage("place labels", strategy=self.strategy, labels=len(labels)):
+            self.add_labels_with_strategy(axes, x_values, y_values, labels)
+
+    def add_labels_with_strategy(self, axes, x_values, y_values, labels):
+        if self.strategy == "grid":
+            self.add_labels_on_grid(axes, x_values, y_values, labels)
+            return
+
+        if self.strategy == "outliers" and len(labels) > 0:
+            import numpy as np
+
+            threshold = np.percentile(y_values, self.outlier_percentile)
+            outlier_indexes = [index for (index, y_value) in enumerate(y_values) if y_value >= threshold]
+
+            print("Labeling {0} of {1} Items at or above the {2}th Percentile ({3:.1f} Days)".format(len(outlier_indexes), len(labels), self.outlier_percentile, threshold))
+
+            x_values = [x_values[index] for index in outlier_indexes]
+            y_values = [y_values[index] for index in outlier_indexes]
+            labels = [labels[index] for index in outlier_indexes]
+
+            if len(labels) > self.EXACT_LABEL_LIMIT:
+                self.add_labels_on_grid(axes, x_values, y_values, labels)
+                return
+
+        self.add_labels_exact(axes, x_values, y_values, labels)
+
+    def add_labels_exact(self, axes, x_values, y_values, labels):
+        import adjustText as adjustText
+
+        texts = []
+        for (x_value, y_value, label) in zip(x_values, y_values, labels):
+            text = axes.text(x_value, y_value, label, ha='center')
+            texts.append(text)
+
+        # Adjust text to avoid overlap
+        adjustText.adjust_text(texts, arrowprops=dict(arrowstyle="-", color='k', lw=0.5), ax=axes)
+
+    def add_labels_on_grid(self, axes, x_values, y_values, labels):
+        # The chart is split into square cells of the height of a label. The points and every placed label mark their cells
+        # as occupied, each label takes the first free position around its point. This takes linear time instead of the
+        # iterative force simulation of adjustText, labels that don't find a free position are left out.
+        if len(labels) == 0:
+            return
+
+        from matplotlib.font_manager import FontProperties
+        import numpy as np
+
+        font_size = FontProperties().get_size_in_points()
+        pixels_per_point = axes.figure.dpi / 72
+        cell_size = font_size * 1.4 * pixels_per_point
+        character_width = font_size * 0.6 * pixels_per_point
+
+        # The limits are updated lazily, reading them applies the autoscaling for the points that were added
+        axes.get_xlim()
+        axes.get_ylim()
+
+        x_coordinates = np.asarray(axes.xaxis.convert_units(x_values), dtype=np.float64)
+        y_coordinates = np.asarray(y_values, dtype=np.float64)
+        points = axes.transData.transform(np.column_stack([x_coordinates, y_coordinates]))
+        point_cells = np.floor(points / cell_size).astype(np.int64).tolist()
+
+        occupied_cells = set(map(tuple, point_cells))
+        skipped_labels = 0
+
+        # The labels of the highest values are placed first, they are the most interesting ones
+        for index in np.argsort(-y_coordinates, kind='stable').tolist():
+            label = str(labels[index])
+            width = max(1, ceil(len(label) * character_width / cell_size))
+            (point_column, point_row) = point_cells[index]
+
+            for (column_offset, row_offset) in self.GRID_OFFSETS:
+                first_column = point_column + column_offset * width - width // 2
+                row = point_row + row_offset
+                label_cells = [(column, row) for column in range(first_column, first_column + width)]
+
+                if not any(cell in occupied_cells for cell in label_cells):
+                    break
+            else:
+                skipped_labels += 1
+                continue
+
+            occupied_cells.update(label_cells)
+
+            # Offset of the center of the cells from the point, in points so it stays the same if the limits change afterwards
+            x_offset = ((first_column + width / 2) * cell_size - points[index][0]) / pixels_per_point
+            y_offset = ((row + 0.5) * cell_size - points[index][1]) / pixels_per_point
+
+            arrow_properties = None
+            if max(abs(column_offset), abs(row_offset)) > 1:
+                arrow_properties = dict(arrowstyle="-", color='k', lw=0.5)
+
+            axes.annotate(label, (x_values[index], y_values[index]), xytext=(x_offset, y_offset), textcoords='offset points', ha='center', va='center', arrowprops=arrow_properties)
+
+        if skipped_labels > 0:
+            print("Left out {0} of {1} Labels that did not fit next to their Item".format(skipped_labels, len(labels)))
@@ -0,0 +1,66 @@
+from .Profiler import profiler
+
+# numpy is imported by the methods that need it, so reading a config doesn't load it
+
+class LineDownsampling:
+    # A line with more points than the chart has pixels draws many points on top of each other. Above that the series is split
+    # into one bucket per pixel column, and only the first, last, lowest and highest point of each bucket are drawn (M4 decimation).
+    # The line connects the buckets the same way as with all points, so it looks the same and keeps its extremes.
+    POINTS_PER_BUCKET = 4
+
+    def __init__(self, points_per_pixel = 4):
+        self.points_per_pixel = points_per_pixel
+
+    def get_max_points(self, axes):
+        if self.points_per_pixel is None:
+            return None
+
+        return max(int(axes.bbox.width * self.points_per_pixel), self.POINTS_PER_BUCKET)
+
+    def get_kept_points(self, axes, values, marked_points = None):
+        # Returns the indexes of the points that are drawn, or None if all of them fit.
+        # Of the marked points, like the values outside the natural process limits, the lowest and highest of each bucket are drawn as well.
+        max_points = self.get_max_points(axes)
+
+        if max_points is None or len(values) <= max_points:
+            return None
+
+        with profiler.stage("downsample line", points=len(values), max_points=max_points):
+            bucket_ids = get_pixel_columns(axes, len(values), max_points / self.POINTS_PER_BUCKET)
+            kept_points = get_bucket_extremes(values, bucket_ids, marked_points)
+
+        print("Drawing {0} of {1} Points of the line".format(len(kept_points), len(values)))
+        return kept_points
+
+def get_pixel_columns(axes, point_count, columns):
+    # The points are evenly spaced (one per day or item). Matplotlib adds a margin on both sides of them, and the chart doesn't
+    # start at a whole pixel, so the position of each point is calculated like matplotlib does to find its pixel column.
+    import numpy as np
+
+    (x_margin, _) = axes.margins()
+    positions = (np.arange(point_count) + (point_count - 1) * x_margin) / ((point_count - 1) * (1 + 2 * x_margin))
+
+    return np.floor((axes.bbox.x0 + positions * axes.bbox.width) * columns / axes.bbox.width).astype(np.int64)
+
+def get_bucket_extremes(values, bucket_ids, marked_points = None):
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.float64)
+    point_count = len(values)
+
+    bucket_ends = np.append(np.flatnonzero(np.diff(bucket_ids)) + 1, point_count)
+    bucket_starts = np.insert(bucket_ends[:-1], 0, 0)
+
+    # Sorting by bucket and value puts the lowest value of each bucket first and the highest last
+    order = np.lexsort((values, bucket_ids))
+    kept_points = [bucket_starts, bucket_ends - 1, order[bucket_starts], order[bucket_ends - 1]]
+
+    if marked_points is not None and np.any(marked_points):
+        marked_order = order[np.asarray(marked_points)[order]]
+        marked_bucket_ids = bucket_ids[marked_order]
+
+        is_first = np.insert(marked_bucket_ids[1:] != marked_bucket_ids[:-1], 0, True)
+        is_last = np.append(marked_bucket_ids[1:] != marked_bucket_ids[:-1], True)
+        kept_points += [marked_order[is_first], marked_order[is_last]]
+
+    return np.unique(np.concatenate(kept_points))
@@ -0,0 +1,140 @@
+import csv
+import inspect
+import json
+import math
+import os
+from datetime import date, datetime
+
+import numpy as np
+
+from .FlowMetricsCalculator import FlowMetricsCalculator
+
+class MetricsExporter:
+    FORMATS = ["json", "csv"]
+
+    def __init__(self, metrics_folder, metrics_format, today):
+        if metrics_format not in self.FORMATS:
+            raise ValueError("Unknown metrics format '{0}', use one of {1}".format(metrics_format, self.FORMATS))
+
+        self.metrics_folder = metrics_folder
+        self.metrics_format = metrics_format
+        self.flow_metrics_calculator = FlowMetricsCalculator(today)
+
+        if not os.path.exists(metrics_folder):
+            os.makedirs(metrics_folder)
+
+    def export(self, work_items, plot_function_name, arguments):
+        (metrics, chart_name) = self.calculate(work_items, plot_function_name, arguments)
+        self.store_metrics(metrics, chart_name)
+
+    def calculate(self, work_items, plot_function_name, arguments):
+        # The chart jobs name the plot functions of the FlowMetricsService, each has a calculate function with the same arguments
+        calculate_function = getattr(self, plot_function_name.replace("plot_", "calculate_", 1))
+        return calculate_function(work_items, *arguments)
+
+    def get_chart_name(self, plot_function_name, arguments):
+        # Every calculate function gets the name of its chart, it's taken from the arguments without calculating the chart
+        calculate_function = getattr(self, plot_function_name.replace("plot_", "calculate_", 1))
+        return inspect.signature(calculate_function).bind(None, *arguments).arguments["chart_name"]
+
+    def calculate_cycle_time_scatterplot(self, items, history, percentiles, percentile_colors, chart_name, trend_settings = None, label_placement = None, scatter_density = None):
+        return (self.flow_metrics_calculator.calculate_cycle_time_scatterplot(items, history, percentiles, trend_settings), chart_name)
+
+    def calculate_work_item_age_scatterplot(self, items, history, x_axis_lines, x_axis_line_colors, chart_name, label_placement = None, scatter_density = None):
+        return (self.flow_metrics_calculator.calculate_work_item_age_scatterplot(items, history), chart_name)
+
+    def calculate_throughput_run_chart(self, items, history, chart_name, x_axis_unit='days'):
+        return (self.flow_metrics_calculator.calculate_throughput_run_chart(items, history, x_axis_unit), chart_name)
+
+    def calculate_work_in_process_run_chart(self, items, history, chart_name, line_downsampling = None):
+        return (self.flow_metrics_calculator.calculate_work_in_process_run_chart(items, history), chart_name)
+
+    def calculate_work_started_vs_finished_chart(self, work_items, history, started_color, closed_color, chart_name):
+        return (self.flow_metrics_calculator.calculate_work_started_vs_finished_chart(work_items, history), chart_name)
+
+    def calculate_estimation_vs_cycle_time_scatterplot(self, items, history, chart_name, estimation_unit, label_placement = None, scatter_density = None):
+        return (self.flow_metrics_calculator.calculate_estimation_vs_cycle_time_scatterplot(items, history), chart_name)
+
+    def calculate_how_many_forecast(self, items, history, target_date, percentiles, percentile_colors, chart_name, trials = 1000000, workers = 1, seed = None):
+        return (self.flow_metrics_calculator.calculate_how_many_forecast(items, history, target_date, percentiles, trials, workers, seed), chart_name)
+
+    def calculate_when_forecast(self, items, history, remaining_items, percentiles, percentile_colors, chart_name, trials = 1000000, workers = 1, seed = None):
+        return (self.flow_metrics_calculator.calculate_when_forecast(items, history, remaining_items, percentiles, trials, workers, seed), chart_name)
+
+    def calculate_total_age_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, chart_name, rolling_baseline = None, line_downsampling = None):
+        return (self.flow_metrics_calculator.calculate_total_age_process_behaviour_chart(work_items, baseline_start_date, baseline_end_date, history, rolling_baseline), chart_name)
+
+    def calculate_cycle_time_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, chart_name, label_placement = None, rolling_baseline = None, line_downsampling = None):
+        return (self.flow_metrics_calculator.calculate_cycle_time_process_behaviour_chart(work_items, baseline_start_date, baseline_end_date, history, rolling_baseline), chart_name)
+
+    def calculate_wip_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, chart_name, rolling_baseline = None, line_downsampling = None):
+        return (self.flow_metrics_calculator.calculate_wip_process_behaviour_chart(work_items, baseline_start_date, baseline_end_date, history, rolling_baseline), chart_name)
+
+    def calculate_throughput_process_behaviour_chart(self, work_items, baseline_start_date, baseline_end_date, history, chart_name, rolling_baseline = None, line_downsampling = None):
+        return (self.flow_metrics_calculator.calculate_throughput_process_behaviour_chart(work_items, baseline_start_date, baseline_end_date, history, rolling_baseline), chart_name)
+
+    def store_metrics(self, metrics, chart_name):
+        if metrics is None:
+            return
+
+        # The metrics of a chart are stored next to each other under the name of the chart, without the image extension
+        metrics_file_path = os.path.join(self.metrics_folder, "{0}.{1}".format(os.path.splitext(chart_name)[0], self.metrics_format))
+        print("Storing metrics at {0}".format(metrics_file_path))
+
+        metrics = {name: to_serializable(value) for (name, value) in metrics.items()}
+
+        if self.metrics_format == "json":
+            with open(metrics_file_path, 'w') as file:
+                json.dump(metrics, file, indent=2)
+        else:
+            # Series of different lengths are written in long format, one row per value
+            with open(metrics_file_path, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(["metric", "index", "value"])
+
+                for (name, value) in get_flat_metrics(metrics):
+                    if isinstance(value, list):
+                        writer.writerows([name, index, "" if item is None else item] for (index, item) in enumerate(value))
+                    else:
+                        writer.writerow([name, "", value])
+
+def get_flat_metrics(metrics):
+    # Nested metrics like the signals of the process behaviour charts are named like signals.outside_limits
+    for (name, value) in metrics.items():
+        if isinstance(value, dict):
+            yield from (("{0}.{1}".format(name, nested_name), nested_value) for (nested_name, nested_value) in get_flat_metrics(value))
+        else:
+            yield (name, value)
+
+def to_serializable(value):
+    if isinstance(value, dict):
+        return {name: to_serializable(item) for (name, item) in value.items()}
+
+    if isinstance(value, np.ndarray):
+        return [to_serializable(item) for item in value.tolist()]
+
+    if isinstance(value, (list, tuple)):
+        return [to_serializable(item) for item in value]
+
+    if isinstance(value, np.generic):
+        value = value.item()
+
+    # The days of the daily charts are calculated from today, which can include the time of the run
+    if isinstance(value, datetime):
+        value = value.date()
+
+    if isinstance(value, date):
+        return value.isoformat()
+
+    # Missing values like the cycle time of open items, or forecasts that are never done, are stored as null
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+
+    return value
+
+def to_fingerprint_value(value):
+    # Settings like the LabelPlacement are compared by their attributes, dates by their text
+    if hasattr(value, "__dict__"):
+        return vars(value)
+
+    return str(value)
@@ -0,0 +1,178 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+class MonteCarloSimulation:
+    # Trials that are simulated at once, this bounds the memory of a batch
+    BATCH_SIZE = 100000
+
+    # Days whose items are drawn at once when waiting for the items to be done. Fewer days are drawn at once when the
+    # daily throughput is high, so the tables of the items done in the halves of a block stay small.
+    BLOCK_DAYS = 64
+    MAX_BLOCK_ITEMS = 1024
+
+    def __init__(self, trials = 1000000, workers = 1, seed = None):
+        # Each day of a trial takes the throughput of a random day of the history. The batches get independent
+        # random streams of the same seed, so the results don't depend on how many workers simulate them.
+        self.trials = trials
+        self.workers = workers
+        self.seed = seed
+
+    def simulate_how_many(self, daily_throughput, days):
+        # Items done in each trial after the given number of days
+        return self.run_batches(simulate_how_many_batch, daily_throughput, days)
+
+    def simulate_when(self, daily_throughput, remaining_items, max_days = 3650):
+        # Days until the remaining items are done in each trial, inf if they are not done within max_days
+        return self.run_batches(simulate_when_batch, daily_throughput, remaining_items, max_days)
+
+    def run_batches(self, simulate_batch, daily_throughput, *arguments):
+        daily_throughput = np.asarray(daily_throughput, dtype=np.int64)
+
+        if len(daily_throughput) == 0:
+            raise ValueError("No throughput history to simulate")
+
+        batch_sizes = [min(self.BATCH_SIZE, self.trials - start) for start in range(0, self.trials, self.BATCH_SIZE)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(batch_sizes))
+        batches = [(daily_throughput, *arguments, batch_size, batch_seed) for (batch_size, batch_seed) in zip(batch_sizes, seeds)]
+
+        if self.workers > 1 and len(batches) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(simulate_batch, *zip(*batches)))
+        else:
+            results = [simulate_batch(*batch) for batch in batches]
+
+        return np.concatenate(results)
+
+def simulate_how_many_batch(daily_throughput, days, trials, seed):
+    random = np.random.default_rng(seed)
+
+    # How often each throughput value is drawn in the days of a trial follows a multinomial distribution,
+    # so a trial costs one draw per distinct value instead of one per day
+    (values, counts) = np.unique(daily_throughput, return_counts=True)
+    value_counts = random.multinomial(days, counts / len(daily_throughput), size=trials)
+
+    return value_counts @ values
+
+def simulate_when_batch(daily_throughput, remaining_items, max_days, trials, seed):
+    random = np.random.default_rng(seed)
+
+    block_days = get_block_days(daily_throughput)
+    (block_table, first_half_tables) = get_block_tables(daily_throughput, block_days)
+
+    completion_days = np.full(trials, np.inf)
+    done_items = np.zeros(trials, dtype=np.int64)
+    simulated_days = np.zeros(trials, dtype=np.int64)
+
+    # The items done in a block of days are drawn from the distribution of the sum of that many days of the history,
+    # until the remaining items are done in a block. Trials that are not done within max_days are not simulated any further.
+    done_trials = []
+    block_items = []
+    active_trials = np.arange(trials)
+
+    while len(active_trials) > 0:
+        sums = draw_items(random, block_table, np.zeros(len(active_trials), dtype=np.int64))
+
+        is_done = done_items[active_trials] + sums >= remaining_items
+        done_trials.append(active_trials[is_done])
+        block_items.append(sums[is_done])
+
+        active_trials = active_trials[~is_done]
+        done_items[active_trials] += sums[~is_done]
+        simulated_days[active_trials] += block_days
+
+        active_trials = active_trials[simulated_days[active_trials] < max_days]
+
+    done_trials = np.concatenate(done_trials)
+    block_items = np.concatenate(block_items)
+    done_items = done_items[done_trials]
+    simulated_days = simulated_days[done_trials]
+
+    # The day the items are done in the block is found by halving it: the items done in its first half are drawn given the
+    # items done in the whole block, and the items are done in the first half or else in the second one.
+    half_days = block_days
+
+    while half_days > 1:
+        half_days //= 2
+        first_half_items = draw_items(random, first_half_tables[half_days], block_items)
+
+        is_done = done_items + first_half_items >= remaining_items
+        block_items = np.where(is_done, first_half_items, block_items - first_half_items)
+        done_items = np.where(is_done, done_items, done_items + first_half_items)
+        simulated_days = np.where(is_done, simulated_days, simulated_days + half_days)
+
+    completion_days[done_trials] = simulated_days + 1
+
+    # Trials that are done in a block after max_days are not done at all
+    completion_days[completion_days > max_days] = np.inf
+
+    return completion_days
+
+def get_block_days(daily_throughput):
+    block_days = MonteCarloSimulation.BLOCK_DAYS
+
+    while block_days > 1 and block_days * daily_throughput.max() > MonteCarloSimulation.MAX_BLOCK_ITEMS:
+        block_days //= 2
+
+    return block_days
+
+def get_block_tables(daily_throughput, block_days):
+    # Probabilities of the items done in 1, 2, 4, ... days, each taking the throughput of a random day of the history
+    sum_probabilities = {1: np.bincount(daily_throughput) / len(daily_throughput)}
+    days = 1
+
+    while days < block_days:
+        sum_probabilities[days * 2] = np.convolve(sum_probabilities[days], sum_probabilities[days])
+        days *= 2
+
+    # Probabilities of the items done in the first half of a block of twice the days, one row for each of the items
+    # done in the whole block
+    first_half_tables = {}
+
+    for (days, probabilities) in sum_probabilities.items():
+        if days == block_days:
+            continue
+
+        block_items = np.arange(2 * len(probabilities) - 1)[:, np.newaxis]
+        second_half_items = block_items - np.arange(len(probabilities))
+
+        is_possible = (second_half_items >= 0) & (second_half_items < len(probabilities))
+        first_half_tables[days] = get_table(probabilities * np.where(is_possible, probabilities[np.clip(second_half_items, 0, len(probabilities) - 1)], 0))
+
+    return (get_table(sum_probabilities[block_days][np.newaxis, :]), first_half_tables)
+
+def get_table(probabilities):
+    # Cumulative probabilities of each row, offset by the row so the rows can be searched all at once.
+    # Rows that can't be drawn are all 0.
+    cumulative_probabilities = np.cumsum(probabilities, axis=1)
+    row_totals = cumulative_probabilities[:, -1:]
+    cumulative_probabilities = np.divide(cumulative_probabilities, row_totals, out=np.zeros_like(cumulative_probabilities), where=row_totals > 0)
+    cumulative_probabilities = (cumulative_probabilities + np.arange(len(probabilities))[:, np.newaxis]).ravel()
+
+    # Smallest index of the draws in each of twice as many equal slots of a row as the row has items,
+    # so most draws don't have to be searched for
+    (rows, row_length) = probabilities.shape
+    slots = np.arange(rows * 2 * row_length) / (2 * row_length)
+    guide = np.minimum(np.searchsorted(cumulative_probabilities, slots, side='right'), len(cumulative_probabilities) - 1).reshape(rows, 2 * row_length)
+
+    # Range of the possible items of each row
+    is_possible = probabilities > 0
+    first_items = np.argmax(is_possible, axis=1)
+    last_items = row_length - 1 - np.argmax(is_possible[:, ::-1], axis=1)
+
+    return (cumulative_probabilities, guide, first_items, last_items)
+
+def draw_items(random, table, rows):
+    (cumulative_probabilities, guide, first_items, last_items) = table
+    row_length = len(cumulative_probabilities) // len(guide)
+
+    random_values = random.random(len(rows))
+    draws = rows + random_values
+    indexes = guide[rows, np.minimum((random_values * guide.shape[1]).astype(np.int64), guide.shape[1] - 1)]
+
+    # Only the few draws above the smallest index of their slot are searched for
+    is_above = cumulative_probabilities[indexes] <= draws
+    indexes[is_above] = np.searchsorted(cumulative_probabilities, draws[is_above], side='right')
+
+    # Rounding can put a draw just outside of its row, it takes the closest possible items of the row instead
+    return np.clip(indexes - rows * row_length, first_items[rows], last_items[rows])
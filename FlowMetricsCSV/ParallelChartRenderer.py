@@ -0,0 +1,78 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .WorkItemTable import WorkItemTable
+
+# The numeric columns of the WorkItemTable are shared with the workers, the titles are sent once per worker
+SHARED_COLUMNS = ['started_dates', 'closed_dates', 'cycle_times', 'work_item_ages', 'estimations', 'started_times', 'closed_times']
+
+# State of a worker process, set up once by initialize_worker
+worker_state = {}
+
+class ParallelChartRenderer:
+    def __init__(self, workers, today):
+        self.workers = workers
+        self.today = today
+
+    def render_partitions(self, work_items, partitions):
+        # Each partition is a charts folder, the start and end of its items in work_items and its chart jobs.
+        # The items are shared once for all partitions, a worker only takes the range of the chart it renders.
+        chart_count = sum(len(chart_jobs) for (_, _, _, chart_jobs) in partitions)
+        print("Rendering {0} Charts with {1} Workers".format(chart_count, self.workers))
+
+        # Created before the workers start, so they don't race to create the same folder
+        for (charts_folder, _, _, _) in partitions:
+            os.makedirs(charts_folder, exist_ok=True)
+
+        shared_blocks = []
+        try:
+            shared_columns = []
+            for column_name in SHARED_COLUMNS:
+                column = getattr(work_items, column_name)
+
+                shared_block = shared_memory.SharedMemory(create=True, size=max(column.nbytes, 1))
+                shared_blocks.append(shared_block)
+
+                np.ndarray(column.shape, dtype=column.dtype, buffer=shared_block.buf)[:] = column
+                shared_columns.append((shared_block.name, column.dtype.str, len(column)))
+
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=initialize_worker, initargs=(shared_columns, work_items.item_titles.tolist(), self.today)) as executor:
+                futures = [executor.submit(render_chart, charts_folder, start, end, plot_function_name, arguments) for (charts_folder, start, end, chart_jobs) in partitions for (plot_function_name, arguments) in chart_jobs]
+
+                # Raises the first error of any of the charts
+                for future in futures:
+                    future.result()
+        finally:
+            for shared_block in shared_blocks:
+                shared_block.close()
+                shared_block.unlink()
+
+def initialize_worker(shared_columns, item_titles, today):
+    # Workers never show the charts, so they don't need an interactive backend
+    import matplotlib
+    matplotlib.use('Agg')
+
+    shared_blocks = []
+    columns = {}
+    for (column_name, (name, dtype, length)) in zip(SHARED_COLUMNS, shared_columns):
+        shared_block = shared_memory.SharedMemory(name=name)
+        shared_blocks.append(shared_block)
+        columns[column_name] = np.ndarray((length,), dtype=np.dtype(dtype), buffer=shared_block.buf)
+
+    worker_state["shared_blocks"] = shared_blocks
+    worker_state["work_items"] = WorkItemTable(item_titles=item_titles, **columns)
+    worker_state["today"] = today
+    worker_state["flow_metrics_services"] = {}
+
+def render_chart(charts_folder, start, end, plot_function_name, arguments):
+    flow_metrics_services = worker_state["flow_metrics_services"]
+    if charts_folder not in flow_metrics_services:
+        from .FlowMetricsService import FlowMetricsService
+
+        flow_metrics_services[charts_folder] = FlowMetricsService(False, charts_folder, worker_state["today"])
+
+    plot_function = getattr(flow_metrics_services[charts_folder], plot_function_name)
+    plot_function(worker_state["work_items"].select(slice(start, end)), *arguments)
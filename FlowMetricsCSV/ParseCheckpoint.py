@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+
+from .ParsedDataCache import STORAGE_FORMAT, load_work_item_columns, store_work_item_columns
+
+class ParseCheckpoint:
+    # The last line is searched in this many bytes at the end of the parsed part of the file
+    TAIL_SIZE = 64 * 1024
+
+    def __init__(self, checkpoint_folder, file_path, parse_settings):
+        self.file_path = file_path
+
+        if not os.path.exists(checkpoint_folder):
+            os.makedirs(checkpoint_folder)
+
+        key = hashlib.sha256(json.dumps([STORAGE_FORMAT, os.path.abspath(file_path), parse_settings]).encode('utf-8')).hexdigest()
+        self.checkpoint_file_path = os.path.join(checkpoint_folder, "{0}.json".format(key))
+        self.items_file_path = os.path.join(checkpoint_folder, "{0}.npz".format(key))
+
+        # Size of the file when it was read, everything after it is parsed with the next run
+        self.file_size = os.path.getsize(file_path)
+
+    def load_items(self):
+        if not os.path.isfile(self.checkpoint_file_path) or not os.path.isfile(self.items_file_path):
+            print("No checkpoint found for {0} - parsing the full file".format(self.file_path))
+            return None
+
+        with open(self.checkpoint_file_path, 'r') as file:
+            checkpoint = json.load(file)
+
+        self.offset = checkpoint["offset"]
+
+        if self.file_size < self.offset:
+            print("{0} is smaller than at the last checkpoint - parsing the full file".format(self.file_path))
+            return None
+
+        with open(self.file_path, 'rb') as file:
+            self.header_line = file.readline()
+
+            # The file was only appended to if the header and the last parsed line are still the same
+            file.seek(self.offset - checkpoint["last_line_length"])
+            last_line = file.read(checkpoint["last_line_length"])
+
+        if self.get_hash(self.header_line) != checkpoint["header_hash"] or self.get_hash(last_line) != checkpoint["last_line_hash"]:
+            print("{0} was changed since the last checkpoint - parsing the full file".format(self.file_path))
+            return None
+
+        print("Loading previously parsed Items from {0} (parsed up to byte {1})".format(self.items_file_path, self.offset))
+        return load_work_item_columns(self.items_file_path)
+
+    def read_file(self):
+        # Only the bytes up to the size of the file when it was read are parsed, so the checkpoint describes exactly
+        # the parsed rows. Rows appended in the meantime are parsed with the next run.
+        with open(self.file_path, 'rb') as file:
+            content = file.read(self.file_size)
+
+        line_end = content.find(b"\n")
+        self.header_line = content if line_end < 0 else content[:line_end + 1]
+        self.set_parsed_bytes(0, content)
+
+        return content
+
+    def read_appended_lines(self):
+        if self.file_size == self.offset:
+            print("No lines were appended since the last checkpoint")
+            return None
+
+        with open(self.file_path, 'rb') as file:
+            file.seek(self.offset)
+            appended_bytes = file.read(self.file_size - self.offset)
+
+        print("Reading {0} bytes that were appended since the last checkpoint".format(len(appended_bytes)))
+        self.set_parsed_bytes(self.offset, appended_bytes)
+
+        # Prefix the header, so the appended lines can be parsed like a csv file of their own
+        return self.header_line + appended_bytes
+
+    def set_parsed_bytes(self, start, parsed_bytes):
+        # The checkpoint ends after the parsed bytes, its last line is taken from the same bytes instead of reading the file again
+        self.parsed_end = start + len(parsed_bytes)
+        self.tail = parsed_bytes[-self.TAIL_SIZE:]
+
+    def store_items(self, columns):
+        # The last line starts after the last line break that is not part of the line ending itself
+        last_line = self.tail[self.tail.rstrip(b"\r\n").rfind(b"\n") + 1:]
+
+        store_work_item_columns(self.items_file_path, columns)
+
+        checkpoint = {
+            "offset": self.parsed_end,
+            "header_hash": self.get_hash(self.header_line),
+            "last_line_length": len(last_line),
+            "last_line_hash": self.get_hash(last_line),
+        }
+
+        with open(self.checkpoint_file_path, 'w') as file:
+            json.dump(checkpoint, file)
+
+    def get_hash(self, content):
+        return hashlib.sha256(content).hexdigest()
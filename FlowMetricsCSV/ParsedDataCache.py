@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Part of the keys, so entries that were stored in an older format are parsed again instead of loaded
+STORAGE_FORMAT = 2
+
+class ParsedDataCache:
+    def __init__(self, cache_folder, max_size_in_mb):
+        self.cache_folder = cache_folder
+        self.max_size_in_bytes = max_size_in_mb * 1024 * 1024
+
+        if not os.path.exists(cache_folder):
+            os.makedirs(cache_folder)
+
+    def load(self, cache_file_path):
+        if not os.path.isfile(cache_file_path):
+            print("No parsed data in cache at {0}".format(cache_file_path))
+            return None
+
+        print("Loading parsed data from cache at {0}".format(cache_file_path))
+
+        columns = load_work_item_columns(cache_file_path)
+
+        # Mark the entry as recently used for the eviction
+        os.utime(cache_file_path)
+
+        return columns
+
+    def store(self, cache_file_path, columns):
+        store_work_item_columns(cache_file_path, columns)
+        
+        print("Stored parsed data in cache at {0}".format(cache_file_path))
+
+        self.evict_least_recently_used_entries()
+
+    def get_cache_file_path(self, file_path, parse_settings, content):
+        # Any change to the file or to how it is parsed results in a different entry. The content is the one that is
+        # parsed on a miss, so the entry is stored under the key of the data it contains, and the file is read only once.
+        file_stats = os.stat(file_path)
+        fingerprint = [STORAGE_FORMAT, os.path.abspath(file_path), len(content), file_stats.st_mtime_ns, hashlib.sha256(content).hexdigest(), parse_settings]
+
+        key = hashlib.sha256(json.dumps(fingerprint).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_folder, "{0}.npz".format(key))
+
+    def evict_least_recently_used_entries(self):
+        entries = [os.path.join(self.cache_folder, file_name) for file_name in os.listdir(self.cache_folder) if file_name.endswith(".npz")]
+        entries.sort(key=os.path.getmtime)
+
+        total_size = sum(os.path.getsize(entry) for entry in entries)
+
+        # Always keep the most recent entry, even if it is bigger than the limit on its own
+        while total_size > self.max_size_in_bytes and len(entries) > 1:
+            entry = entries.pop(0)
+            total_size -= os.path.getsize(entry)
+
+            print("Removing {0} from cache to stay below {1} MB".format(entry, self.max_size_in_bytes // (1024 * 1024)))
+            os.remove(entry)
+
+def store_work_item_columns(file_path, columns):
+    (started_dates, closed_dates, estimations, item_titles, groups) = columns
+
+    arrays = {"started_dates": started_dates.astype('datetime64[us]'), "closed_dates": closed_dates.astype('datetime64[us]'), "estimations": estimations}
+    add_text_column(arrays, "item_titles", item_titles)
+
+    if groups is not None:
+        add_text_column(arrays, "groups", groups)
+
+    # Write to a temporary file first, so a run that is aborted can't leave a broken file behind
+    temporary_file_path = file_path + ".tmp"
+    with open(temporary_file_path, 'wb') as file:
+        np.savez(file, **arrays)
+
+    os.replace(temporary_file_path, file_path)
+
+def load_work_item_columns(file_path):
+    with np.load(file_path, allow_pickle=False) as stored_data:
+        groups = load_text_column(stored_data, "groups") if "groups_text" in stored_data else None
+        return (stored_data["started_dates"], stored_data["closed_dates"], stored_data["estimations"], load_text_column(stored_data, "item_titles"), groups)
+
+def add_text_column(arrays, name, texts):
+    # A fixed-width string array pads every text to the longest one, so the texts are stored as one utf-8 buffer
+    # and the offset of each text in it. The offsets count characters, so loading only decodes the buffer once.
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+
+    arrays[name + "_text"] = np.frombuffer("".join(texts).encode('utf-8'), dtype=np.uint8)
+    arrays[name + "_offsets"] = np.concatenate(([0], np.cumsum(lengths)))
+
+def load_text_column(stored_data, name):
+    text = stored_data[name + "_text"].tobytes().decode('utf-8')
+    offsets = stored_data[name + "_offsets"].tolist()
+
+    texts = np.empty(len(offsets) - 1, dtype=object)
+    texts[:] = [text[start:end] for (start, end) in zip(offsets[:-1], offsets[1:])]
+
+    return texts
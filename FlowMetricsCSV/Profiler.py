@@ -0,0 +1,127 @@
+import json
+import os
+import time
+import tracemalloc
+
+class Profiler:
+    # Records wall time, cpu time and peak memory of named stages. Until it is enabled, stage() returns
+    # the same empty stage every time, so instrumented code costs a function call per stage.
+
+    def __init__(self):
+        self.enabled = False
+        self.stages = []
+        self.open_stages = []
+        self.start_time = 0
+
+    def enable(self):
+        # Tracing the allocations makes the run a lot slower, so this is only done when profiling
+        self.enabled = True
+        self.start_time = time.perf_counter()
+        tracemalloc.start()
+
+    def stage(self, name, **arguments):
+        if not self.enabled:
+            return DISABLED_STAGE
+
+        return ProfiledStage(self, name, arguments)
+
+    def start_stage(self, stage):
+        # tracemalloc only has a single peak. The peak so far belongs to the enclosing stage, before it's reset for the new one.
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        if self.open_stages:
+            self.open_stages[-1].peak_memory = max(self.open_stages[-1].peak_memory, peak_memory)
+
+        tracemalloc.reset_peak()
+        self.open_stages.append(stage)
+
+    def end_stage(self, stage):
+        self.open_stages.pop()
+
+        stage.peak_memory = max(stage.peak_memory, tracemalloc.get_traced_memory()[1])
+        if self.open_stages:
+            self.open_stages[-1].peak_memory = max(self.open_stages[-1].peak_memory, stage.peak_memory)
+
+        self.stages.append({
+            "name": stage.name,
+            "depth": len(self.open_stages),
+            "start": stage.start_time - self.start_time,
+            "wall_time": stage.end_time - stage.start_time,
+            "cpu_time": stage.end_cpu_time - stage.start_cpu_time,
+            "peak_memory_mb": stage.peak_memory / (1024 * 1024),
+            "arguments": stage.arguments,
+        })
+
+    def get_trace(self):
+        # Stages are recorded when they end, the trace lists them in the order they started
+        return {"pid": os.getpid(), "stages": sorted(self.stages, key=lambda stage: (stage["start"], stage["depth"]))}
+
+    def write_trace(self, file_path):
+        print("Storing profile at {0}".format(file_path))
+
+        with open(file_path, 'w') as file:
+            json.dump(self.get_trace(), file, indent=2, default=str)
+
+    def write_chrome_trace(self, file_path):
+        # Complete events of the trace event format, they can be opened in chrome://tracing or https://ui.perfetto.dev
+        print("Storing chrome trace at {0}".format(file_path))
+
+        trace_events = []
+        for stage in self.get_trace()["stages"]:
+            trace_events.append({
+                "name": stage["name"],
+                "ph": "X",
+                "ts": stage["start"] * 1000000,
+                "dur": stage["wall_time"] * 1000000,
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": dict(stage["arguments"], cpu_time=stage["cpu_time"], peak_memory_mb=stage["peak_memory_mb"]),
+            })
+
+        with open(file_path, 'w') as file:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, file, default=str)
+
+    def print_summary(self):
+        print("================================================================")
+        print("Profile: Wall Time, CPU Time and Peak Memory per Stage")
+        print("----------------------------------------------------------------")
+
+        for stage in self.get_trace()["stages"]:
+            arguments = ", ".join("{0}={1}".format(name, value) for (name, value) in stage["arguments"].items())
+            print("{0}{1}: {2:.3f}s wall, {3:.3f}s cpu, {4:.1f} MB peak {5}".format("    " * stage["depth"], stage["name"], stage["wall_time"], stage["cpu_time"], stage["peak_memory_mb"], arguments).rstrip())
+
+class ProfiledStage:
+    def __init__(self, profiler, name, arguments):
+        self.profiler = profiler
+        self.name = name
+        self.arguments = arguments
+        self.peak_memory = 0
+
+    def set(self, **arguments):
+        # Adds values like the number of items that are only known once the stage ran
+        self.arguments.update(arguments)
+
+    def __enter__(self):
+        self.profiler.start_stage(self)
+        self.start_time = time.perf_counter()
+        self.start_cpu_time = time.process_time()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.end_time = time.perf_counter()
+        self.end_cpu_time = time.process_time()
+        self.profiler.end_stage(self)
+
+class DisabledStage:
+    def set(self, **arguments):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        pass
+
+DISABLED_STAGE = DisabledStage()
+
+# The profiler of this process, enabled by main with --profile
+profiler = Profiler()
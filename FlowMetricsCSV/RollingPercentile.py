@@ -0,0 +1,41 @@
+from bisect import bisect_left, insort
+from math import floor
+
+import numpy as np
+
+def rolling_percentile(values, window_size, percentile):
+    # Returns the percentile of every window of window_size consecutive values, the first window_size - 1 values are NaN.
+    # The result is the same as np.percentile with the default (linear) method applied to each window, but the window
+    # is kept sorted: each step removes the oldest value and inserts the new one instead of sorting the whole window.
+    values = np.asarray(values, dtype=np.float64)
+    rolling_values = np.full(len(values), np.nan)
+
+    if window_size < 1 or len(values) < window_size:
+        return rolling_values
+
+    # The position of the percentile is the same for every window
+    virtual_index = (window_size - 1) * (percentile / 100)
+    previous_index = floor(virtual_index)
+    next_index = min(previous_index + 1, window_size - 1)
+    gamma = virtual_index - previous_index
+
+    value_list = values.tolist()
+    window = sorted(value_list[:window_size])
+    rolling_values[window_size - 1] = interpolate(window[previous_index], window[next_index], gamma)
+
+    for index in range(window_size, len(value_list)):
+        del window[bisect_left(window, value_list[index - window_size])]
+        insort(window, value_list[index])
+
+        rolling_values[index] = interpolate(window[previous_index], window[next_index], gamma)
+
+    return rolling_values
+
+def interpolate(lower_value, upper_value, gamma):
+    # Same order of operations as numpy uses, so the results are identical to np.percentile
+    difference = upper_value - lower_value
+
+    if gamma >= 0.5:
+        return upper_value - difference * (1 - gamma)
+
+    return lower_value + difference * gamma
@@ -0,0 +1,72 @@
+from datetime import date
+
+from .Profiler import profiler
+
+# numpy and matplotlib are imported by the methods that need them, so reading a config doesn't load them
+
+class ScatterDensity:
+    # Above the threshold the points are counted into a grid of cells and drawn as one colored image instead of one marker each.
+    # The image takes the same time to draw no matter how many items there are.
+    MAX_BINS = (300, 150)
+
+    def __init__(self, threshold = 10000):
+        self.threshold = threshold
+
+    def is_dense(self, points):
+        return self.threshold is not None and points > self.threshold
+
+    def add_points(self, axes, x_values, y_values, **scatter_properties):
+        # Returns whether the density was drawn instead of the single points
+        if not self.is_dense(len(y_values)):
+            axes.scatter(x_values, y_values, **scatter_properties)
+            return False
+
+        with profiler.stage("draw density", points=len(y_values)):
+            self.add_density(axes, x_values, y_values, scatter_properties.get("label"))
+
+        return True
+
+    def add_density(self, axes, x_values, y_values, label = None):
+        from matplotlib.colors import LogNorm
+        import numpy as np
+
+        print("Drawing the density of {0} Items instead of single points (more than {1})".format(len(y_values), self.threshold))
+
+        is_date_axis = len(x_values) > 0 and isinstance(x_values[0], date)
+        if is_date_axis:
+            # Matplotlib counts dates in days since 1970. Reading the ordinals is much faster than converting the dates with numpy.
+            x_values = np.fromiter(map(date.toordinal, x_values), dtype=np.int64, count=len(x_values)) - date(1970, 1, 1).toordinal()
+
+        x_values = np.asarray(x_values, dtype=np.float64)
+        y_values = np.asarray(y_values, dtype=np.float64)
+
+        x_edges = get_bin_edges(x_values, self.MAX_BINS[0])
+        y_edges = get_bin_edges(y_values, self.MAX_BINS[1])
+        (counts, _, _) = np.histogram2d(x_values, y_values, bins=(x_edges, y_edges))
+
+        # Empty cells stay white, the counts are colored logarithmically so single items remain visible next to crowded cells.
+        # The cells have the same size, so they are drawn as one image. Unlike a mesh the legend doesn't check every cell for a free spot.
+        counts = np.ma.masked_equal(counts.T, 0)
+        extent = (x_edges[0], x_edges[-1], y_edges[0], y_edges[-1])
+        image = axes.imshow(counts, extent=extent, origin='lower', aspect='auto', interpolation='nearest', cmap='Blues', norm=LogNorm(vmin=1, vmax=max(counts.max(), 2)))
+
+        if is_date_axis:
+            axes.xaxis_date()
+
+        if label is not None:
+            # An empty marker in the color of the density keeps the entry of the points in the legend
+            axes.scatter([], [], marker='s', color=image.cmap(0.8), label=label)
+
+        # The colorbar is part of the axes, it's removed with everything else once the chart is stored
+        colorbar_axes = axes.inset_axes([1.01, 0, 0.015, 1])
+        axes.figure.colorbar(image, cax=colorbar_axes, label="Items")
+
+def get_bin_edges(values, max_bins):
+    # Cells of whole days as long as there are not more than max_bins of them
+    import numpy as np
+
+    lowest = np.floor(values.min())
+    highest = np.floor(values.max()) + 1
+    bins = int(min(highest - lowest, max_bins))
+
+    return np.linspace(lowest, highest, bins + 1)
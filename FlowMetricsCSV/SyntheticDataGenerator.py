@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import numpy as np
+
+from .WorkItemTable import WorkItemTable
+
+class SyntheticDataGenerator:
+    STORY_POINTS = [1, 2, 3, 5, 8, 13]
+
+    # Rows that are formatted and written at once when writing a csv file
+    WRITE_CHUNK_SIZE = 1000000
+
+    def __init__(self, seed = 42, wip = 20, open_item_ratio = 0.05, cycle_time_median = 5, cycle_time_sigma = 0.8):
+        # Cycle times follow a lognormal distribution: most items are done within a few days, some take a lot longer.
+        # The items are started evenly over time, often enough that on average wip items are in process (Little's Law).
+        # On top of the items that are still in process today, open_item_ratio of the items are never closed.
+        self.seed = seed
+        self.wip = wip
+        self.open_item_ratio = open_item_ratio
+        self.cycle_time_median = cycle_time_median
+        self.cycle_time_sigma = cycle_time_sigma
+
+    def get_mean_cycle_time(self):
+        return self.cycle_time_median * np.exp(self.cycle_time_sigma ** 2 / 2)
+
+    def get_history_in_days(self, item_count):
+        # Days over which the items are started
+        return max(1, int(np.ceil(item_count * self.get_mean_cycle_time() / self.wip)))
+
+    def generate_datetimes(self, item_count, today = None):
+        # The same seed, parameters and today always result in the same items
+        if today is None:
+            today = datetime.today()
+
+        random = np.random.default_rng(self.seed)
+        today = np.datetime64(today, 's')
+        seconds_per_day = 24 * 60 * 60
+
+        started_seconds = random.integers(0, self.get_history_in_days(item_count) * seconds_per_day, item_count)
+        started_datetimes = today - started_seconds.astype('timedelta64[s]')
+
+        cycle_time_seconds = random.lognormal(np.log(self.cycle_time_median), self.cycle_time_sigma, item_count) * seconds_per_day
+        closed_datetimes = started_datetimes + cycle_time_seconds.astype(np.int64).astype('timedelta64[s]')
+
+        # Items that would be closed after today are still in process
+        open_items = (closed_datetimes > today) | (random.random(item_count) < self.open_item_ratio)
+        closed_datetimes[open_items] = np.datetime64("NaT")
+
+        estimations = random.choice(self.STORY_POINTS, item_count).astype(np.float64)
+        item_titles = np.arange(item_count)
+
+        return (started_datetimes, closed_datetimes, estimations, item_titles)
+
+    def generate_work_item_table(self, item_count, today = None):
+        if today is None:
+            today = datetime.today()
+
+        (started_datetimes, closed_datetimes, estimations, item_titles) = self.generate_datetimes(item_count, today)
+        return WorkItemTable.from_datetimes(started_datetimes, closed_datetimes, estimations, item_titles.astype(str).astype(object), today)
+
+    def write_csv(self, file_path, item_count, delimiter, started_date_column_name, closed_date_column_name, start_date_format, closed_date_format, estimation_column_name, item_title_column, today = None):
+        import pandas as pd
+
+        (started_datetimes, closed_datetimes, estimations, item_titles) = self.generate_datetimes(item_count, today)
+
+        # The dates are formatted chunk by chunk, so writing millions of items doesn't need all the strings at once
+        for start in range(0, max(item_count, 1), self.WRITE_CHUNK_SIZE):
+            end = start + self.WRITE_CHUNK_SIZE
+
+            data = pd.DataFrame({
+                started_date_column_name: pd.Series(started_datetimes[start:end]).dt.strftime(start_date_format),
+                closed_date_column_name: pd.Series(closed_datetimes[start:end]).dt.strftime(closed_date_format),
+                estimation_column_name: estimations[start:end].astype(np.int64),
+                item_title_column: item_titles[start:end],
+            })
+
+            data.to_csv(file_path, sep=delimiter, index=False, header=start == 0, mode='w' if start == 0 else 'a')
@@ -0,0 +1,71 @@
+import numpy as np
+
+from .WorkItemTable import EPOCH_ORDINAL, ordinals_to_dates
+
+class TimeBuckets:
+    UNITS = ['days', 'weeks', 'months', 'quarters']
+
+    def __init__(self, unit = 'days'):
+        # Buckets are numbered continuously across years, so the same week or month of different years never share a bucket
+        if unit not in self.UNITS:
+            raise ValueError(f"The unit should be one of {self.UNITS}.")
+
+        self.unit = unit
+
+    def get_bucket_ids(self, ordinals):
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+
+        if self.unit == 'days':
+            return ordinals
+
+        if self.unit == 'weeks':
+            # Day ordinal 1 (1st of January of year 1) is a Monday, so this counts ISO weeks that start on Monday
+            return (ordinals - 1) // 7
+
+        months = (ordinals - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+        if self.unit == 'months':
+            return months
+
+        return months // 3
+
+    def get_bucket_starts(self, bucket_ids):
+        # Day ordinal of the first day of each bucket
+        bucket_ids = np.asarray(bucket_ids, dtype=np.int64)
+
+        if self.unit == 'days':
+            return bucket_ids
+
+        if self.unit == 'weeks':
+            return bucket_ids * 7 + 1
+
+        months = bucket_ids if self.unit == 'months' else bucket_ids * 3
+        return months.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64) + EPOCH_ORDINAL
+
+    def count(self, ordinals, first_day, last_day):
+        # Counts the days that fall into each bucket from the one of first_day to the one of last_day, empty buckets included.
+        # Returns the ids of the buckets and their counts.
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        ordinals = ordinals[(ordinals >= first_day) & (ordinals <= last_day)]
+
+        # Counting the days first means the buckets only need to be calculated once per day instead of once per item
+        day_counts = np.bincount(ordinals - first_day, minlength=last_day - first_day + 1)
+        day_buckets = self.get_bucket_ids(np.arange(first_day, last_day + 1))
+
+        (bucket_ids, bucket_starts) = np.unique(day_buckets, return_index=True)
+        return (bucket_ids, np.add.reduceat(day_counts, bucket_starts))
+
+    def get_labels(self, bucket_ids):
+        # Dates for days, and texts like 2024-W05, 2024-02 or 2024-Q1 for the other units
+        bucket_starts = ordinals_to_dates(self.get_bucket_starts(bucket_ids))
+
+        if self.unit == 'days':
+            return bucket_starts
+
+        if self.unit == 'weeks':
+            return ["{0}-W{1:02d}".format(*bucket_start.isocalendar()[:2]) for bucket_start in bucket_starts]
+
+        if self.unit == 'months':
+            return [bucket_start.strftime("%Y-%m") for bucket_start in bucket_starts]
+
+        return ["{0}-Q{1}".format(bucket_start.year, (bucket_start.month - 1) // 3 + 1) for bucket_start in bucket_starts]
@@ -0,0 +1,175 @@
+from datetime import date, datetime
+
+import numpy as np
+
+# Day ordinal for a missing started or closed date. It is bigger than any real date, so an item without
+# a started date is never started and an item without a closed date is never closed.
+MISSING_DATE = np.iinfo(np.int64).max
+
+# Ordinal of the numpy datetime64 epoch, used to convert between day ordinals and datetime64[D]
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+class WorkItemTable:
+    def __init__(self, started_dates, closed_dates, cycle_times, work_item_ages, estimations, item_titles, groups = None, started_times = None, closed_times = None):
+        # Dates are stored as day ordinals (see date.toordinal), missing values as MISSING_DATE
+        self.started_dates = np.ascontiguousarray(started_dates, dtype=np.int64)
+        self.closed_dates = np.ascontiguousarray(closed_dates, dtype=np.int64)
+
+        # Time of day of the dates in microseconds, 0 for missing dates and for dates without a time
+        self.started_times = np.zeros(len(self.started_dates), dtype=np.int64) if started_times is None else np.ascontiguousarray(started_times, dtype=np.int64)
+        self.closed_times = np.zeros(len(self.closed_dates), dtype=np.int64) if closed_times is None else np.ascontiguousarray(closed_times, dtype=np.int64)
+
+        # Missing cycle times, ages and estimations are stored as NaN
+        self.cycle_times = np.ascontiguousarray(cycle_times, dtype=np.float64)
+        self.work_item_ages = np.ascontiguousarray(work_item_ages, dtype=np.float64)
+        self.estimations = np.ascontiguousarray(estimations, dtype=np.float64)
+
+        self.item_titles = np.asarray(item_titles, dtype=object)
+
+        # Value of the groupByColumn for each item, None if the items are not grouped
+        self.groups = None if groups is None else np.asarray(groups, dtype=object)
+
+    @classmethod
+    def from_work_items(cls, work_items):
+        count = len(work_items)
+
+        started_dates = np.fromiter((item.started_date.toordinal() if item.started_date else MISSING_DATE for item in work_items), np.int64, count)
+        closed_dates = np.fromiter((item.closed_date.toordinal() if item.closed_date else MISSING_DATE for item in work_items), np.int64, count)
+        cycle_times = np.fromiter((np.nan if item.cycle_time is None else item.cycle_time for item in work_items), np.float64, count)
+        work_item_ages = np.fromiter((np.nan if item.work_item_age is None else item.work_item_age for item in work_items), np.float64, count)
+        estimations = np.fromiter((np.nan if item.estimation is None else item.estimation for item in work_items), np.float64, count)
+
+        started_times = np.fromiter((get_time_of_day(item.started_date) if item.started_date else 0 for item in work_items), np.int64, count)
+        closed_times = np.fromiter((get_time_of_day(item.closed_date) if item.closed_date else 0 for item in work_items), np.int64, count)
+
+        item_titles = np.empty(count, dtype=object)
+        item_titles[:] = [item.item_title for item in work_items]
+
+        return cls(started_dates, closed_dates, cycle_times, work_item_ages, estimations, item_titles, started_times=started_times, closed_times=closed_times)
+
+    @classmethod
+    def from_datetimes(cls, started_datetimes, closed_datetimes, estimations, item_titles, now = None, groups = None):
+        # Started and closed dates are datetime64 arrays where missing dates are NaT
+        started_datetimes = np.asarray(started_datetimes, dtype='datetime64[us]')
+        closed_datetimes = np.asarray(closed_datetimes, dtype='datetime64[us]')
+        now = np.datetime64(now or datetime.today(), 'us')
+
+        has_started_date = ~np.isnat(started_datetimes)
+        has_closed_date = ~np.isnat(closed_datetimes)
+
+        started_days = started_datetimes.astype('datetime64[D]')
+        closed_days = closed_datetimes.astype('datetime64[D]')
+
+        started_dates = np.where(has_started_date, started_days.astype(np.int64) + EPOCH_ORDINAL, MISSING_DATE)
+        closed_dates = np.where(has_closed_date, closed_days.astype(np.int64) + EPOCH_ORDINAL, MISSING_DATE)
+
+        started_times = np.where(has_started_date, (started_datetimes - started_days).astype(np.int64), 0)
+        closed_times = np.where(has_closed_date, (closed_datetimes - closed_days).astype(np.int64), 0)
+
+        # Same as WorkItem: whole days (rounded down like timedelta.days) plus one
+        one_day = np.timedelta64(1, 'D')
+        closed_items = has_started_date & has_closed_date
+        open_items = has_started_date & ~has_closed_date
+
+        cycle_times = np.full(len(started_dates), np.nan)
+        cycle_times[closed_items] = (closed_datetimes[closed_items] - started_datetimes[closed_items]) // one_day + 1
+
+        work_item_ages = np.full(len(started_dates), np.nan)
+        work_item_ages[open_items] = (now - started_datetimes[open_items]) // one_day + 1
+
+        return cls(started_dates, closed_dates, cycle_times, work_item_ages, estimations, item_titles, groups, started_times, closed_times)
+
+    @classmethod
+    def concatenate(cls, tables):
+        tables = list(tables)
+
+        groups = None
+        if tables and all(table.groups is not None for table in tables):
+            groups = np.concatenate([table.groups for table in tables])
+        
+        return cls(np.concatenate([table.started_dates for table in tables] or [[]]),
+                   np.concatenate([table.closed_dates for table in tables] or [[]]),
+                   np.concatenate([table.cycle_times for table in tables] or [[]]),
+                   np.concatenate([table.work_item_ages for table in tables] or [[]]),
+                   np.concatenate([table.estimations for table in tables] or [[]]),
+                   np.concatenate([table.item_titles for table in tables] or [np.empty(0, dtype=object)]),
+                   groups,
+                   np.concatenate([table.started_times for table in tables] or [[]]),
+                   np.concatenate([table.closed_times for table in tables] or [[]]))
+
+    def __len__(self):
+        return len(self.started_dates)
+
+    def select(self, mask):
+        # Accepts a boolean mask, an array of indices or a slice. The columns of a slice share the memory of this table.
+        groups = None if self.groups is None else self.groups[mask]
+        return WorkItemTable(self.started_dates[mask], self.closed_dates[mask], self.cycle_times[mask], self.work_item_ages[mask], self.estimations[mask], self.item_titles[mask], groups, self.started_times[mask], self.closed_times[mask])
+
+    def sort_by_group(self):
+        # Sorts the items by group once, so each group is a range of the sorted table instead of a filtered copy.
+        # Returns the sorted table and the name, start and end of each group.
+        (group_names, group_indexes) = np.unique(self.groups, return_inverse=True)
+        group_sizes = np.bincount(group_indexes, minlength=len(group_names))
+        group_ends = np.cumsum(group_sizes)
+        group_starts = group_ends - group_sizes
+
+        sorted_items = self.select(np.argsort(group_indexes, kind='stable'))
+
+        return (sorted_items, list(zip(group_names.tolist(), group_starts.tolist(), group_ends.tolist())))
+
+    def has_started_date(self):
+        return self.started_dates != MISSING_DATE
+
+    def has_closed_date(self):
+        return self.closed_dates != MISSING_DATE
+
+    def with_work_item_ages(self, now):
+        # Same items with the ages they have at now, all other columns are shared with this table
+        one_day = 24 * 60 * 60 * 1000000
+        open_items = self.has_started_date() & ~self.has_closed_date()
+        started_moments = self.started_dates[open_items] * one_day + self.started_times[open_items]
+
+        work_item_ages = np.full(len(self), np.nan)
+        work_item_ages[open_items] = (now.toordinal() * one_day + get_time_of_day(now) - started_moments) // one_day + 1
+
+        return WorkItemTable(self.started_dates, self.closed_dates, self.cycle_times, work_item_ages, self.estimations, self.item_titles, self.groups, self.started_times, self.closed_times)
+
+    def get_time_of_day_position(self, moment):
+        # Number of started and closed times of the items before and up to the time of day of moment. Moments on the same
+        # day with the same position compare the same to all items including their time of day, so their charts and ages match.
+        time_of_day = get_time_of_day(moment)
+        times_before = np.count_nonzero(self.started_times < time_of_day) + np.count_nonzero(self.closed_times < time_of_day)
+        times_up_to = np.count_nonzero(self.started_times <= time_of_day) + np.count_nonzero(self.closed_times <= time_of_day)
+
+        return (int(times_before), int(times_up_to))
+
+    def get_effective_closed_dates(self):
+        # An item closed before it was started is never in process, so it counts as closed when it was started
+        is_closed_before_started = (self.closed_dates < self.started_dates) | ((self.closed_dates == self.started_dates) & (self.closed_times < self.started_times))
+
+        return (np.where(is_closed_before_started, self.started_dates, self.closed_dates), np.where(is_closed_before_started, self.started_times, self.closed_times))
+
+def get_time_of_day(moment):
+    # Microseconds since midnight, 0 for a date without a time
+    if not isinstance(moment, datetime):
+        return 0
+
+    return ((moment.hour * 60 + moment.minute) * 60 + moment.second) * 1000000 + moment.microsecond
+
+def shift_to_day_time(ordinals, times, day_time):
+    # Day on which a date is reached by days that all have the time of day day_time: a date at a later time of day
+    # is only reached the next day. Missing dates have the time 0 and are never shifted.
+    return np.where(times > day_time, ordinals + 1, ordinals)
+
+def is_on_or_after(ordinals, times, moment):
+    day = moment.toordinal()
+    return (ordinals > day) | ((ordinals == day) & (times >= get_time_of_day(moment)))
+
+def is_on_or_before(ordinals, times, moment):
+    # Missing dates are bigger than any real date and hence never on or before a moment
+    day = moment.toordinal()
+    return (ordinals < day) | ((ordinals == day) & (times <= get_time_of_day(moment)))
+
+def ordinals_to_dates(ordinals):
+    # Converts day ordinals to a list of datetime.date objects
+    return (np.asarray(ordinals, dtype=np.int64) - EPOCH_ORDINAL).astype('datetime64[D]').tolist()
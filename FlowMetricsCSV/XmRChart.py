@@ -0,0 +1,110 @@
+import numpy as np
+
+class XmRChart:
+    # The natural process limits are this many average moving ranges away from the average
+    LIMIT_FACTOR = 2.66
+
+    # Run rules: values on the same side of the average in a row, and values closer to a limit than to the average within a few values
+    RUN_LENGTH = 8
+    ZONE_HITS = 3
+    ZONE_WINDOW = 4
+
+    def __init__(self, average, unpl, lnpl):
+        # Numbers for a fixed baseline, or arrays with the limits of each value for a rolling baseline
+        self.average = average
+        self.unpl = unpl
+        self.lnpl = lnpl
+
+    @classmethod
+    def from_baseline(cls, baseline_values):
+        baseline_values = np.asarray(baseline_values, dtype=np.float64)
+
+        # Like a window of a rolling baseline, a baseline with less than two values has no limits (NaN) and no signals
+        if len(baseline_values) < 2:
+            return cls(np.nan, np.nan, np.nan)
+
+        average = get_average(baseline_values)
+        average_moving_range = get_average(get_moving_ranges(baseline_values))
+
+        return cls(average, *get_natural_process_limits(average, average_moving_range))
+
+    @classmethod
+    def from_rolling_baseline(cls, values, window_starts, window_ends):
+        # The limits of each value are calculated from the values between its window start and end (exclusive).
+        # With the cumulative sums every window takes the same time, no matter how long it is.
+        values = np.asarray(values, dtype=np.float64)
+        window_starts = np.asarray(window_starts, dtype=np.int64)
+        window_ends = np.asarray(window_ends, dtype=np.int64)
+
+        value_sums = np.concatenate(([0], np.cumsum(values)))
+
+        # The moving range of a value is the difference to the one before, so a window has one less of them
+        moving_range_sums = np.concatenate(([0, 0], np.cumsum(np.abs(np.diff(values)))))
+        moving_range_starts = np.minimum(window_starts + 1, window_ends)
+
+        # Windows with less than two values have no limits (NaN)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            average = (value_sums[window_ends] - value_sums[window_starts]) / (window_ends - window_starts)
+            average_moving_range = (moving_range_sums[window_ends] - moving_range_sums[moving_range_starts]) / (window_ends - moving_range_starts)
+
+        average[window_ends - window_starts < 2] = np.nan
+
+        return cls(average, *get_natural_process_limits(average, average_moving_range))
+
+    def get_signals(self, values):
+        # Marks the values that are part of a signal, for each run rule
+        values = np.asarray(values, dtype=np.float64)
+
+        # Values without limits (NaN) are never part of a signal
+        with np.errstate(invalid='ignore'):
+            above_average = values > self.average
+            below_average = values < self.average
+
+            # A lower limit of 0 only means there is no lower limit, values close to 0 are no signal then
+            upper_zone = values > self.average + (self.unpl - self.average) / 2
+            lower_zone = (values < self.average - (self.average - self.lnpl) / 2) & (self.lnpl > 0)
+
+            outside_limits = (values > self.unpl) | (values < self.lnpl)
+
+        return {
+            "outside_limits": outside_limits,
+            "run_of_eight": get_runs(above_average, self.RUN_LENGTH) | get_runs(below_average, self.RUN_LENGTH),
+            "three_of_four": get_window_hits(upper_zone, self.ZONE_HITS, self.ZONE_WINDOW) | get_window_hits(lower_zone, self.ZONE_HITS, self.ZONE_WINDOW),
+        }
+
+def get_average(values):
+    # An empty baseline has an average of 0
+    return float(np.mean(values)) if len(values) > 0 else 0
+
+def get_moving_ranges(values):
+    # Difference of each value to the one before
+    return np.abs(np.diff(values))
+
+def get_natural_process_limits(average, average_moving_range):
+    unpl = average + XmRChart.LIMIT_FACTOR * average_moving_range
+    lnpl = average - XmRChart.LIMIT_FACTOR * average_moving_range
+
+    # None of the flow metrics can be negative
+    return (unpl, np.maximum(lnpl, 0))
+
+def get_runs(mask, run_length):
+    # Marks the values that are part of at least run_length marked values in a row
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], mask, [False])).astype(np.int8)))
+    (run_starts, run_ends) = (edges[::2], edges[1::2])
+    long_runs = run_ends - run_starts >= run_length
+
+    run_changes = np.zeros(len(mask) + 1, dtype=np.int64)
+    run_changes[run_starts[long_runs]] += 1
+    run_changes[run_ends[long_runs]] -= 1
+
+    return np.cumsum(run_changes[:-1]) > 0
+
+def get_window_hits(mask, hits, window):
+    # Marks the values that are marked and part of window values in a row that have at least hits marked values
+    if len(mask) < window:
+        return np.zeros(len(mask), dtype=bool)
+
+    signal_windows = np.convolve(mask, np.ones(window, dtype=np.int64), 'valid') >= hits
+    in_signal_window = np.convolve(signal_windows, np.ones(window, dtype=np.int64), 'full') > 0
+
+    return mask & in_signal_window
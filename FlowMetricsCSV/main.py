@@ -1,12 +1,19 @@
 import argparse
 import os
+import re
 import shutil
-from datetime import datetime
+from datetime import datetime, timedelta
+from importlib.metadata import version
 
 import json
 
-from .CsvService import CsvService
-from .FlowMetricsService import FlowMetricsService
+# Only light modules are imported here, so --help and errors in the configs don't wait for pandas and matplotlib.
+# The modules that need them are imported once the items are parsed or the charts are created.
+from .BatchScheduler import BatchScheduler
+from .LabelPlacement import LabelPlacement
+from .LineDownsampling import LineDownsampling
+from .Profiler import profiler
+from .ScatterDensity import ScatterDensity
 
 def print_logo():
     logo = r"""
@@ -64,6 +71,18 @@ def main():
         
         parser = argparse.ArgumentParser()
         parser.add_argument("--ConfigFileNames", type=str, nargs='+', default=[])
+        parser.add_argument("--no-cache", action='store_true', help="Always parse the csv files instead of using the parsed data from the cache")
+        parser.add_argument("--force", action='store_true', help="Create all charts, also the ones that are up to date in the charts folder")
+        parser.add_argument("--workers", type=int, default=1, help="Number of processes that render the charts of a configuration in parallel")
+        parser.add_argument("--config-workers", type=int, default=1, help="Number of processes that create the charts of different configurations in parallel")
+        parser.add_argument("--metrics-only", action='store_true', help="Store the data of the charts in the charts folder instead of drawing them")
+        parser.add_argument("--metrics-format", type=str, default="json", choices=["json", "csv"], help="File format of the data stored with --metrics-only")
+        parser.add_argument("--profile", action='store_true', help="Measure wall time, cpu time and peak memory of each stage and chart and store them as JSON")
+        parser.add_argument("--profile-output", type=str, default="flowmetricscsv_profile.json", help="File the profile is stored in")
+        parser.add_argument("--chrome-trace", type=str, default=None, help="Additionally store the profile in the Chrome trace event format in this file")
+        parser.add_argument("--watch", action='store_true', help="Keep running and create the charts again whose data or settings changed when a config or csv file changes")
+        parser.add_argument("--watch-interval", type=float, default=1, help="Seconds between checking the files for changes")
+        parser.add_argument("--watch-debounce", type=float, default=0.5, help="Seconds a changed file has to stay the same before the charts are created")
 
         args = parser.parse_args()
         
@@ -78,147 +97,403 @@ def main():
         
         print("Using following configuration files: {0}".format(config_paths))
 
-        for config_path in config_paths:
+        if args.profile:
+            # Stages that run in other processes can't be measured, so everything runs in this one
+            if args.workers > 1 or args.config_workers > 1:
+                print("Profiling creates all charts in this process, --workers and --config-workers are ignored")
+                args.workers = 1
+                args.config_workers = 1
+
+            profiler.enable()
+
+        def read_batch_job(config_path):
             print("================================================================")
-            config = read_config(config_path)
-
-            file_name = config["general"]["fileName"]
-            delimiter = config["general"].get("delimiter", config["general"].get("delimeter"))
-            started_date_column = config["general"]["startedDateColumn"]
-            closed_date_column = config["general"]["closedDateColumn"]
-            start_date_format = config["general"]["startDateFormat"]
-            closed_date_format = config["general"]["closedDateFormat"]
-            estimation_column = config["general"]["estimationColumn"]
-            item_title_column = config["general"]["itemTitleColumn"]
-            show_plots = config["general"]["showPlots"]
-            charts_folder = config["general"]["chartsFolder"]
-            
-            today = datetime.today()
-            
-            try:
-                today_argument = config["general"]["today"]
-                
-                if today_argument:
-                    today = datetime.strptime(today_argument, "%Y-%m-%d")
-            except:
-                print("No overwrite for today")
-            
-            if not closed_date_format:
-                closed_date_format = start_date_format
-            
-            csv_service = CsvService()
-            flow_metrics_service = FlowMetricsService(show_plots, charts_folder, today)
-            
-            print("Using following CSV file: {0}".format(file_name))
-            file_exists = check_if_file_exists(file_name, not using_example_config)                
+
+            with profiler.stage("read config", config=config_path):
+                return read_settings(config_path, args, using_example_config)
+
+        with profiler.stage("flowmetricscsv", configs=len(config_paths)):
+            if args.watch:
+                from .ChartWatcher import ChartWatcher
+
+                ChartWatcher(config_paths, read_batch_job, load_work_items, get_chart_jobs, get_earliest_chart_date, create_charts, args.watch_interval, args.watch_debounce).watch()
+            else:
+                BatchScheduler(args.config_workers).run(config_paths, read_batch_job, load_work_items, create_charts)
+
+        if args.profile:
+            profiler.print_summary()
+            profiler.write_trace(args.profile_output)
+
+            if args.chrome_trace:
+                profiler.write_chrome_trace(args.chrome_trace)
+
+        print()
+        
+        print("================================================================")
+        print("MonteCarloCSV is deprecated and will not receive any further updates.")
+        print("Please consider using FlowPulse which supports CSV files as well as Jira and Azure DevOps.")
+        print("You can find more details at https://letpeople.work#flowpulse")
+        print("================================================================")
             
-            if using_example_config and not file_exists:
-                csv_service.write_example_file(file_name, delimiter, started_date_column, closed_date_column, start_date_format, closed_date_format, estimation_column, item_title_column, today)
+    except Exception as exception:
+        print("Error while executing flowmetricscsv:")
+        print(exception)
+        
+        print("🪲 If the problem cannot be solved, consider opening an issue on GitHub: https://github.com/LetPeopleWork/FlowMetricsCSV/issues 🪲")
 
-            def get_items():    
-                work_items = csv_service.parse_items(file_name, delimiter, started_date_column, closed_date_column, start_date_format, closed_date_format, estimation_column, item_title_column)
-                return work_items
+def read_settings(config_path, args, using_example_config):
+    config = read_config(config_path)
 
-            print("Creating Charts as per the configuration...")
-            print("----------------------------------------------------------------")   
+    settings = {
+        "config_path": config_path,
+        "config": config,
+        "using_example_config": using_example_config,
+        "no_cache": args.no_cache,
+        "force": args.force,
+        # Charts of a configuration are only rendered in parallel if the configurations themselves are not
+        "workers": args.workers if args.config_workers <= 1 else 1,
+        "metrics_only": args.metrics_only,
+        "metrics_format": args.metrics_format,
+        "file_name": config["general"]["fileName"],
+        "delimiter": config["general"].get("delimiter", config["general"].get("delimeter")),
+        "started_date_column": config["general"]["startedDateColumn"],
+        "closed_date_column": config["general"]["closedDateColumn"],
+        "start_date_format": config["general"]["startDateFormat"],
+        "closed_date_format": config["general"]["closedDateFormat"],
+        "estimation_column": config["general"]["estimationColumn"],
+        "item_title_column": config["general"]["itemTitleColumn"],
+        "group_by_column": config["general"].get("groupByColumn"),
+        "show_plots": config["general"]["showPlots"],
+        "charts_folder": config["general"]["chartsFolder"],
+        "chunk_size": config["general"].get("chunkSize"),
+        # The cache is only used if the config sets a folder for it, so no files are written next to existing configs
+        "cache_folder": config["general"].get("cacheFolder"),
+        "cache_max_size": config["general"].get("cacheMaxSizeMB", 500),
+        "incremental_parsing": config["general"].get("incrementalParsing", False),
+    }
 
-            work_items = get_items()        
-            if len(work_items) < 1:
-                print("No items - skipping")
-                exit()
+    settings["today"] = get_today(config)
+    
+    if not settings["closed_date_format"]:
+        settings["closed_date_format"] = settings["start_date_format"]
 
-            def create_cycle_time_scatterplot():
-                chart_config = config["cycleTimeScatterPlot"]
-                
-                trend_settings = None
-                if "trend_settings" in chart_config:
-                    trend_settings = chart_config["trend_settings"]
+    settings["input_signature"] = get_input_signature(settings)
 
-                if chart_config["generate"]:
-                    history = parse_history(chart_config["history"])
-                    flow_metrics_service.plot_cycle_time_scatterplot(work_items, history, chart_config["percentiles"], chart_config["percentileColors"], chart_config["chartName"], trend_settings)
+    return settings
 
-            def create_work_item_age_scatterplot():
-                chart_config = config["workItemAgeScatterPlot"]
+def get_today(config):
+    today = datetime.today()
+    
+    try:
+        today_argument = config["general"]["today"]
+        
+        if today_argument:
+            today = datetime.strptime(today_argument, "%Y-%m-%d")
+    except:
+        print("No overwrite for today")
 
-                if chart_config["generate"]:
-                    history = parse_history(chart_config["history"])
-                    flow_metrics_service.plot_work_item_age_scatterplot(work_items, history, chart_config["xAxisLines"], chart_config["xAxisLineColors"], chart_config["chartName"])
+    return today
 
-            def create_throughput_run_chart():
-                chart_config = config["throughputRunChart"]
+def get_input_signature(settings):
+    # Configs with the same signature get the same parsed items
+    signature = [os.path.abspath(settings["file_name"]), settings["delimiter"], settings["started_date_column"], settings["closed_date_column"], settings["start_date_format"], settings["closed_date_format"], settings["estimation_column"], settings["item_title_column"], settings["group_by_column"], settings["cache_folder"], settings["cache_max_size"], settings["incremental_parsing"]]
 
-                if chart_config["generate"]:
-                    history = parse_history(chart_config["history"])
-                    flow_metrics_service.plot_throughput_run_chart(work_items, history, chart_config["chartName"], chart_config["unit"])            
+    # When streaming, only the items needed for the charts of the config are kept
+    if settings["chunk_size"]:
+        signature += [settings["chunk_size"], get_earliest_chart_date(settings["config"], settings["today"]), settings["today"]]
 
-            def create_work_in_process_run_chart():
-                chart_config = config["workInProcessRunChart"]
+    return tuple(signature)
 
-                if chart_config["generate"]:
-                    history = parse_history(chart_config["history"])
-                    flow_metrics_service.plot_work_in_process_run_chart(work_items, history, chart_config["chartName"])
+def load_work_items(settings):
+    from .CsvService import CsvService
+    from .ParsedDataCache import ParsedDataCache
 
-            def create_work_started_vs_finished_chart():
-                chart_config = config["startedVsFinishedChart"]
+    file_name = settings["file_name"]
+    delimiter = settings["delimiter"]
+    started_date_column = settings["started_date_column"]
+    closed_date_column = settings["closed_date_column"]
+    start_date_format = settings["start_date_format"]
+    closed_date_format = settings["closed_date_format"]
+    estimation_column = settings["estimation_column"]
+    item_title_column = settings["item_title_column"]
+    group_by_column = settings["group_by_column"]
+    cache_folder = settings["cache_folder"]
+    today = settings["today"]
 
-                if chart_config["generate"]:
-                    history = parse_history(chart_config["history"])
-                    flow_metrics_service.plot_work_started_vs_finished_chart(work_items, history, chart_config["startedColor"], chart_config["closedColor"], chart_config["chartName"])
+    csv_service = CsvService()
 
-            def create_estimation_vs_cycle_time_chart():
-                chart_config = config["estimationVsCycleTime"]
+    print("Using following CSV file: {0}".format(file_name))
+    file_exists = check_if_file_exists(file_name, not settings["using_example_config"])                
+    
+    if settings["using_example_config"] and not file_exists:
+        csv_service.write_example_file(file_name, delimiter, started_date_column, closed_date_column, start_date_format, closed_date_format, estimation_column, item_title_column, today)
 
-                if chart_config["generate"]:
-                    history = parse_history(chart_config["history"])
-                    flow_metrics_service.plot_estimation_vs_cycle_time_scatterplot(work_items, history, chart_config["chartName"], chart_config["estimationUnit"])
+    if settings["chunk_size"]:
+        from .FlowMetricsCalculator import FlowMetricsCalculator
 
-            def create_process_behaviour_charts():
-                chart_config = config["processBehaviourCharts"]
+        flow_metrics_calculator = FlowMetricsCalculator(today)
 
-                if chart_config["generate"]:
-                    history = parse_history(chart_config["history"])
-                    baseline_start = datetime.strptime(chart_config["baselineStart"], "%Y-%m-%d")
-                    baseline_end = datetime.strptime(chart_config["baselineEnd"], "%Y-%m-%d")
+        work_item_chunks = csv_service.parse_work_item_table_in_chunks(file_name, delimiter, started_date_column, closed_date_column, start_date_format, closed_date_format, estimation_column, item_title_column, settings["chunk_size"], group_by_column)
+        return flow_metrics_calculator.collect_work_items_in_history(work_item_chunks, get_earliest_chart_date(settings["config"], today))
 
-                    flow_metrics_service.plot_throughput_process_behaviour_chart(work_items, baseline_start, baseline_end, history, chart_config["throughputChartName"])            
-                    flow_metrics_service.plot_wip_process_behaviour_chart(work_items, baseline_start, baseline_end, history, chart_config["wipChartName"])
-                    flow_metrics_service.plot_cycle_time_process_behaviour_chart(work_items, baseline_start, baseline_end, history, chart_config["cycleTimeChartName"])       
-                    flow_metrics_service.plot_total_age_process_behaviour_chart(work_items, baseline_start, baseline_end, history, chart_config["itemAgeChartName"])                        
+    if settings["incremental_parsing"] and not settings["no_cache"]:
+        checkpoint_folder = os.path.join(cache_folder or ".flowmetricscsv_cache", "checkpoints")
+        return csv_service.parse_work_item_table_incrementally(file_name, delimiter, started_date_column, closed_date_column, start_date_format, closed_date_format, estimation_column, item_title_column, checkpoint_folder, group_by_column)
 
-            create_cycle_time_scatterplot()
-            create_work_item_age_scatterplot()
-            create_throughput_run_chart()
-            create_work_in_process_run_chart()
-            create_work_started_vs_finished_chart()
-            create_estimation_vs_cycle_time_chart()    
-            create_process_behaviour_charts()       
+    parsed_data_cache = None
+    if cache_folder and not settings["no_cache"]:
+        parsed_data_cache = ParsedDataCache(cache_folder, settings["cache_max_size"])
 
-            print()
-            
-            print("================================================================")
-            print("MonteCarloCSV is deprecated and will not receive any further updates.")
-            print("Please consider using FlowPulse which supports CSV files as well as Jira and Azure DevOps.")
-            print("You can find more details at https://letpeople.work#flowpulse")
-            print("================================================================")
-            
-    except Exception as exception:
-        print("Error while executing flowmetricscsv:")
-        print(exception)
-        
-        print("🪲 If the problem cannot be solved, consider opening an issue on GitHub: https://github.com/LetPeopleWork/FlowMetricsCSV/issues 🪲")
+    return csv_service.parse_work_item_table(file_name, delimiter, started_date_column, closed_date_column, start_date_format, closed_date_format, estimation_column, item_title_column, parsed_data_cache, group_by_column)
+
+def create_charts(settings, work_items, chart_jobs = None):
+    print("================================================================")
+    print("Creating Charts for {0}...".format(settings["config_path"]))
+    print("----------------------------------------------------------------")   
+
+    if len(work_items) < 1:
+        print("No items - skipping")
+        return 0
+
+    if chart_jobs is None:
+        chart_jobs = get_chart_jobs(settings["config"])
+
+    # Each partition is a charts folder, the start and end of its items in work_items and its chart jobs.
+    # Grouped items are sorted once, so every group is a range of the same arrays.
+    if settings["group_by_column"]:
+        (work_items, groups) = work_items.sort_by_group()
+        print("Creating Charts for {0} Groups of '{1}'".format(len(groups), settings["group_by_column"]))
+
+        folder_names = get_group_folder_names([group for (group, _, _) in groups])
+        partitions = [(os.path.join(settings["charts_folder"], folder_name), start, end, chart_jobs) for ((group, start, end), folder_name) in zip(groups, folder_names)]
+    else:
+        partitions = [(settings["charts_folder"], 0, len(work_items), chart_jobs)]
+
+    # Charts that are shown are always created
+    chart_output_caches = []
+    if not settings["metrics_only"] and not settings["show_plots"] and not settings["force"]:
+        from .ChartOutputCache import ChartOutputCache
+
+        for (index, (charts_folder, start, end, partition_chart_jobs)) in enumerate(partitions):
+            chart_output_cache = ChartOutputCache(charts_folder, settings["today"], get_earliest_chart_date(settings["config"], settings["today"]))
+            chart_output_caches.append(chart_output_cache)
+
+            partitions[index] = (charts_folder, start, end, chart_output_cache.get_outdated_chart_jobs(work_items.select(slice(start, end)), partition_chart_jobs))
+
+    if settings["metrics_only"]:
+        # Only the data of the charts is calculated, matplotlib is never imported
+        from .MetricsExporter import MetricsExporter
+
+        for (charts_folder, start, end, partition_chart_jobs) in partitions:
+            metrics_exporter = MetricsExporter(charts_folder, settings["metrics_format"], settings["today"])
+            partition_items = work_items.select(slice(start, end))
+
+            for (plot_function_name, arguments) in partition_chart_jobs:
+                with profiler.stage(plot_function_name, items=len(partition_items)):
+                    metrics_exporter.export(partition_items, plot_function_name, arguments)
+    elif settings["workers"] > 1 and not settings["show_plots"]:
+        from .ParallelChartRenderer import ParallelChartRenderer
+
+        ParallelChartRenderer(settings["workers"], settings["today"]).render_partitions(work_items, partitions)
+    else:
+        from .FlowMetricsService import FlowMetricsService
+
+        for (charts_folder, start, end, partition_chart_jobs) in partitions:
+            flow_metrics_service = FlowMetricsService(settings["show_plots"], charts_folder, settings["today"])
+            partition_items = work_items.select(slice(start, end))
+
+            for (plot_function_name, arguments) in partition_chart_jobs:
+                with profiler.stage(plot_function_name, items=len(partition_items)):
+                    getattr(flow_metrics_service, plot_function_name)(partition_items, *arguments)
 
-def parse_history(history):
+    for chart_output_cache in chart_output_caches:
+        chart_output_cache.store()
+
+    return sum(len(partition_chart_jobs) for (_, _, _, partition_chart_jobs) in partitions)
+
+def get_group_folder_name(group):
+    # Values like area paths contain characters that can't be part of a folder name
+    folder_name = re.sub(r'[^\w\-. ]', '_', group).strip(" .")
+    return folder_name or "Ungrouped"
+
+def get_group_folder_names(groups):
+    # Different groups can get the same folder name, like "Team/A" and "Team\A" or a group named "Ungrouped" and the items
+    # without a value. Later groups get a number instead of sharing a folder, also if the names only differ in case,
+    # as they are the same folder on Windows and macOS.
+    folder_names = []
+    used_folder_names = set()
+
+    for group in groups:
+        base_name = get_group_folder_name(group)
+        folder_name = base_name
+        number = 2
+
+        while folder_name.lower() in used_folder_names:
+            folder_name = "{0}_{1}".format(base_name, number)
+            number += 1
+
+        if folder_name != base_name:
+            print("Group '{0}' is stored in '{1}', as '{2}' is the folder of another Group".format(group, folder_name, base_name))
+
+        used_folder_names.add(folder_name.lower())
+        folder_names.append(folder_name)
+
+    return folder_names
+
+def get_chart_jobs(config):
+    # Each job is the name of the FlowMetricsService plot function and its arguments after the work items
+    chart_jobs = []
+
+    def add_chart_job(plot_function_name, *arguments):
+        chart_jobs.append((plot_function_name, arguments))
+
+    def create_cycle_time_scatterplot():
+        chart_config = config["cycleTimeScatterPlot"]
+
+        trend_settings = None
+        if "trend_settings" in chart_config:
+            trend_settings = chart_config["trend_settings"]
+
+        if chart_config["generate"]:
+            history = parse_history(chart_config["history"])
+            add_chart_job("plot_cycle_time_scatterplot", history, chart_config["percentiles"], chart_config["percentileColors"], chart_config["chartName"], trend_settings, get_label_placement(chart_config), get_scatter_density(chart_config))
+
+    def create_work_item_age_scatterplot():
+        chart_config = config["workItemAgeScatterPlot"]
+
+        if chart_config["generate"]:
+            history = parse_history(chart_config["history"])
+            add_chart_job("plot_work_item_age_scatterplot", history, chart_config["xAxisLines"], chart_config["xAxisLineColors"], chart_config["chartName"], get_label_placement(chart_config), get_scatter_density(chart_config))
+
+    def create_throughput_run_chart():
+        chart_config = config["throughputRunChart"]
+
+        if chart_config["generate"]:
+            history = parse_history(chart_config["history"])
+            add_chart_job("plot_throughput_run_chart", history, chart_config["chartName"], chart_config["unit"])            
+
+    def create_work_in_process_run_chart():
+        chart_config = config["workInProcessRunChart"]
+
+        if chart_config["generate"]:
+            history = parse_history(chart_config["history"])
+            add_chart_job("plot_work_in_process_run_chart", history, chart_config["chartName"], get_line_downsampling(chart_config))
+
+    def create_work_started_vs_finished_chart():
+        chart_config = config["startedVsFinishedChart"]
+
+        if chart_config["generate"]:
+            history = parse_history(chart_config["history"])
+            add_chart_job("plot_work_started_vs_finished_chart", history, chart_config["startedColor"], chart_config["closedColor"], chart_config["chartName"])
+
+    def create_estimation_vs_cycle_time_chart():
+        chart_config = config["estimationVsCycleTime"]
+
+        if chart_config["generate"]:
+            history = parse_history(chart_config["history"])
+            add_chart_job("plot_estimation_vs_cycle_time_scatterplot", history, chart_config["chartName"], chart_config["estimationUnit"], get_label_placement(chart_config), get_scatter_density(chart_config))
+
+    def create_process_behaviour_charts():
+        chart_config = config["processBehaviourCharts"]
+
+        if chart_config["generate"]:
+            history = parse_history(chart_config["history"])
+
+            # With a rolling baseline the limits of each value come from the days before it, the fixed baseline is not needed
+            rolling_baseline = chart_config.get("rollingBaseline")
+            baseline_start = None
+            baseline_end = None
+
+            if rolling_baseline:
+                print("Using rolling baseline of the last {0} days".format(rolling_baseline))
+            else:
+                baseline_start = datetime.strptime(chart_config["baselineStart"], "%Y-%m-%d")
+                baseline_end = datetime.strptime(chart_config["baselineEnd"], "%Y-%m-%d")
+
+            line_downsampling = get_line_downsampling(chart_config)
+
+            add_chart_job("plot_throughput_process_behaviour_chart", baseline_start, baseline_end, history, chart_config["throughputChartName"], rolling_baseline, line_downsampling)
+            add_chart_job("plot_wip_process_behaviour_chart", baseline_start, baseline_end, history, chart_config["wipChartName"], rolling_baseline, line_downsampling)
+            add_chart_job("plot_cycle_time_process_behaviour_chart", baseline_start, baseline_end, history, chart_config["cycleTimeChartName"], get_label_placement(chart_config), rolling_baseline, line_downsampling)
+            add_chart_job("plot_total_age_process_behaviour_chart", baseline_start, baseline_end, history, chart_config["itemAgeChartName"], rolling_baseline, line_downsampling)
+
+    def create_monte_carlo_forecast():
+        # Configs from before the forecasts were added don't have this section
+        chart_config = config.get("monteCarloForecast", {"generate": False})
+
+        if chart_config["generate"]:
+            history = parse_history(chart_config["history"])
+            target_date = parse_target_date(chart_config["targetDate"])
+            forecast_settings = (chart_config.get("trials", 1000000), chart_config.get("workers", 1), chart_config.get("seed"))
+
+            add_chart_job("plot_how_many_forecast", history, target_date, chart_config["percentiles"], chart_config["percentileColors"], chart_config["howManyChartName"], *forecast_settings)
+            add_chart_job("plot_when_forecast", history, chart_config["remainingItems"], chart_config["percentiles"], chart_config["percentileColors"], chart_config["whenChartName"], *forecast_settings)
+
+    create_cycle_time_scatterplot()
+    create_work_item_age_scatterplot()
+    create_throughput_run_chart()
+    create_work_in_process_run_chart()
+    create_work_started_vs_finished_chart()
+    create_estimation_vs_cycle_time_chart()    
+    create_process_behaviour_charts()
+    create_monte_carlo_forecast()
+
+    return chart_jobs
+
+def get_label_placement(chart_config):
+    # Charts without the setting keep the exact placement
+    return LabelPlacement(chart_config.get("labelPlacement", "exact"), chart_config.get("labelOutlierPercentile", 85))
+
+def get_line_downsampling(chart_config):
+    # Lines with more points than pointsPerPixel times the width of the chart in pixels are downsampled, null draws every point
+    return LineDownsampling(chart_config.get("pointsPerPixel", 4))
+
+def get_scatter_density(chart_config):
+    # Scatterplots with more items than the threshold show their density, null always shows the single items
+    return ScatterDensity(chart_config.get("densityThreshold", 10000))
+
+def get_earliest_chart_date(config, today):
+    earliest_date = today
+
+    for chart_config in config.values():
+        if not chart_config.get("generate") or "history" not in chart_config:
+            continue
+
+        history = parse_history(chart_config["history"], False)
+        rolling_baseline = chart_config.get("rollingBaseline") or 0
+        earliest_date = min(earliest_date, today - timedelta(days=history + rolling_baseline))
+
+        if "baselineStart" in chart_config and not rolling_baseline:
+            earliest_date = min(earliest_date, datetime.strptime(chart_config["baselineStart"], "%Y-%m-%d"))
+
+    return earliest_date
+
+def parse_history(history, print_history = True):
     try:
         history = int(history)
-        print("Use rolling history of the last {0} days".format(history))
+
+        if print_history:
+            print("Use rolling history of the last {0} days".format(history))
     except ValueError:
         history_start = datetime.strptime(history, "%Y-%m-%d").date()
         today = datetime.today().date()
         history = (today - history_start).days
-        print("Using history with fixed start date {0} - History is {1} days".format(history_start, history))
+
+        if print_history:
+            print("Using history with fixed start date {0} - History is {1} days".format(history_start, history))
             
     return history
 
+def parse_target_date(target_date):
+    # Days are counted from the today of the charts, which might be set in the config
+    try:
+        target_date = int(target_date)
+        print("Forecast the next {0} days".format(target_date))
+    except ValueError:
+        target_date = datetime.strptime(target_date, "%Y-%m-%d")
+        print("Forecast until fixed date {0}".format(target_date.date()))
+
+    return target_date
+
 if __name__ == "__main__":    
     main()
\ No newline at end of file
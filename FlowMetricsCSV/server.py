@@ -0,0 +1,29 @@
+import argparse
+import asyncio
+
+from .ChartServer import ChartServer
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves the charts of a configuration over http. The items stay in memory and are loaded again when the csv file changes.")
+    parser.add_argument("--ConfigFileName", type=str, default="ExampleConfig.json")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--cache-size", type=int, default=64, help="Number of rendered charts and metrics that are kept in memory")
+    parser.add_argument("--no-cache", action='store_true', help="Always parse the csv files instead of using the parsed data from the cache")
+
+    # Settings of the cli that don't apply to the server
+    parser.set_defaults(workers=1, config_workers=1, metrics_only=False, metrics_format="json", force=True)
+
+    args = parser.parse_args()
+
+    chart_server = ChartServer(args.ConfigFileName, args, args.cache_size)
+
+    try:
+        asyncio.run(chart_server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("Stopped serving charts")
+    finally:
+        chart_server.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import os
+from datetime import datetime
+
+import matplotlib.pyplot as plt
+
+from FlowMetricsCSV.FlowMetricsService import FlowMetricsService
+from FlowMetricsCSV.SyntheticDataGenerator import SyntheticDataGenerator
+
+TODAY = datetime(2024, 6, 30)
+
+def test_charts_reuse_one_figure_and_leave_no_open_figures(tmp_path):
+    work_items = SyntheticDataGenerator().generate_work_item_table(500, TODAY)
+    flow_metrics_service = FlowMetricsService(False, str(tmp_path), TODAY)
+
+    # Charts without item labels, like the ones of benchmark_chart_memory
+    charts = [
+        lambda: flow_metrics_service.plot_throughput_run_chart(work_items, 90, "Throughput.png", 'days'),
+        lambda: flow_metrics_service.plot_work_in_process_run_chart(work_items, 90, "WorkInProcess.png"),
+        lambda: flow_metrics_service.plot_work_started_vs_finished_chart(work_items, 90, 'orange', 'green', "StartedVsFinished.png"),
+        lambda: flow_metrics_service.plot_throughput_process_behaviour_chart(work_items, datetime(2024, 1, 1), datetime(2024, 3, 31), 90, "Throughput_PBC.png"),
+    ]
+
+    figures = set()
+
+    for index in range(20):
+        charts[index % len(charts)]()
+        figures.add(id(flow_metrics_service.chart_canvas.axes.figure))
+
+        # Each chart is stored and cleared again, its figure is not known to pyplot
+        assert plt.get_fignums() == []
+
+    assert len(figures) == 1
+    assert len(flow_metrics_service.chart_canvas.axes.figure.axes) == 1
+    assert sorted(os.listdir(tmp_path)) == ["StartedVsFinished.png", "Throughput.png", "Throughput_PBC.png", "WorkInProcess.png"]
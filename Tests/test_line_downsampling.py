@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from FlowMetricsCSV.ChartCanvas import ChartCanvas
+from FlowMetricsCSV.LineDownsampling import LineDownsampling
+from FlowMetricsCSV.XmRChart import XmRChart
+
+# Allowed difference of the outline of the line in pixels
+MAX_OUTLINE_DEVIATION = 0.5
+
+def get_series(name, points):
+    random = np.random.default_rng(42)
+
+    if name == "wip":
+        # Daily WIP as a random walk with a few spikes, like a multi-year history
+        values = np.maximum(np.cumsum(random.integers(-2, 3, points)) + 50, 0).astype(np.float64)
+        spikes = random.choice(points, 10, replace=False)
+        values[spikes] += random.integers(20, 60, len(spikes))
+        return values
+
+    if name == "cycle_times":
+        # Cycle times of closed items, with a few items that took much longer
+        return np.ceil(random.lognormal(1.5, 0.8, points))
+
+    # A flat series with a single spike and a single drop, which only one point each shows
+    values = np.full(points, 10.0)
+    values[points // 3] = 100
+    values[2 * points // 3] = 0
+    return values
+
+def draw_line(chart_canvas, values, kept_points):
+    # Draws the line and returns where its points are on the chart in pixels
+    axes = chart_canvas.create_chart()
+    x_values = np.arange(len(values))
+
+    if kept_points is not None:
+        (x_values, values) = (x_values[kept_points], values[kept_points])
+
+    axes.plot(x_values, values, marker='o', linestyle='-', color='b')
+    axes.figure.canvas.draw()
+
+    positions = axes.transData.transform(np.column_stack((x_values, values)))
+    chart_canvas.discard_chart()
+
+    return positions
+
+def get_outline(positions):
+    # Lowest and highest pixel the line passes in each pixel column, including where it crosses into the next column.
+    # Comparing the line instead of the image leaves out how wide it is drawn and how it's smoothed.
+    (x, y) = (positions[:, 0], positions[:, 1])
+    columns = np.floor(x).astype(np.int64)
+
+    crossed_edges = np.abs(np.diff(columns))
+    segments = np.repeat(np.arange(len(x) - 1), crossed_edges)
+    edge_offsets = np.arange(len(segments)) - np.repeat(np.cumsum(crossed_edges) - crossed_edges, crossed_edges)
+    edges = np.minimum(columns[:-1], columns[1:])[segments] + 1 + edge_offsets
+    edge_y = y[segments] + (y[segments + 1] - y[segments]) * (edges - x[segments]) / (x[segments + 1] - x[segments])
+
+    # A crossing belongs to the columns on both sides of the edge
+    all_columns = np.concatenate((columns, edges - 1, edges)) - columns.min()
+    all_y = np.concatenate((y, edge_y, edge_y))
+
+    bottom = np.full(all_columns.max() + 1, np.inf)
+    top = np.full(all_columns.max() + 1, -np.inf)
+    np.minimum.at(bottom, all_columns, all_y)
+    np.maximum.at(top, all_columns, all_y)
+
+    return (columns.min(), bottom, top)
+
+def get_outline_deviation(full_outline, downsampled_outline):
+    (full_start, full_bottom, full_top) = full_outline
+    (downsampled_start, downsampled_bottom, downsampled_top) = downsampled_outline
+
+    if full_start != downsampled_start or len(full_bottom) != len(downsampled_bottom):
+        return np.inf
+
+    is_drawn = np.isfinite(full_bottom)
+    if not np.array_equal(is_drawn, np.isfinite(downsampled_bottom)):
+        return np.inf
+
+    return max(np.abs(full_bottom - downsampled_bottom)[is_drawn].max(), np.abs(full_top - downsampled_top)[is_drawn].max())
+
+@pytest.mark.parametrize("point_count", [20000, 100000])
+@pytest.mark.parametrize("name", ["wip", "cycle_times", "spikes"])
+def test_downsampled_line_keeps_the_shape_of_the_series(name, point_count):
+    chart_canvas = ChartCanvas(False, "test")
+    values = get_series(name, point_count)
+
+    # The values outside the limits of the first 60 values have to be drawn, like in the process behaviour charts
+    outside_limits = XmRChart.from_baseline(values[:60]).get_signals(values)["outside_limits"]
+
+    axes = chart_canvas.create_chart()
+    kept_points = LineDownsampling().get_kept_points(axes, values, outside_limits)
+    chart_canvas.discard_chart()
+
+    assert kept_points is not None and len(kept_points) < point_count
+
+    full_positions = draw_line(chart_canvas, values, None)
+    downsampled_positions = draw_line(chart_canvas, values, kept_points)
+
+    # The extremes of the series are kept
+    kept_values = values[kept_points]
+    assert kept_values.min() == values.min()
+    assert kept_values.max() == values.max()
+
+    # Every pixel column with a value outside the limits still shows one
+    pixel_columns = np.floor(full_positions[:, 0]).astype(np.int64)
+    kept_outside_limits = np.isin(np.arange(point_count), kept_points) & outside_limits
+    assert np.array_equal(np.unique(pixel_columns[outside_limits]), np.unique(pixel_columns[kept_outside_limits]))
+
+    # The lowest and highest pixel the line passes in each pixel column stay the same
+    assert get_outline_deviation(get_outline(full_positions), get_outline(downsampled_positions)) <= MAX_OUTLINE_DEVIATION
@@ -0,0 +1,14 @@
+import subprocess
+import sys
+
+# Libraries that are only loaded once a csv file is parsed or a chart is created
+HEAVY_MODULES = ["numpy", "pandas", "matplotlib", "adjustText"]
+
+def get_loaded_heavy_modules(module_name):
+    # A new interpreter, so modules that other tests loaded don't count
+    script = "import sys, {0}; print(' '.join(module for module in {1} if module in sys.modules))".format(module_name, HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+def test_cli_starts_without_heavy_modules():
+    assert get_loaded_heavy_modules("FlowMetricsCSV.main") == []
@@ -9,11 +9,12 @@ setup(
         'FlowMetricsCSV': ['ExampleFile.csv', 'logo.png', 'ExampleConfig.json'],
     },
     install_requires=[
-        "argparse", "pandas", "numpy", "matplotlib", "adjustText"
+        "argparse", "pandas", "numpy>=1.22", "matplotlib", "adjustText"
     ],
     entry_points={
         'console_scripts': [
             'flowmetricscsv=FlowMetricsCSV.main:main',
+            'flowmetricscsv-server=FlowMetricsCSV.server:main',
         ],
     },
     author='Benjamin Huser-Berta',
@@ -27,5 +28,5 @@ setup(
         'License :: OSI Approved :: MIT License',
         'Operating System :: OS Independent',
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.9',
 )